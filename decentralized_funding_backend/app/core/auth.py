@@ -4,8 +4,13 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from ..models.models import User, UserBase
+from bson import ObjectId
+from ..models.models import User, UserBase, UserRole, Principal
 from .database import Database
+from .cache import TTLCache
+from .security import hashing_pool
+from . import metrics
+from . import counters
 import os
 from dotenv import load_dotenv
 
@@ -16,15 +21,36 @@ SECRET_KEY = os.getenv("SECRET_KEY", "").strip()
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 300000
+# Opt-in: sign role, verification state and Stellar public key into the token
+JWT_EMBED_CLAIMS = os.getenv("JWT_EMBED_CLAIMS", "false").lower() in ("1", "true", "yes")
 
 # Initial admin credentials
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@example.com")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "adminpassword123")
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
 
+# Principal cache settings
+# Authenticated users are cached per token subject (email) so that repeated
+# requests with the same token skip the users lookup. Keep the TTL short:
+# the cache is per worker and only invalidated locally.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+metrics.register("principal_cache", principal_cache.stats)
+
+token_version_cache = TTLCache(maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+metrics.register("token_version_cache", token_version_cache.stats)
+
+def invalidate_principal(email: str, user_id: Optional[str] = None):
+    """Drops a cached principal, e.g. after its role or verification state changed."""
+    principal_cache.pop(email)
+    if user_id is not None:
+        token_version_cache.pop(str(user_id))
+
 async def create_initial_admin():
     db = Database.get_db()
     # Check if admin exists
@@ -32,20 +58,21 @@ async def create_initial_admin():
         admin_user = {
             "email": ADMIN_EMAIL,
             "username": ADMIN_USERNAME,
-            "password_hash": pwd_context.hash(ADMIN_PASSWORD),
+            "password_hash": await get_password_hash(ADMIN_PASSWORD),
             "role": "admin",
             "is_verified": True,
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }
         await db["users"].insert_one(admin_user)
+        await counters.increment(counters.user_deltas(admin_user))
         print("Initial admin user created")
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await hashing_pool.run(pwd_context.verify, plain_password, hashed_password)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await hashing_pool.run(pwd_context.hash, password)
 
 # def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 #     to_encode = data.copy()
@@ -62,41 +89,106 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None,):
         raise ValueError("Missing 'sub' claim in token data.")
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserBase:
-    credentials_exception = HTTPException(
+def build_token_claims(user: dict) -> dict:
+    """
+    Returns the claims to sign for a user document.
+
+    With JWT_EMBED_CLAIMS enabled the token also carries the user id, role,
+    verification state, Stellar public key and the user's token version, so
+    authorization can be decided without loading the user from the database.
+    """
+    claims = {"sub": user["email"]}
+    if JWT_EMBED_CLAIMS:
+        claims.update({
+            "uid": str(user["_id"]),
+            "role": user.get("role", UserRole.STUDENT.value),
+            "ver": bool(user.get("is_verified", False)),
+            "spk": user.get("stellar_public_key"),
+            "tv": user.get("token_version", 0),
+        })
+    return claims
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    print("Received token:", token)
 
+def _decode_token(token: str) -> dict:
+    # Runs on every authenticated request: nothing is logged, expired and forged tokens alike just get the 401
     try:
-        print("Decoding token...")
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print("Decoded payload:", payload)
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError as e:
-        print("JWT Error:", str(e))  # <-- Add this
-        raise credentials_exception
+    except JWTError:
+        raise _credentials_exception()
 
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
 
-        
-        
-    except JWTError:
-        raise credentials_exception
-    
+async def get_token_version(user_id: str) -> Optional[int]:
+    """Current token version of a user, or None if the user no longer exists."""
+    version = token_version_cache.get(user_id)
+    if version is not None:
+        return version
+
+    if not ObjectId.is_valid(user_id):
+        return None
     db = Database.get_db()
-    user = await db["users"].find_one({"email": email})
+    user = await db["users"].find_one({"_id": ObjectId(user_id)}, {"token_version": 1})
     if user is None:
-        raise credentials_exception
-    return User(**user)
+        return None
+    version = user.get("token_version", 0)
+    token_version_cache.set(user_id, version)
+    return version
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserBase:
+    payload = _decode_token(token)
+    email: str = payload["sub"]
+
+    current_user = principal_cache.get(email)
+    if current_user is None:
+        db = Database.get_db()
+        user = await db["users"].find_one({"email": email})
+        if user is None:
+            raise _credentials_exception()
+        current_user = User.model_validate(user)
+        principal_cache.set(email, current_user)
+
+    # Tokens with embedded claims are revoked by bumping the user's token version
+    if "tv" in payload and payload["tv"] != current_user.token_version:
+        raise _credentials_exception()
+    return current_user
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Lightweight identity for routes that only need id, role and public key.
+
+    Tokens with embedded claims are trusted after a token-version check (served
+    from a short-lived cache), so no user document is loaded. Subject-only
+    tokens fall back to get_current_user.
+    """
+    payload = _decode_token(token)
+    if "uid" not in payload:
+        return Principal.from_user(await get_current_user(token))
+
+    version = await get_token_version(payload["uid"])
+    if version is None or version != payload.get("tv", 0):
+        raise _credentials_exception()
+
+    return Principal(
+        id=payload["uid"],
+        email=payload["sub"],
+        role=payload["role"],
+        is_verified=payload.get("ver", False),
+        stellar_public_key=payload.get("spk"),
+        token_version=version,
+    )
 
-async def get_current_admin(current_user: User = Depends(get_current_user)):
-    if current_user.role != "admin":
+async def get_current_admin(current_principal: Principal = Depends(get_current_principal)):
+    if current_principal.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    return current_user
\ No newline at end of file
+    return current_principal
@@ -0,0 +1,183 @@
+# app/core/cache.py
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache whose entries also expire after `ttl` seconds.
+
+    Not thread-safe: it is meant to be used from the event loop only.
+    Each uvicorn worker has its own copy, so callers must keep the TTL short
+    enough that cross-worker staleness is acceptable.
+
+    `on_remove(key, value, age_seconds)` is called whenever an entry leaves
+    the cache (expiry, LRU eviction, pop or clear).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 60.0,
+        on_remove: Optional[Callable[[Hashable, Any, float], None]] = None,
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_remove = on_remove
+        self._data: "OrderedDict[Hashable, tuple[float, float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        _, expires_at, value = entry
+        if expires_at <= time.monotonic():
+            # Expired entries count as misses and are dropped eagerly
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if key in self._data:
+            self._remove(key)
+        now = time.monotonic()
+        self._data[key] = (now, now + self.ttl, value)
+        while len(self._data) > self.maxsize:
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        if key not in self._data:
+            return None
+        return self._remove(key)
+
+    def clear(self) -> None:
+        for key in list(self._data):
+            self._remove(key)
+
+    def purge_expired(self) -> int:
+        """Drops every expired entry instead of waiting for it to be looked up."""
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at, _) in self._data.items() if expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        return len(expired)
+
+    def _remove(self, key: Hashable) -> Any:
+        inserted_at, _, value = self._data.pop(key)
+        if self.on_remove is not None:
+            self.on_remove(key, value, time.monotonic() - inserted_at)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class StaleWhileRevalidate:
+    """
+    Caches the single result of `loader()` (an async callable).
+
+    - younger than `max_age`: served as is
+    - older than `max_age`: served stale while one background refresh runs
+    - older than `max_stale` (or nothing cached yet): callers wait for the refresh
+
+    Refreshes are single-flight: however many requests arrive, at most one
+    `loader()` call is in progress per process. A failed background refresh
+    keeps the previous value.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[Any]], max_age: float, max_stale: float):
+        self.loader = loader
+        self.max_age = max_age
+        self.max_stale = max(max_stale, max_age)
+        self._value: Any = None
+        self._loaded_at: Optional[float] = None
+        self._refresh: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.waits = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def age(self) -> Optional[float]:
+        return None if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    async def _load(self):
+        try:
+            value = await self.loader()
+        except Exception:
+            self.refresh_failures += 1
+            raise
+        self._value = value
+        self._loaded_at = time.monotonic()
+        self.refreshes += 1
+        return value
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._load())
+            # Background failures are surfaced through refresh_failures, not the loop's error log
+            self._refresh.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._refresh
+
+    async def get(self) -> Tuple[Any, float]:
+        """Returns (value, age_seconds)."""
+        age = self.age()
+        if age is not None and age < self.max_age:
+            self.hits += 1
+            return self._value, age
+        if age is not None and age < self.max_stale:
+            self.stale_hits += 1
+            self._start_refresh()
+            return self._value, age
+        self.waits += 1
+        # shield: a client disconnecting must not cancel the refresh other callers wait on
+        await asyncio.shield(self._start_refresh())
+        return self._value, self.age()
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def stats(self) -> dict:
+        age = self.age()
+        return {
+            "max_age_seconds": self.max_age,
+            "max_stale_seconds": self.max_stale,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "refreshing": self._refresh is not None and not self._refresh.done(),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "waits": self.waits,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
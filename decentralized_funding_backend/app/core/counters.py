@@ -0,0 +1,156 @@
+# app/core/counters.py
+#
+# Platform counters behind /admin/stats. One document per metric in the
+# `counters` collection ({"_id": <metric>, "value": <n>}), bumped with $inc on
+# every write path that changes them. Counter writes are best effort: a failed
+# bump (or a write path that forgot to bump) is corrected by the periodic
+# reconciler, which recounts from the source collections. The reconciler also
+# redoes failed side-effect steps recorded by app/core/repairs.py.
+
+import asyncio
+import os
+from datetime import datetime
+from collections import Counter
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from .database import Database
+from . import metrics
+from .repairs import repair_failed_steps
+
+load_dotenv()
+
+COUNTERS_COLLECTION = "counters"
+# How often each worker recounts and fixes drift; 0 disables the reconciler
+COUNTERS_RECONCILE_INTERVAL_SECONDS = float(os.getenv("COUNTERS_RECONCILE_INTERVAL_SECONDS", "300"))
+
+USERS_TOTAL = "users"
+PROJECTS_TOTAL = "projects"
+TRANSACTIONS_TOTAL = "transactions"
+PENDING_VERIFICATIONS = "pending_verifications"
+COUNTED_ROLES = ("admin", "donor", "student")
+
+
+def users_with_role(role: str) -> str:
+    return f"users.{role}"
+
+
+def user_deltas(user: dict, sign: int = 1) -> dict:
+    """Counter changes caused by adding (sign=1) or removing (sign=-1) a user document."""
+    deltas = {USERS_TOTAL: sign}
+    role = user.get("role")
+    if role in COUNTED_ROLES:
+        deltas[users_with_role(role)] = sign
+    # Same definition as the dashboard: students explicitly marked unverified
+    if role == "student" and user.get("is_verified") is False:
+        deltas[PENDING_VERIFICATIONS] = sign
+    return deltas
+
+
+def user_change_deltas(before: dict, after: dict) -> dict:
+    """Counter changes caused by updating a user from `before` to `after`."""
+    deltas = Counter(user_deltas(after))
+    deltas.subtract(user_deltas(before))
+    return {name: delta for name, delta in deltas.items() if delta}
+
+
+async def increment(deltas: dict, db=None):
+    """Applies all deltas in one round trip. Never raises: drift is the reconciler's job."""
+    if not deltas:
+        return
+    db = db if db is not None else Database.get_db()
+    try:
+        await db[COUNTERS_COLLECTION].bulk_write(
+            [UpdateOne({"_id": name}, {"$inc": {"value": delta}}, upsert=True) for name, delta in deltas.items()],
+            ordered=False,
+        )
+    except Exception as e:
+        print(f"Warning: failed to update counters {deltas}: {e}")
+
+
+async def get_counters(db=None) -> dict:
+    db = db if db is not None else Database.get_db()
+    docs = await db[COUNTERS_COLLECTION].find({}, {"value": 1}).to_list(length=None)
+    return {doc["_id"]: doc["value"] for doc in docs}
+
+
+async def count_actual(db) -> dict:
+    """Recounts every metric from the source collections (expensive, reconciler only)."""
+    queries = {
+        USERS_TOTAL: ("users", {}),
+        **{users_with_role(role): ("users", {"role": role}) for role in COUNTED_ROLES},
+        PENDING_VERIFICATIONS: ("users", {"role": "student", "is_verified": False}),
+        PROJECTS_TOTAL: ("projects", {}),
+        TRANSACTIONS_TOTAL: ("transactions", {}),
+    }
+    counts = await asyncio.gather(*(db[collection].count_documents(query) for collection, query in queries.values()))
+    return dict(zip(queries.keys(), counts))
+
+
+async def reconcile_counters(db=None) -> dict:
+    """
+    Overwrites counters that drifted from the real counts and returns the drift
+    per metric. Increments racing with the recount can leave a small error,
+    which the next pass picks up.
+    """
+    db = db if db is not None else Database.get_db()
+    actual = await count_actual(db)
+    stored = await get_counters(db)
+    drift = {name: value - stored.get(name, 0) for name, value in actual.items() if value != stored.get(name, 0)}
+    if drift:
+        now = datetime.utcnow()
+        await db[COUNTERS_COLLECTION].bulk_write(
+            [
+                UpdateOne({"_id": name}, {"$set": {"value": actual[name], "reconciled_at": now}}, upsert=True)
+                for name in drift
+            ],
+            ordered=False,
+        )
+        print(f"Counters reconciled, drift: {drift}")
+    return drift
+
+
+class CounterReconciler:
+    def __init__(self):
+        self._task = None
+        self.runs = 0
+        self.corrections = 0
+        self.last_drift = {}
+        self.repairs = 0
+
+    async def _run(self):
+        # First pass runs immediately so a fresh deployment starts with real numbers
+        while True:
+            try:
+                self.last_drift = await reconcile_counters()
+                self.runs += 1
+                self.corrections += len(self.last_drift)
+            except Exception as e:
+                print(f"Counter reconciliation failed: {e}")
+            try:
+                self.repairs += await repair_failed_steps()
+            except Exception as e:
+                print(f"Repairing failed steps failed: {e}")
+            await asyncio.sleep(COUNTERS_RECONCILE_INTERVAL_SECONDS)
+
+    async def start(self):
+        if COUNTERS_RECONCILE_INTERVAL_SECONDS > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": COUNTERS_RECONCILE_INTERVAL_SECONDS,
+            "runs": self.runs,
+            "corrections": self.corrections,
+            "last_drift": self.last_drift,
+            "repairs": self.repairs,
+        }
+
+
+counter_reconciler = CounterReconciler()
+metrics.register("counters", counter_reconciler.stats)
@@ -1,4 +1,9 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+from .mongo_monitoring import pool_listener, command_listener
+from .query_profiler import slow_query_profiler
+import json
 import os
 from dotenv import load_dotenv
 
@@ -7,6 +12,65 @@ load_dotenv()
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "decentralized_funding")
 
+# Connection pool settings (per uvicorn worker process)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS") # unset = wait indefinitely
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "") # e.g. "zstd,snappy,zlib"
+# Per-collection read/write concerns as JSON, e.g.
+# {"transactions": {"w": "majority", "j": true}, "users": {"read_concern": "majority"}}
+MONGO_COLLECTION_CONCERNS = os.getenv("MONGO_COLLECTION_CONCERNS", "{}")
+
+
+def _client_options() -> dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "event_listeners": [pool_listener, command_listener, slow_query_profiler],
+    }
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = int(MONGO_WAIT_QUEUE_TIMEOUT_MS)
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+
+def _collection_options() -> dict:
+    options = {}
+    for name, concerns in json.loads(MONGO_COLLECTION_CONCERNS).items():
+        concerns = dict(concerns)
+        collection_options = {}
+        if "read_concern" in concerns:
+            collection_options["read_concern"] = ReadConcern(concerns.pop("read_concern"))
+        if concerns:
+            # Remaining keys are write concern options (w, j, wtimeout)
+            collection_options["write_concern"] = WriteConcern(**concerns)
+        options[name] = collection_options
+    return options
+
+
+class ConfiguredDatabase:
+    """
+    Thin wrapper around the Motor database that applies the configured
+    per-collection read/write concerns. Both db["users"] and db.users work as
+    before; everything else is delegated to the underlying database.
+    """
+
+    def __init__(self, database, collection_options: dict):
+        self._database = database
+        self._collection_options = collection_options
+
+    def __getitem__(self, name):
+        options = self._collection_options.get(name)
+        if options:
+            return self._database.get_collection(name, **options)
+        return self._database[name]
+
+    def __getattr__(self, name):
+        if name in self._collection_options:
+            return self[name]
+        return getattr(self._database, name)
+
 
 class Database:
     client: AsyncIOMotorClient = None
@@ -14,10 +78,10 @@ class Database:
 
     @classmethod
     async def connect_to_mongo(cls):
-        cls.client = AsyncIOMotorClient(MONGODB_URL)
+        cls.client = AsyncIOMotorClient(MONGODB_URL, **_client_options())
         try:
             await cls.client.admin.command('ping')
-            cls.db = cls.client[DATABASE_NAME]
+            cls.db = ConfiguredDatabase(cls.client[DATABASE_NAME], _collection_options())
             print("Successfully connected to MongoDB")
         except Exception as e:
             print(f"Could not connect to MongoDB: {e}")
@@ -34,4 +98,4 @@ class Database:
         return cls.db
 
 
-db = Database()
\ No newline at end of file
+db = Database()
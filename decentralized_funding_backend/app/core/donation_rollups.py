@@ -0,0 +1,270 @@
+# app/core/donation_rollups.py
+#
+# Pre-aggregated donation totals per (bucket, donor, project, asset) at hourly
+# and daily granularity. Only confirmed donations count, the same ones as in
+# project funding totals. Buckets are bumped as donations are recorded
+# confirmed or get confirmed (record_donations) and can be rebuilt from the
+# transactions collection:
+#   python -m app.core.donation_rollups                    # full history
+#   python -m app.core.donation_rollups --start 2025-01-01 --end 2025-02-01
+#
+# Analytics for an arbitrary [start, end] range merge daily buckets for whole
+# days, hourly buckets for whole hours at the edges, and raw transactions only
+# for the partial hours at the very ends.
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from pymongo import UpdateOne
+from .database import Database
+from .project_funding import CONFIRMED_STATUSES, is_confirmed
+
+HOURLY_COLLECTION = "donation_rollups_hourly"
+DAILY_COLLECTION = "donation_rollups_daily"
+ROLLUP_KEY = ["bucket", "donor_id", "project_id", "asset_type"]
+ROLLUPS = [(HOURLY_COLLECTION, "hour"), (DAILY_COLLECTION, "day")]
+
+# Transactions that feed the rollups
+DONATION_QUERY = {"type": "donation", "status": {"$in": CONFIRMED_STATUSES}}
+
+
+def _floor(moment: datetime, unit: str) -> datetime:
+    if unit == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _ceil(moment: datetime, unit: str) -> datetime:
+    floored = _floor(moment, unit)
+    if floored == moment:
+        return moment
+    return floored + (timedelta(days=1) if unit == "day" else timedelta(hours=1))
+
+
+async def record_donations(transactions: List[dict], db=None):
+    """
+    Adds confirmed donations to their hourly and daily buckets (others are
+    skipped). Donations that share a bucket are combined first, so each
+    granularity costs one bulk write.
+    """
+    transactions = [transaction for transaction in transactions if is_confirmed(transaction)]
+    if not transactions:
+        return
+    db = db if db is not None else Database.get_db()
+    now = datetime.utcnow()
+
+    async def bump(collection: str, unit: str):
+        buckets = {}
+        for transaction in transactions:
+            amount = transaction["amount"]
+            key = (
+                _floor(transaction.get("created_at") or now, unit),
+                transaction.get("donor_id"),
+                transaction.get("project_id"),
+                transaction.get("asset_type", "XLM"),
+            )
+            bucket = buckets.setdefault(key, {"total_amount": 0, "count": 0, "min_amount": amount, "max_amount": amount})
+            bucket["total_amount"] += amount
+            bucket["count"] += 1
+            bucket["min_amount"] = min(bucket["min_amount"], amount)
+            bucket["max_amount"] = max(bucket["max_amount"], amount)
+        await db[collection].bulk_write(
+            [
+                UpdateOne(
+                    dict(zip(ROLLUP_KEY, key)),
+                    {
+                        "$inc": {"total_amount": bucket["total_amount"], "count": bucket["count"]},
+                        "$min": {"min_amount": bucket["min_amount"]},
+                        "$max": {"max_amount": bucket["max_amount"]},
+                        "$set": {"updated_at": now},
+                    },
+                    upsert=True,
+                )
+                for key, bucket in buckets.items()
+            ],
+            ordered=False,
+        )
+
+    if transactions:
+        await asyncio.gather(*(bump(collection, unit) for collection, unit in ROLLUPS))
+
+
+async def record_donation(transaction: dict, db=None):
+    """Adds one recorded donation to its hourly and daily buckets."""
+    await record_donations([transaction], db)
+
+
+def _range_query(field: str, start: Optional[datetime], end: Optional[datetime], inclusive_end: bool = False) -> dict:
+    bounds = {}
+    if start is not None:
+        bounds["$gte"] = start
+    if end is not None:
+        bounds["$lte" if inclusive_end else "$lt"] = end
+    return {field: bounds} if bounds else {}
+
+
+def split_range(start: Optional[datetime], end: Optional[datetime]) -> Tuple[list, list, list]:
+    """
+    Splits [start, end] into (raw, hourly, daily) lists of ranges. Hourly and
+    daily ranges are half-open (from, to) pairs aligned to their unit; the raw
+    ranges cover the partial hours at either end as (from, to, inclusive)
+    where only the range ending at `end` includes it. None means unbounded.
+    """
+    raw, hourly, daily = [], [], []
+    first_hour = _ceil(start, "hour") if start is not None else None
+    last_hour = _floor(end, "hour") if end is not None else None
+    if first_hour is not None and last_hour is not None and first_hour >= last_hour:
+        return [(start, end, True)], [], []
+    if start is not None and start < first_hour:
+        raw.append((start, first_hour, False))
+    if end is not None:
+        raw.append((last_hour, end, True))
+
+    first_day = _ceil(first_hour, "day") if first_hour is not None else None
+    last_day = _floor(last_hour, "day") if last_hour is not None else None
+    if first_day is not None and last_day is not None and first_day >= last_day:
+        return raw, [(first_hour, last_hour)], []
+    if first_hour is not None and first_hour < first_day:
+        hourly.append((first_hour, first_day))
+    if last_hour is not None and last_day < last_hour:
+        hourly.append((last_day, last_hour))
+    daily.append((first_day, last_day))
+    return raw, hourly, daily
+
+
+def _bucket_source(ranges: List[tuple]) -> List[dict]:
+    return [
+        {"$match": {"$or": [_range_query("bucket", low, high) for low, high in ranges]}},
+        {"$project": {"_id": 0, "donor_id": 1, "project_id": 1, "asset_type": 1,
+                      "total_amount": 1, "count": 1, "min_amount": 1, "max_amount": 1}},
+    ]
+
+
+def _raw_source(ranges: List[tuple]) -> List[dict]:
+    return [
+        {"$match": {**DONATION_QUERY, "$or": [
+            _range_query("created_at", low, high, inclusive_end=inclusive) for low, high, inclusive in ranges
+        ]}},
+        {"$project": {
+            "_id": 0,
+            "donor_id": 1,
+            "project_id": 1,
+            "asset_type": {"$ifNull": ["$asset_type", "XLM"]},
+            "total_amount": "$amount",
+            "count": {"$literal": 1},
+            "min_amount": "$amount",
+            "max_amount": "$amount",
+        }},
+    ]
+
+
+def merged_rollup_pipeline(start: Optional[datetime], end: Optional[datetime]) -> Tuple[str, List[dict]]:
+    """
+    Returns (collection, stages) producing one row per (donor, project, asset)
+    with total_amount, transaction_count, min_amount and max_amount over the
+    range. Run it with aggregate() on the returned collection.
+    """
+    raw, hourly, daily = split_range(start, end)
+    sources = [
+        (DAILY_COLLECTION, _bucket_source(daily)) if daily else None,
+        (HOURLY_COLLECTION, _bucket_source(hourly)) if hourly else None,
+        ("transactions", _raw_source(raw)) if raw else None,
+    ]
+    sources = [source for source in sources if source is not None]
+    collection, stages = sources[0]
+    stages = list(stages)
+    for other_collection, other_stages in sources[1:]:
+        stages.append({"$unionWith": {"coll": other_collection, "pipeline": other_stages}})
+    stages.append({
+        "$group": {
+            "_id": {"donor": "$donor_id", "project": "$project_id", "asset": "$asset_type"},
+            "total_amount": {"$sum": "$total_amount"},
+            "transaction_count": {"$sum": "$count"},
+            "min_amount": {"$min": "$min_amount"},
+            "max_amount": {"$max": "$max_amount"},
+        }
+    })
+    return collection, stages
+
+
+async def backfill(db=None, start: Optional[datetime] = None, end: Optional[datetime] = None) -> dict:
+    """
+    Rebuilds the buckets from the transactions collection, server side.
+    The range is widened to whole days so every touched bucket is recomputed
+    from complete data. Donations recorded while the backfill runs may be
+    counted twice in the current buckets; avoid ranges that include "now".
+    """
+    db = db if db is not None else Database.get_db()
+    start = _floor(start, "day") if start is not None else None
+    end = _ceil(end, "day") if end is not None else None
+    bucket_range = _range_query("bucket", start, end)
+    results = {}
+    for collection, unit in ROLLUPS:
+        await db[collection].delete_many(bucket_range)
+        pipeline = [
+            {"$match": {**DONATION_QUERY, **_range_query("created_at", start, end)}},
+            {
+                "$group": {
+                    "_id": {
+                        "bucket": {"$dateTrunc": {"date": "$created_at", "unit": unit}},
+                        "donor_id": "$donor_id",
+                        "project_id": "$project_id",
+                        "asset_type": {"$ifNull": ["$asset_type", "XLM"]},
+                    },
+                    "total_amount": {"$sum": "$amount"},
+                    "count": {"$sum": 1},
+                    "min_amount": {"$min": "$amount"},
+                    "max_amount": {"$max": "$amount"},
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    **{field: f"$_id.{field}" for field in ROLLUP_KEY},
+                    "total_amount": 1,
+                    "count": 1,
+                    "min_amount": 1,
+                    "max_amount": 1,
+                    "updated_at": "$$NOW",
+                }
+            },
+            {"$merge": {"into": collection, "on": ROLLUP_KEY, "whenMatched": "replace", "whenNotMatched": "insert"}},
+        ]
+        await db["transactions"].aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+        results[collection] = await db[collection].count_documents(bucket_range)
+    return results
+
+
+async def rebuild_days_of(transactions: List[dict], db=None) -> bool:
+    """
+    Backfills the days `transactions` fall on, once those days are over (so
+    no donation recorded meanwhile can be counted twice). Returns False if it
+    is too early.
+    """
+    if not transactions:
+        return True
+    moments = [transaction.get("created_at") or datetime.utcnow() for transaction in transactions]
+    start = _floor(min(moments), "day")
+    end = _floor(max(moments), "day") + timedelta(days=1)
+    # An hour of slack for donations still sitting in a write-behind buffer
+    if datetime.utcnow() < end + timedelta(hours=1):
+        return False
+    await backfill(db, start, end)
+    return True
+
+
+async def main(start: Optional[datetime], end: Optional[datetime]):
+    await Database.connect_to_mongo()
+    try:
+        for collection, buckets in (await backfill(start=start, end=end)).items():
+            print(f"{collection}: {buckets} buckets")
+    finally:
+        await Database.close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.start, args.end))
@@ -0,0 +1,119 @@
+# app/core/export.py
+
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, List
+from bson import ObjectId, Decimal128
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Rows fetched per Motor batch and encoded per streamed chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Exported columns per collection (also the CSV header). Secrets never leave the DB.
+EXPORT_FIELDS = {
+    "users": [
+        "_id", "email", "username", "full_name", "role", "is_verified",
+        "stellar_public_key", "funding_status", "created_at",
+    ],
+    "projects": [
+        "_id", "title", "category", "status", "creator_id", "target_amount",
+        "current_amount", "deadline", "created_at",
+    ],
+    "transactions": [
+        "_id", "type", "amount", "asset_type", "transaction_hash", "donor_id",
+        "project_id", "source_account_id", "destination_account_id",
+        "recipient_wallet", "status", "created_at",
+    ],
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _to_plain(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    raise TypeError(f"Cannot export value of type {type(value).__name__}")
+
+
+def _encode_ndjson(rows: List[dict], fields: List[str]) -> str:
+    return "".join(
+        json.dumps({field: row.get(field) for field in fields}, default=_to_plain, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return _to_plain(value)
+
+
+def _encode_csv(rows: List[dict], fields: List[str], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(fields)
+    for row in rows:
+        writer.writerow([_csv_cell(row.get(field)) for field in fields])
+    return buffer.getvalue()
+
+
+# Matches the created_at_id indexes (app/core/indexes.py), walked backwards
+EXPORT_SORT = [("created_at", 1), ("_id", 1)]
+
+
+def _after(row: dict) -> dict:
+    """Keyset condition for the rows sorting after `row` on EXPORT_SORT."""
+    created_at = row.get("created_at")
+    if created_at is None:
+        # Missing created_at sorts first; $gt: None would match nothing
+        return {"$or": [{"created_at": {"$ne": None}}, {"created_at": None, "_id": {"$gt": row["_id"]}}]}
+    return {"$or": [
+        {"created_at": {"$gt": created_at}},
+        {"created_at": created_at, "_id": {"$gt": row["_id"]}},
+    ]}
+
+
+async def stream_export(db, collection: str, query: dict, export_format: str) -> AsyncIterator[str]:
+    """
+    Yields the encoded rows of `collection` matching `query`, one chunk per
+    EXPORT_BATCH_SIZE rows, so memory stays constant regardless of result size.
+    Each chunk is its own keyset query on (created_at, _id) rather than one
+    long-lived cursor, so a slow client cannot hold a server cursor open.
+    Starlette awaits each chunk being sent, which gives us client backpressure.
+    """
+    fields = EXPORT_FIELDS[collection]
+    encode = _encode_csv if export_format == "csv" else _encode_ndjson
+    projection = {field: 1 for field in fields}
+
+    if export_format == "csv":
+        yield _encode_csv([], fields, header=True)
+    last = None
+    while True:
+        page_query = query if last is None else {"$and": [query, _after(last)]}
+        rows = await (
+            db[collection]
+            .find(page_query, projection)
+            .sort(EXPORT_SORT)
+            .limit(EXPORT_BATCH_SIZE)
+            .to_list(length=EXPORT_BATCH_SIZE)
+        )
+        if rows:
+            yield encode(rows, fields)
+        if len(rows) < EXPORT_BATCH_SIZE:
+            break
+        last = rows[-1]
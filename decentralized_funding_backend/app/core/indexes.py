@@ -0,0 +1,175 @@
+# app/core/indexes.py
+#
+# Declarative index registry. Every index the application relies on is listed
+# here per collection and applied idempotently at startup (MONGO_ENSURE_INDEXES)
+# or from the command line:
+#   python -m app.core.indexes
+
+import asyncio
+import os
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from dotenv import load_dotenv
+from .database import Database
+from .transaction_events import EVENTS_COLLECTION, ensure_events_collection
+
+load_dotenv()
+
+MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() in ("1", "true", "yes")
+
+INDEXES = {
+    "users": [
+        # Login, registration and token lookups
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        # Admin user listings filtered by role, keyset-paginated newest first on _id
+        IndexModel([("role", ASCENDING), ("_id", DESCENDING)], name="role_id"),
+        # Users export filtered by role and date range
+        IndexModel([("role", ASCENDING), ("created_at", DESCENDING)], name="role_created_at"),
+        # Pending student verifications on the dashboard
+        IndexModel([("role", ASCENDING), ("is_verified", ASCENDING)], name="role_is_verified"),
+        # Dashboard "new users"; (created_at, _id) is also the export keyset (app/core/export.py)
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+    ],
+    "projects": [
+        # Admin student projects ($match on creator_id) and users/detailed $lookup
+        IndexModel([("creator_id", ASCENDING), ("created_at", DESCENDING)], name="creator_id_created_at"),
+        # Dashboard "recent projects" and the export keyset
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        # Project search (GET /api/projects/search); one text index per collection
+        IndexModel(
+            [("title", TEXT), ("tags", TEXT), ("category", TEXT), ("objectives", TEXT), ("description", TEXT)],
+            name="project_search_text",
+            weights={"title": 10, "tags": 5, "category": 3, "objectives": 2, "description": 1},
+            default_language="english",
+        ),
+        # Project listing ordered by funding progress (keyset on funding_ratio, _id)
+        IndexModel([("funding_ratio", DESCENDING), ("_id", DESCENDING)], name="funding_ratio_id"),
+    ],
+    "transactions": [
+        # Donation analytics date range, dashboard ordering and the export keyset
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        # Dashboard "recent donations"
+        IndexModel([("type", ASCENDING), ("created_at", DESCENDING)], name="type_created_at"),
+        # One row per Stellar transaction; makes recording a donation replay-safe
+        IndexModel(
+            [("transaction_hash", ASCENDING)], name="transaction_hash_unique", unique=True,
+            partialFilterExpression={"transaction_hash": {"$type": "string"}}
+        ),
+        # $lookup targets
+        IndexModel([("recipient_wallet", ASCENDING)], name="recipient_wallet"),
+        IndexModel([("donor_id", ASCENDING), ("created_at", DESCENDING)], name="donor_id_created_at"),
+        IndexModel([("project_id", ASCENDING), ("created_at", DESCENDING)], name="project_id_created_at"),
+    ],
+    EVENTS_COLLECTION: [
+        # Per-project trends (the time-series collection also gets its own meta/time index)
+        IndexModel([("meta.project_id", ASCENDING), ("ts", ASCENDING)], name="project_ts"),
+    ],
+    "jobs": [
+        # Job claiming (app/core/jobs.py)
+        IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"),
+    ],
+    "side_effect_repairs": [
+        # Repair claiming (app/core/repairs.py)
+        IndexModel([("locked_until", ASCENDING), ("failed_at", ASCENDING)], name="locked_until_failed_at"),
+    ],
+    "donation_rollups_hourly": [
+        # Upsert key of app/core/donation_rollups.py (also required by the backfill $merge)
+        IndexModel(
+            [("bucket", ASCENDING), ("donor_id", ASCENDING), ("project_id", ASCENDING), ("asset_type", ASCENDING)],
+            name="bucket_donor_project_asset", unique=True
+        ),
+    ],
+    "donation_rollups_daily": [
+        IndexModel(
+            [("bucket", ASCENDING), ("donor_id", ASCENDING), ("project_id", ASCENDING), ("asset_type", ASCENDING)],
+            name="bucket_donor_project_asset", unique=True
+        ),
+    ],
+    "trending_scores": [
+        # Top-K reload of app/core/trending.py, overall and per category
+        IndexModel([("key", DESCENDING)], name="key"),
+        IndexModel([("category", ASCENDING), ("key", DESCENDING)], name="category_key"),
+    ],
+    "stellar_keypair_pool": [
+        # Claims prefer funded keypairs, oldest first
+        IndexModel([("funded", DESCENDING), ("_id", ASCENDING)], name="funded_id"),
+    ],
+}
+
+async def ensure_indexes(db=None) -> dict:
+    """
+    Creates every registered index. Existing identical indexes are a no-op, so
+    this is safe to run on every startup. A conflicting definition (or duplicate
+    data blocking a unique index) is reported without aborting the others.
+    """
+    db = db if db is not None else Database.get_db()
+    # Time-series collections must exist before create_indexes would create them as regular ones
+    await ensure_events_collection(db)
+    results = {}
+    for collection, indexes in INDEXES.items():
+        try:
+            results[collection] = await db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            print(f"Could not create indexes on {collection}: {e}")
+            results[collection] = {"error": str(e)}
+    return results
+
+async def index_usage_report(db=None, collscan_limit: int = 50) -> dict:
+    """
+    Reports per-index usage ($indexStats), registered indexes that are missing,
+    and recent collection scans recorded by the query profiler.
+    Collection scans only show up while profiling is enabled
+    (db.setProfilingLevel(1, {slowms: ...})).
+    """
+    db = db if db is not None else Database.get_db()
+    report = {"collections": {}, "collection_scans": []}
+
+    for collection, indexes in INDEXES.items():
+        stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(length=None)
+        existing = {stat["name"] for stat in stats}
+        report["collections"][collection] = {
+            "indexes": [
+                {
+                    "name": stat["name"],
+                    "key": stat["key"],
+                    "ops": stat["accesses"]["ops"],
+                    "since": stat["accesses"]["since"],
+                }
+                for stat in stats
+            ],
+            "unused": [stat["name"] for stat in stats if stat["accesses"]["ops"] == 0 and stat["name"] != "_id_"],
+            "missing": [index.document["name"] for index in indexes if index.document["name"] not in existing],
+        }
+
+    try:
+        scans = (
+            db["system.profile"]
+            .find({"planSummary": "COLLSCAN", "ns": {"$not": {"$regex": r"\.system\."}}})
+            .sort("ts", -1)
+            .limit(collscan_limit)
+        )
+        async for entry in scans:
+            command = entry.get("command", {})
+            report["collection_scans"].append({
+                "ns": entry.get("ns"),
+                "op": entry.get("op"),
+                "filter_fields": sorted(command.get("filter", {}).keys()),
+                "docs_examined": entry.get("docsExamined"),
+                "millis": entry.get("millis"),
+                "ts": entry.get("ts"),
+            })
+    except OperationFailure as e:
+        report["collection_scans_error"] = str(e)
+
+    return report
+
+async def main():
+    await Database.connect_to_mongo()
+    try:
+        for collection, result in (await ensure_indexes()).items():
+            print(f"{collection}: {result}")
+    finally:
+        await Database.close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
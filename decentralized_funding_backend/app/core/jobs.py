@@ -0,0 +1,198 @@
+# app/core/jobs.py
+
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+from .database import Database
+from . import metrics
+
+load_dotenv()
+
+# Durable job queue settings
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1.0"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "5"))
+# A running job whose lock expired (worker crashed) is picked up again
+JOB_LOCK_SECONDS = float(os.getenv("JOB_LOCK_SECONDS", "120"))
+
+JOBS_COLLECTION = "jobs"
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+
+class JobQueue:
+    """
+    Mongo-backed job queue processed by a pool of asyncio workers.
+
+    Jobs survive restarts because their state lives in the `jobs` collection.
+    A failed job is retried with exponential backoff until `max_attempts`,
+    after which it is marked "failed" and the handler's `on_failure` (if any)
+    is called.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL_SECONDS):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._handlers: Dict[str, JobHandler] = {}
+        self._failure_handlers: Dict[str, JobHandler] = {}
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self.stats_counters = {"enqueued": 0, "succeeded": 0, "retried": 0, "failed": 0}
+
+    def register(self, job_type: str, handler: JobHandler, on_failure: Optional[JobHandler] = None):
+        self._handlers[job_type] = handler
+        if on_failure is not None:
+            self._failure_handlers[job_type] = on_failure
+
+    def _new_job(self, job_type: str, payload: dict, max_attempts: int) -> dict:
+        now = datetime.utcnow()
+        return {
+            "type": job_type,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": now,
+            "locked_until": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    async def enqueue(self, job_type: str, payload: dict, max_attempts: int = JOB_MAX_ATTEMPTS, db=None):
+        db = db if db is not None else Database.get_db()
+        result = await db[JOBS_COLLECTION].insert_one(self._new_job(job_type, payload, max_attempts))
+        self.stats_counters["enqueued"] += 1
+        self._wakeup.set()
+        return result.inserted_id
+
+    async def enqueue_many(self, job_type: str, payloads: List[dict], max_attempts: int = JOB_MAX_ATTEMPTS, db=None):
+        """Same as enqueue() for a batch of payloads, in one insert."""
+        if not payloads:
+            return []
+        db = db if db is not None else Database.get_db()
+        result = await db[JOBS_COLLECTION].insert_many(
+            [self._new_job(job_type, payload, max_attempts) for payload in payloads]
+        )
+        self.stats_counters["enqueued"] += len(payloads)
+        self._wakeup.set()
+        return result.inserted_ids
+
+    async def start(self):
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _claim(self, db):
+        now = datetime.utcnow()
+        return await db[JOBS_COLLECTION].find_one_and_update(
+            {
+                "type": {"$in": list(self._handlers)},
+                "$or": [
+                    {"status": "pending", "run_at": {"$lte": now}},
+                    {"status": "running", "locked_until": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "locked_until": now + timedelta(seconds=JOB_LOCK_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _worker(self, worker_id: int):
+        while not self._stopping:
+            db = Database.get_db()
+            try:
+                job = await self._claim(db)
+            except Exception as e:
+                print(f"Job worker {worker_id} could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(db, job)
+            except Exception as e:
+                # e.g. the status update failed over; the job's lock expires and it is claimed again
+                print(f"Job worker {worker_id} could not finish job {job['_id']} ({job['type']}): {e}")
+
+    async def _run(self, db, job):
+        handler = self._handlers[job["type"]]
+        try:
+            await handler(job["payload"])
+        except Exception as e:
+            await self._handle_failure(db, job, e)
+            return
+
+        await db[JOBS_COLLECTION].update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "done", "locked_until": None, "updated_at": datetime.utcnow()}},
+        )
+        self.stats_counters["succeeded"] += 1
+
+    async def _handle_failure(self, db, job, error: Exception):
+        now = datetime.utcnow()
+        if job["attempts"] < job["max_attempts"]:
+            # Exponential backoff with jitter so retries of a burst do not line up
+            delay = JOB_BACKOFF_BASE_SECONDS * (2 ** (job["attempts"] - 1))
+            delay *= random.uniform(0.8, 1.2)
+            await db[JOBS_COLLECTION].update_one(
+                {"_id": job["_id"]},
+                {"$set": {
+                    "status": "pending",
+                    "run_at": now + timedelta(seconds=delay),
+                    "locked_until": None,
+                    "last_error": str(error),
+                    "updated_at": now,
+                }},
+            )
+            self.stats_counters["retried"] += 1
+            print(f"Job {job['_id']} ({job['type']}) failed, retrying in {delay:.1f}s: {error}")
+            return
+
+        await db[JOBS_COLLECTION].update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "failed", "locked_until": None, "last_error": str(error), "updated_at": now}},
+        )
+        self.stats_counters["failed"] += 1
+        print(f"Job {job['_id']} ({job['type']}) failed permanently: {error}")
+
+        on_failure = self._failure_handlers.get(job["type"])
+        if on_failure is not None:
+            try:
+                await on_failure(job["payload"])
+            except Exception as e:
+                print(f"Failure handler for job {job['_id']} raised: {e}")
+
+    def stats(self) -> dict:
+        return {"workers": len(self._tasks), **self.stats_counters}
+
+
+job_queue = JobQueue()
+metrics.register("job_queue", job_queue.stats)
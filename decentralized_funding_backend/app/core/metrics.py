@@ -0,0 +1,24 @@
+# app/core/metrics.py
+
+from typing import Callable, Dict
+
+# In-process metrics registry.
+# Components register a callable returning a dict of their current counters,
+# and the admin metrics endpoint collects them all into one snapshot.
+_sources: Dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, source: Callable[[], dict]) -> None:
+    """Registers (or replaces) a named metrics source."""
+    _sources[name] = source
+
+
+def snapshot() -> dict:
+    """Returns the current value of every registered metrics source."""
+    result = {}
+    for name, source in _sources.items():
+        try:
+            result[name] = source()
+        except Exception as e:
+            result[name] = {"error": str(e)}
+    return result
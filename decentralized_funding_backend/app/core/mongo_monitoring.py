@@ -0,0 +1,154 @@
+# app/core/mongo_monitoring.py
+
+import threading
+from collections import defaultdict, deque
+from pymongo import monitoring
+from . import metrics
+
+
+def _percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Tracks connection pool (CMAP) events per server address.
+
+    pymongo calls listeners from its own threads, so all counters are
+    guarded by a lock.
+    """
+
+    def __init__(self, wait_samples: int = 1024):
+        self._lock = threading.Lock()
+        self._pools = defaultdict(lambda: {
+            "open": 0,
+            "checked_out": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checkout_timeouts": 0,
+            "pool_clears": 0,
+        })
+        self._wait_ms = defaultdict(lambda: deque(maxlen=wait_samples))
+
+    def _pool(self, event):
+        return self._pools[f"{event.address[0]}:{event.address[1]}"]
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pool(event)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pool(event)["pool_clears"] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pool(event)["open"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._pool(event)["open"] -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool["checkout_failures"] += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                pool["checkout_timeouts"] += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            pool = self._pool(event)
+            pool["checked_out"] += 1
+            pool["checkouts"] += 1
+            self._wait_ms[f"{event.address[0]}:{event.address[1]}"].append(event.duration * 1000)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._pool(event)["checked_out"] -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for address, pool in self._pools.items():
+                waits = list(self._wait_ms[address])
+                result[address] = {
+                    **pool,
+                    "checkout_wait_ms_p50": round(_percentile(waits, 0.50), 3),
+                    "checkout_wait_ms_p99": round(_percentile(waits, 0.99), 3),
+                    "checkout_wait_ms_max": round(max(waits), 3) if waits else 0.0,
+                }
+            return result
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Tracks command count and latency per (collection, command)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._commands = defaultdict(lambda: {"count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0})
+
+    @staticmethod
+    def _collection(event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        return target if isinstance(target, str) else event.database_name
+
+    def started(self, event):
+        key = f"{self._collection(event)}.{event.command_name}"
+        with self._lock:
+            self._in_flight[(event.connection_id, event.request_id)] = key
+
+    def _finished(self, event, failed: bool):
+        with self._lock:
+            key = self._in_flight.pop((event.connection_id, event.request_id), None)
+            if key is None:
+                return
+            duration_ms = event.duration_micros / 1000
+            entry = self._commands[key]
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            if failed:
+                entry["failures"] += 1
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                key: {
+                    "count": entry["count"],
+                    "failures": entry["failures"],
+                    "avg_ms": round(entry["total_ms"] / entry["count"], 3) if entry["count"] else 0.0,
+                    "max_ms": round(entry["max_ms"], 3),
+                }
+                for key, entry in sorted(self._commands.items())
+            }
+
+
+pool_listener = PoolMetricsListener()
+command_listener = CommandMetricsListener()
+metrics.register("mongo_pool", pool_listener.stats)
+metrics.register("mongo_commands", command_listener.stats)
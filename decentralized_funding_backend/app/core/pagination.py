@@ -0,0 +1,38 @@
+# app/core/pagination.py
+
+import base64
+from typing import Any, Callable, List, Optional
+from bson import json_util
+from fastapi import HTTPException, status
+
+# Keyset pagination settings shared by listing endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(key: Any) -> str:
+    """Turns the sort key of the last returned row into an opaque continuation token."""
+    return base64.urlsafe_b64encode(json_util.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Any:
+    """Inverse of encode_cursor; None passes through, garbage is a 400."""
+    if cursor is None:
+        return None
+    try:
+        return json_util.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+def build_page(docs: List[dict], limit: int, key: Callable[[dict], Any] = lambda doc: doc["_id"]) -> dict:
+    """
+    Builds a page from up to `limit + 1` fetched rows: the extra row only
+    tells us whether another page exists.
+    """
+    has_more = len(docs) > limit
+    items = docs[:limit]
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(key(items[-1])) if has_more else None,
+    }
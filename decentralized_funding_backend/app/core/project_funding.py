@@ -0,0 +1,183 @@
+# app/core/project_funding.py
+#
+# Denormalized funding totals on project documents:
+#   current_amount, donation_count, donors, funding_ratio (current / target)
+#
+# A donation counts once it is confirmed on-chain. Donations posted by clients
+# are stored "pending" and a confirm_donation job checks the ledger
+# (app/stellar_utils/transaction_submision_monitoring/confirm_donation.py);
+# the job that moves one from pending to confirmed is the only one that
+# applies it. Donations recorded as already confirmed are applied once, after
+# the transactions insert, whose unique transaction_hash index drops replays.
+# apply_donation also stamps applied_at on the donation before touching the
+# project, so applying the same transaction hash again is a no-op either way.
+# Rebuild everything from the transactions collection with:
+#   python -m app.core.project_funding
+
+import asyncio
+import os
+from datetime import datetime
+from typing import Iterable, List, Optional
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+from .database import Database
+from .jobs import job_queue
+
+load_dotenv()
+
+PENDING_STATUS = "pending"
+CONFIRMED_STATUS = "confirmed"
+FAILED_STATUS = "failed"
+# Transaction statuses that count towards a project's funding
+CONFIRMED_STATUSES = ["completed", "successful", CONFIRMED_STATUS]
+
+CONFIRM_DONATION_JOB = "confirm_donation"
+# With the job queue's backoff, 6 attempts wait ~2.5 minutes for the ledger
+DONATION_CONFIRM_MAX_ATTEMPTS = int(os.getenv("DONATION_CONFIRM_MAX_ATTEMPTS", "6"))
+
+# Shared by the incremental update and the rebuild
+_FUNDING_RATIO = {
+    "$cond": [
+        {"$gt": ["$target_amount", 0]},
+        {"$divide": ["$current_amount", "$target_amount"]},
+        0,
+    ]
+}
+
+
+def is_confirmed(transaction: dict) -> bool:
+    # No status means nobody has checked the ledger yet
+    return transaction.get("status") in CONFIRMED_STATUSES
+
+
+async def enqueue_confirmations(donations: List[dict], db=None):
+    """Queues an on-chain check for each pending donation, in one insert."""
+    await job_queue.enqueue_many(
+        CONFIRM_DONATION_JOB,
+        [{"transaction_id": str(donation["_id"])} for donation in donations],
+        max_attempts=DONATION_CONFIRM_MAX_ATTEMPTS,
+        db=db,
+    )
+
+
+# Returned by apply_donation for whatever reacts to the new totals (trending)
+FUNDED_PROJECT_PROJECTION = {"category": 1, "status": 1, "funding_ratio": 1}
+
+
+async def _claim(transaction: dict, db) -> bool:
+    # transaction_hash is unique, so this lets exactly one caller apply each on-chain transaction
+    result = await db["transactions"].update_one(
+        {"transaction_hash": transaction["transaction_hash"], "applied_at": None},
+        {"$set": {"applied_at": datetime.utcnow()}},
+    )
+    return result.modified_count == 1
+
+
+async def apply_donation(transaction: dict, db=None) -> Optional[dict]:
+    """
+    Adds a confirmed donation to its project in a single atomic update and
+    returns the updated project (FUNDED_PROJECT_PROJECTION). Returns None
+    without touching the project if its transaction hash was already applied.
+    """
+    if not is_confirmed(transaction) or transaction.get("project_id") is None:
+        return None
+    db = db if db is not None else Database.get_db()
+    if not await _claim(transaction, db):
+        return None
+    try:
+        return await _add_to_project(transaction, db)
+    except Exception:
+        # Give the claim back so the repair (a rebuild) or a retry can apply it
+        try:
+            await db["transactions"].update_one(
+                {"transaction_hash": transaction["transaction_hash"]}, {"$set": {"applied_at": None}}
+            )
+        except Exception as e:
+            print(f"Could not release applied_at of {transaction['transaction_hash']}: {e}")
+        raise
+
+
+async def _add_to_project(transaction: dict, db) -> Optional[dict]:
+    donor = [transaction["donor_id"]] if transaction.get("donor_id") is not None else []
+    # Pipeline form of $inc/$addToSet, so funding_ratio sees the new amount in the same write
+    return await db["projects"].find_one_and_update(
+        {"_id": transaction["project_id"]},
+        [
+            {
+                "$set": {
+                    "current_amount": {"$add": [{"$ifNull": ["$current_amount", 0]}, transaction["amount"]]},
+                    "donation_count": {"$add": [{"$ifNull": ["$donation_count", 0]}, 1]},
+                    "donors": {"$setUnion": [{"$ifNull": ["$donors", []]}, donor]},
+                    "updated_at": datetime.utcnow(),
+                }
+            },
+            {"$set": {"funding_ratio": _FUNDING_RATIO}},
+        ],
+        projection=FUNDED_PROJECT_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def rebuild_project_totals(db=None, project_ids: Optional[Iterable] = None) -> int:
+    """
+    Recomputes the funding fields of every project (or just `project_ids`)
+    from confirmed donations, server side in one aggregation. Donations
+    applied while it runs may be overwritten; rerun it if that matters.
+    """
+    db = db if db is not None else Database.get_db()
+    scope = {"_id": {"$in": list(project_ids)}} if project_ids is not None else {}
+    donations = {"type": "donation", "status": {"$in": CONFIRMED_STATUSES}, "applied_at": None}
+    if project_ids is not None:
+        donations["project_id"] = scope["_id"]
+    # Everything counted below is applied; a later apply_donation of one of them must not add it again
+    await db["transactions"].update_many(donations, {"$set": {"applied_at": datetime.utcnow()}})
+    pipeline = [
+        {"$match": scope},
+        {"$project": {"target_amount": 1}},
+        {
+            "$lookup": {
+                "from": "transactions",
+                "localField": "_id",
+                "foreignField": "project_id",
+                "pipeline": [
+                    {"$match": {"type": "donation", "status": {"$in": CONFIRMED_STATUSES}}},
+                    {
+                        "$group": {
+                            "_id": None,
+                            "current_amount": {"$sum": "$amount"},
+                            "donation_count": {"$sum": 1},
+                            "donors": {"$addToSet": "$donor_id"},
+                        }
+                    },
+                ],
+                "as": "funding",
+            }
+        },
+        {"$unwind": {"path": "$funding", "preserveNullAndEmptyArrays": True}},
+        {
+            "$project": {
+                "target_amount": 1,
+                "current_amount": {"$ifNull": ["$funding.current_amount", 0]},
+                "donation_count": {"$ifNull": ["$funding.donation_count", 0]},
+                "donors": {
+                    "$filter": {"input": {"$ifNull": ["$funding.donors", []]}, "cond": {"$ne": ["$$this", None]}}
+                },
+            }
+        },
+        {"$set": {"funding_ratio": _FUNDING_RATIO}},
+        {"$project": {"target_amount": 0}},
+        {"$merge": {"into": "projects", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}},
+    ]
+    await db["projects"].aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+    return await db["projects"].count_documents(scope)
+
+
+async def main():
+    await Database.connect_to_mongo()
+    try:
+        print(f"Rebuilt funding totals of {await rebuild_project_totals()} projects")
+    finally:
+        await Database.close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,250 @@
+# app/core/query_profiler.py
+#
+# Slow-query profiler built on pymongo command monitoring. Every query command
+# is bucketed by its shape (collection, command and filter/pipeline with the
+# literal values stripped). Commands slower than SLOW_QUERY_MS are logged, and
+# a sample of them is re-run with explain("executionStats") in the background
+# so the report shows the plan that was used.
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pymongo import monitoring
+from dotenv import load_dotenv
+from . import metrics
+
+load_dotenv()
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Fraction of slow commands that get an explain, and at most one per shape per interval
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "300"))
+# Distinct shapes tracked per worker; the rest are counted under "other"
+SLOW_QUERY_MAX_SHAPES = int(os.getenv("SLOW_QUERY_MAX_SHAPES", "500"))
+
+# Where the query part lives in each profiled command
+PROFILED_COMMANDS = {
+    "find": "filter",
+    "aggregate": "pipeline",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "update": "updates",
+    "delete": "deletes",
+}
+# Read commands that can be explained without side effects
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct"}
+# Driver/session fields that explain does not accept
+_DRIVER_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "writeConcern", "readConcern"}
+
+
+# Pipeline arguments that describe the query rather than its values
+_STRUCTURAL_KEYS = {"from", "localField", "foreignField", "as", "coll", "path"}
+
+
+def _shape(value):
+    """Replaces literal values with "?" but keeps field names, operators and joins."""
+    if isinstance(value, dict):
+        return {
+            key: item if key in _STRUCTURAL_KEYS and isinstance(item, str) else _shape(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            return [_shape(item) for item in value]
+        return "?"
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> str:
+    part = command.get(PROFILED_COMMANDS[command_name])
+    if command_name in ("update", "delete") and isinstance(part, list):
+        part = [statement.get("q", {}) for statement in part[:1]]
+    shape = {"q": _shape(part or {})}
+    if command_name == "find":
+        if command.get("sort"):
+            shape["sort"] = list(command["sort"].keys())
+        if command.get("projection"):
+            shape["projection"] = sorted(command["projection"].keys())
+    return json.dumps(shape, separators=(",", ":"), default=str)
+
+
+def _find_key(document, key):
+    # explain output nests queryPlanner/executionStats differently for find vs. aggregate
+    if isinstance(document, dict):
+        if key in document:
+            return document[key]
+        children = document.values()
+    elif isinstance(document, list):
+        children = document
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+
+def _plan_stages(plan) -> list:
+    stages = []
+    while isinstance(plan, dict):
+        plan = plan.get("queryPlan", plan)
+        stage = plan.get("stage")
+        if stage:
+            stages.append(f"{stage}({plan['indexName']})" if plan.get("indexName") else stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+
+def summarize_explain(explain: dict) -> dict:
+    planner = _find_key(explain, "queryPlanner") or {}
+    stats = _find_key(explain, "executionStats") or {}
+    stages = _plan_stages(planner.get("winningPlan"))
+    return {
+        "plan": " > ".join(stages),
+        "collection_scan": "COLLSCAN" in " ".join(stages),
+        "n_returned": stats.get("nReturned"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "execution_ms": stats.get("executionTimeMillis"),
+        "explained_at": datetime.utcnow(),
+    }
+
+
+class SlowQueryProfiler(monitoring.CommandListener):
+    """
+    Per-shape latency stats plus sampled explain plans for slow commands.
+    Listener callbacks run on pymongo's threads; explains run on the event
+    loop from start() on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._shapes = {}
+        self._explain_queue = deque(maxlen=100)
+        self._last_explained = {}
+        self._task = None
+        self.explains = 0
+        self.explain_failures = 0
+
+    def started(self, event):
+        if event.command_name not in PROFILED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        try:
+            shape = command_shape(event.command_name, event.command)
+        except Exception:
+            return
+        key = f"{event.database_name}.{collection} {event.command_name} {shape}"
+        with self._lock:
+            self._in_flight[(event.connection_id, event.request_id)] = (key, event)
+
+    def _finished(self, event):
+        with self._lock:
+            entry = self._in_flight.pop((event.connection_id, event.request_id), None)
+            if entry is None:
+                return
+            key, started = entry
+            duration_ms = event.duration_micros / 1000
+            if key not in self._shapes and len(self._shapes) >= SLOW_QUERY_MAX_SHAPES:
+                key = "other"
+            stats = self._shapes.setdefault(key, {
+                "shape": key,
+                "count": 0,
+                "slow_count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "last_slow_at": None,
+                "explain": None,
+            })
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            if duration_ms < SLOW_QUERY_MS:
+                return
+            stats["slow_count"] += 1
+            stats["last_slow_at"] = datetime.utcnow()
+            wants_explain = (
+                key != "other"
+                and started.command_name in EXPLAINABLE_COMMANDS
+                and random.random() < SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+                and time.monotonic() - self._last_explained.get(key, float("-inf")) >= SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS
+            )
+            if wants_explain:
+                self._last_explained[key] = time.monotonic()
+                self._explain_queue.append((key, started.database_name, started.command_name, started.command))
+        print(f"Slow query ({duration_ms:.1f} ms): {key}")
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+    async def _explain(self, key, database_name, command_name, command):
+        from .database import Database
+        if command_name == "aggregate" and any(("$out" in stage or "$merge" in stage) for stage in command.get("pipeline", [])):
+            return
+        explained = {k: v for k, v in command.items() if not k.startswith("$") and k not in _DRIVER_FIELDS}
+        try:
+            explain = await Database.client[database_name].command({"explain": explained, "verbosity": "executionStats"})
+            summary = summarize_explain(explain)
+            self.explains += 1
+        except Exception as e:
+            self.explain_failures += 1
+            summary = {"error": str(e), "explained_at": datetime.utcnow()}
+        with self._lock:
+            if key in self._shapes:
+                self._shapes[key]["explain"] = summary
+        print(f"Explain for slow query {key}: {summary}")
+
+    async def _run(self):
+        while True:
+            while self._explain_queue:
+                await self._explain(*self._explain_queue.popleft())
+            await asyncio.sleep(1)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> list:
+        with self._lock:
+            shapes = [dict(stats) for stats in self._shapes.values() if stats["slow_count"]]
+        for stats in shapes:
+            stats["avg_ms"] = round(stats["total_ms"] / stats["count"], 3)
+            stats["total_ms"] = round(stats["total_ms"], 3)
+            stats["max_ms"] = round(stats["max_ms"], 3)
+        return sorted(shapes, key=lambda stats: stats[order_by], reverse=True)[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._shapes.clear()
+            self._last_explained.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threshold_ms": SLOW_QUERY_MS,
+                "shapes": len(self._shapes),
+                "slow_shapes": sum(1 for stats in self._shapes.values() if stats["slow_count"]),
+                "explains": self.explains,
+                "explain_failures": self.explain_failures,
+            }
+
+
+slow_query_profiler = SlowQueryProfiler()
+metrics.register("slow_queries", slow_query_profiler.stats)
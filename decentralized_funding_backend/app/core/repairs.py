@@ -0,0 +1,96 @@
+# app/core/repairs.py
+#
+# Side effects that follow a write (donation rollups, project totals, events,
+# ...) run as separate steps through run_step(), so one failing does not skip
+# the others. A failed step is recorded in `side_effect_repairs` with the ids
+# of the transactions it was given; the counter reconciler then calls
+# repair_failed_steps(), which hands those transactions to the repairer
+# registered for the step and deletes the record once it succeeds.
+#
+# Repairers must be safe to run more than once (recompute rather than $inc)
+# and may return False to be retried on the next pass.
+
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+from .database import Database
+
+load_dotenv()
+
+REPAIRS_COLLECTION = "side_effect_repairs"
+# A claimed repair is left alone this long, by other workers and by later passes if it asked to wait
+REPAIR_LOCK_SECONDS = float(os.getenv("REPAIR_LOCK_SECONDS", "300"))
+
+StepFunction = Callable[[List[dict]], Awaitable[object]]
+Repairer = Callable[[List[dict]], Awaitable[Optional[bool]]]
+
+_repairers: Dict[str, Repairer] = {}
+
+
+def register(step: str, repairer: Repairer):
+    _repairers[step] = repairer
+
+
+async def record_failure(step: str, transactions: List[dict], error: Exception, db=None):
+    """Never raises: a failed step must not take the rest of the flush down with it."""
+    ids = [transaction["_id"] for transaction in transactions]
+    try:
+        db = db if db is not None else Database.get_db()
+        await db[REPAIRS_COLLECTION].insert_one({
+            "step": step,
+            "transaction_ids": ids,
+            "error": str(error),
+            "attempts": 0,
+            "locked_until": None,
+            "failed_at": datetime.utcnow(),
+        })
+    except Exception as e:
+        print(f"Could not record failed step {step} for transactions {ids}: {e}")
+
+
+async def run_step(step: str, func: StepFunction, transactions: List[dict]) -> bool:
+    """Runs func(transactions); on error records the step for repair and returns False."""
+    try:
+        await func(transactions)
+        return True
+    except Exception as e:
+        print(f"Step {step} failed for {len(transactions)} transactions, recorded for repair: {e}")
+        await record_failure(step, transactions, e)
+        return False
+
+
+async def _claim(db):
+    now = datetime.utcnow()
+    return await db[REPAIRS_COLLECTION].find_one_and_update(
+        {
+            "step": {"$in": list(_repairers)},
+            "$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}],
+        },
+        {"$set": {"locked_until": now + timedelta(seconds=REPAIR_LOCK_SECONDS)}},
+        sort=[("failed_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def repair_failed_steps(db=None) -> int:
+    """Runs the repairer of every recorded failure that is due. Returns how many were repaired."""
+    db = db if db is not None else Database.get_db()
+    repaired = 0
+    # Whatever is not deleted below stays locked, so each record is tried at most once per pass
+    while (record := await _claim(db)) is not None:
+        transactions = await db["transactions"].find({"_id": {"$in": record["transaction_ids"]}}).to_list(length=None)
+        try:
+            done = await _repairers[record["step"]](transactions)
+        except Exception as e:
+            print(f"Repair of step {record['step']} ({record['_id']}) failed: {e}")
+            await db[REPAIRS_COLLECTION].update_one(
+                {"_id": record["_id"]}, {"$inc": {"attempts": 1}, "$set": {"error": str(e)}}
+            )
+            continue
+        if done is False:
+            continue
+        await db[REPAIRS_COLLECTION].delete_one({"_id": record["_id"]})
+        repaired += 1
+    return repaired
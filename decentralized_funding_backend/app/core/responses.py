@@ -0,0 +1,36 @@
+# app/core/responses.py
+#
+# orjson-backed response class that understands BSON types, so raw Mongo
+# documents (ObjectId, Decimal128, datetime) can be returned as they come out
+# of the driver. Endpoints returning raw documents wrap them in
+# MongoJSONResponse themselves: FastAPI's jsonable_encoder (which runs on
+# anything else an endpoint returns) does not know BSON types, and skipping it
+# also saves a pass over every value.
+
+from decimal import Decimal
+from typing import Any
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _decimal(value) -> str:
+    # Same as the CSV/NDJSON export: keep every digit
+    return str(value.to_decimal() if isinstance(value, Decimal128) else value)
+
+
+def bson_default(value):
+    """orjson `default` hook for the types it does not serialize natively."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (Decimal128, Decimal)):
+        return _decimal(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class MongoJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        # datetimes are native to orjson and come out in isoformat, as before
+        return orjson.dumps(content, default=bson_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,252 @@
+# app/core/search_index.py
+#
+# Optional in-process inverted index over project titles, categories and tags
+# for prefix search and autocomplete, enabled with PROJECT_SEARCH_INDEX_ENABLED.
+# It is loaded at startup and kept warm from a change stream on `projects`
+# (change streams need a replica set). Full-text search over descriptions
+# stays on the Mongo text index.
+
+import asyncio
+import heapq
+import os
+import re
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Iterable, List, Optional
+from dotenv import load_dotenv
+from .database import Database
+from . import metrics
+
+load_dotenv()
+
+PROJECT_SEARCH_INDEX_ENABLED = os.getenv("PROJECT_SEARCH_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+PROJECT_SEARCH_RETRY_SECONDS = float(os.getenv("PROJECT_SEARCH_RETRY_SECONDS", "30"))
+# A very short prefix can match thousands of terms; only this many are expanded
+PREFIX_EXPANSION_LIMIT = 64
+# Matches ranked per query; a one-letter query can match most projects, so
+# past this many only the first matches found are ranked
+SEARCH_CANDIDATE_LIMIT = int(os.getenv("PROJECT_SEARCH_CANDIDATE_LIMIT", "5000"))
+
+INDEXED_FIELDS = {"title": 1, "category": 1, "tags": 1, "status": 1}
+# Funding updates touch projects on every donation; only react to changes of indexed fields
+CHANGE_STREAM_PIPELINE = [
+    {
+        "$match": {
+            "$or": [
+                {"operationType": {"$in": ["insert", "replace", "delete"]}},
+                *(
+                    {f"updateDescription.updatedFields.{field}": {"$exists": True}}
+                    for field in INDEXED_FIELDS
+                ),
+            ]
+        }
+    }
+]
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class ProjectSearchIndex:
+    """
+    term -> set of internal document numbers, plus a sorted term list and a
+    sorted title list for prefix lookups with bisect. Only touched from the
+    event loop, so no locking.
+    """
+
+    def __init__(self):
+        self._task = None
+        self.ready = False
+        self.changes_applied = 0
+        self._clear()
+
+    def _clear(self):
+        self._postings = {}
+        self._terms = []
+        self._titles = []
+        self._ids = {}
+        self._docs = {}
+        self._next_docno = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _new_entry(self, project: dict) -> dict:
+        docno = self._next_docno
+        self._next_docno += 1
+        title = project.get("title") or ""
+        title_terms = set(tokenize(title))
+        terms = set(title_terms)
+        terms.update(tokenize(project.get("category") or ""))
+        for tag in project.get("tags") or []:
+            terms.update(tokenize(tag))
+        entry = {
+            "_id": project["_id"],
+            "docno": docno,
+            "title": title,
+            "category": project.get("category"),
+            "status": project.get("status"),
+            "terms": terms,
+            "title_terms": title_terms,
+            "title_key": (title.lower(), docno),
+        }
+        self._ids[project["_id"]] = docno
+        self._docs[docno] = entry
+        return entry
+
+    def add(self, project: dict):
+        self.remove(project["_id"])
+        entry = self._new_entry(project)
+        for term in entry["terms"]:
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = set()
+                insort(self._terms, term)
+            postings.add(entry["docno"])
+        insort(self._titles, entry["title_key"])
+
+    def remove(self, project_id):
+        docno = self._ids.pop(project_id, None)
+        if docno is None:
+            return
+        doc = self._docs.pop(docno)
+        for term in doc["terms"]:
+            postings = self._postings[term]
+            postings.discard(docno)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+        del self._titles[bisect_left(self._titles, doc["title_key"])]
+
+    def bulk_load(self, projects: Iterable[dict]):
+        """Builds the index from scratch; much faster than add() per project."""
+        self._clear()
+        for project in projects:
+            entry = self._new_entry(project)
+            for term in entry["terms"]:
+                self._postings.setdefault(term, set()).add(entry["docno"])
+            self._titles.append(entry["title_key"])
+        self._terms = sorted(self._postings)
+        self._titles.sort()
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        start = bisect_left(self._terms, prefix)
+        terms = []
+        for term in self._terms[start:start + PREFIX_EXPANSION_LIMIT]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, limit: int = 10, category: Optional[str] = None, status: Optional[str] = None) -> List[dict]:
+        """
+        Every word must match; the last one may be a prefix ("solar pan" finds
+        "Solar panels for schools"). Projects matching more words in the title rank first.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        word_sets = [self._postings.get(token) for token in tokens[:-1]]
+        prefix_terms = self._prefix_terms(tokens[-1])
+        if not prefix_terms or any(postings is None for postings in word_sets):
+            return []
+        prefix_sets = [self._postings[term] for term in prefix_terms]
+
+        def matches():
+            # Walk the smallest posting list and probe the others, rather than
+            # materialising unions/intersections of lists that can span most projects
+            if word_sets:
+                word_sets.sort(key=len)
+                for docno in word_sets[0]:
+                    if all(docno in postings for postings in word_sets[1:]) and any(docno in postings for postings in prefix_sets):
+                        yield docno
+            else:
+                seen = set()
+                for postings in prefix_sets:
+                    for docno in postings:
+                        if docno not in seen:
+                            seen.add(docno)
+                            yield docno
+
+        def ranked():
+            for docno in matches():
+                doc = self._docs[docno]
+                if category is not None and doc["category"] != category:
+                    continue
+                if status is not None and doc["status"] != status:
+                    continue
+                title_hits = sum(1 for token in tokens[:-1] if token in doc["title_terms"])
+                title_hits += any(term in doc["title_terms"] for term in prefix_terms)
+                yield (-title_hits, doc["title_key"], doc)
+
+        top = heapq.nsmallest(limit, islice(ranked(), SEARCH_CANDIDATE_LIMIT), key=lambda item: item[:2])
+        return [{"_id": doc["_id"], "title": doc["title"], "category": doc["category"]} for _, _, doc in top]
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Titles starting with `prefix`, alphabetically."""
+        prefix = prefix.lower()
+        start = bisect_left(self._titles, (prefix, -1))
+        results = []
+        for title, docno in self._titles[start:start + limit]:
+            if not title.startswith(prefix):
+                break
+            doc = self._docs[docno]
+            results.append({"_id": doc["_id"], "title": doc["title"]})
+        return results
+
+    def apply_change(self, change: dict):
+        operation = change["operationType"]
+        if operation == "delete":
+            self.remove(change["documentKey"]["_id"])
+        elif operation in ("insert", "update", "replace") and change.get("fullDocument"):
+            self.add(change["fullDocument"])
+        self.changes_applied += 1
+
+    async def load(self, db=None):
+        db = db if db is not None else Database.get_db()
+        projects = await db["projects"].find({}, INDEXED_FIELDS).to_list(length=None)
+        self.bulk_load(projects)
+        print(f"Project search index loaded with {len(self)} projects")
+
+    async def _run(self):
+        while True:
+            try:
+                db = Database.get_db()
+                # Open the stream before loading so nothing changed during the load is missed
+                async with db["projects"].watch(CHANGE_STREAM_PIPELINE, full_document="updateLookup") as stream:
+                    await self.load(db)
+                    self.ready = True
+                    async for change in stream:
+                        self.apply_change(change)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.ready = False
+                print(f"Project search index stream failed, retrying in {PROJECT_SEARCH_RETRY_SECONDS}s: {e}")
+            await asyncio.sleep(PROJECT_SEARCH_RETRY_SECONDS)
+
+    async def start(self):
+        if PROJECT_SEARCH_INDEX_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self.ready = False
+
+    def stats(self) -> dict:
+        return {
+            "enabled": PROJECT_SEARCH_INDEX_ENABLED,
+            "ready": self.ready,
+            "projects": len(self._docs),
+            "terms": len(self._terms),
+            "changes_applied": self.changes_applied,
+        }
+
+
+project_search_index = ProjectSearchIndex()
+metrics.register("project_search_index", project_search_index.stats)
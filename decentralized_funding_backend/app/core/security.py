@@ -0,0 +1,79 @@
+# app/core/security.py
+
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from dotenv import load_dotenv
+from . import metrics
+
+load_dotenv()
+
+# Password hashing pool settings
+# bcrypt releases the GIL while hashing, so a thread pool scales with cores
+# without the pickling overhead of a process pool.
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", str(os.cpu_count() or 2)))
+# Maximum number of hash/verify calls queued or running before new ones get a 503
+HASH_QUEUE_MAX = int(os.getenv("HASH_QUEUE_MAX", "64"))
+
+
+class HashingPool:
+    """Runs CPU-heavy password hashing off the event loop with a bounded backlog."""
+
+    def __init__(self, max_workers: int, max_pending: int, latency_samples: int = 1024):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._latencies = deque(maxlen=latency_samples)
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args):
+        """Runs `fn(*args)` on the pool, rejecting with 503 when the backlog is full."""
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            self.completed += 1
+            self._latencies.append(time.perf_counter() - started)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        samples = sorted(self._latencies)
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            index = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+            return round(samples[index] * 1000, 2)
+
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_ms_p50": percentile(0.50),
+            "latency_ms_p99": percentile(0.99),
+            "latency_ms_max": round(samples[-1] * 1000, 2) if samples else 0.0,
+        }
+
+
+hashing_pool = HashingPool(max_workers=HASH_POOL_SIZE, max_pending=HASH_QUEUE_MAX)
+metrics.register("hashing_pool", hashing_pool.stats)
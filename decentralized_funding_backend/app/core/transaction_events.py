@@ -0,0 +1,203 @@
+# app/core/transaction_events.py
+#
+# Donation and payment events in a MongoDB time-series collection:
+#   {"ts": <created_at>, "meta": {"type", "project_id", "donor_id", "asset_type"},
+#    "amount": ..., "transaction_hash": ...}
+# Only confirmed transactions get an event, the same donations as in project
+# funding totals. Events are appended by the transaction log after each flush
+# and when a pending donation is confirmed. The collection
+# is created by ensure_events_collection() (called from ensure_indexes) because
+# an insert into a missing collection would create a regular one.
+#
+# Copy transactions recorded before the first event with:
+#   python -m app.core.transaction_events --backfill
+
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from typing import List, Optional
+from pymongo.errors import CollectionInvalid, OperationFailure
+from dotenv import load_dotenv
+from .database import Database
+from .project_funding import CONFIRMED_STATUSES, is_confirmed
+
+load_dotenv()
+
+EVENTS_COLLECTION = "transaction_events"
+EVENT_TYPES = ["donation", "payment"]
+TRANSACTION_EVENTS_ENABLED = os.getenv("TRANSACTION_EVENTS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Typical gap between two events of the same (type, project, donor, asset) series
+TRANSACTION_EVENTS_GRANULARITY = os.getenv("TRANSACTION_EVENTS_GRANULARITY", "hours")
+# Raw events older than this are dropped by the server; unset keeps them forever
+TRANSACTION_EVENTS_TTL_DAYS = os.getenv("TRANSACTION_EVENTS_TTL_DAYS")
+
+
+def _ttl_seconds() -> Optional[int]:
+    return int(float(TRANSACTION_EVENTS_TTL_DAYS) * 86400) if TRANSACTION_EVENTS_TTL_DAYS else None
+
+
+async def ensure_events_collection(db=None):
+    """Creates the time-series collection, or applies a changed TTL to an existing one."""
+    db = db if db is not None else Database.get_db()
+    options = {
+        "timeseries": {"timeField": "ts", "metaField": "meta", "granularity": TRANSACTION_EVENTS_GRANULARITY},
+    }
+    if _ttl_seconds() is not None:
+        options["expireAfterSeconds"] = _ttl_seconds()
+    try:
+        await db.create_collection(EVENTS_COLLECTION, **options)
+        print(f"Created time-series collection {EVENTS_COLLECTION}")
+    except CollectionInvalid:
+        # Already exists; granularity can only grow, so only the TTL is kept in sync
+        try:
+            await db.command("collMod", EVENTS_COLLECTION, expireAfterSeconds=_ttl_seconds() or "off")
+        except OperationFailure as e:
+            print(f"Could not update TTL of {EVENTS_COLLECTION}: {e}")
+
+
+def to_event(transaction: dict) -> dict:
+    return {
+        "ts": transaction.get("created_at") or datetime.utcnow(),
+        "meta": {
+            "type": transaction.get("type"),
+            "project_id": transaction.get("project_id"),
+            # Payments have a sender rather than a donor
+            "donor_id": transaction.get("donor_id", transaction.get("sender_id")),
+            "asset_type": transaction.get("asset_type", "XLM"),
+        },
+        "amount": transaction["amount"],
+        "transaction_hash": transaction.get("transaction_hash"),
+    }
+
+
+def _counts(transaction: dict) -> bool:
+    return transaction.get("type") in EVENT_TYPES and is_confirmed(transaction)
+
+
+async def record_events(transactions: List[dict], db=None):
+    events = [to_event(transaction) for transaction in transactions if _counts(transaction)]
+    if not TRANSACTION_EVENTS_ENABLED or not events:
+        return
+    db = db if db is not None else Database.get_db()
+    await db[EVENTS_COLLECTION].insert_many(events, ordered=False)
+
+
+async def record_missing_events(transactions: List[dict], db=None):
+    """Records events for those of `transactions` whose transaction_hash has none yet (repairs a failed record_events)."""
+    transactions = [
+        transaction for transaction in transactions
+        if _counts(transaction) and transaction.get("transaction_hash") is not None
+    ]
+    if not TRANSACTION_EVENTS_ENABLED or not transactions:
+        return
+    db = db if db is not None else Database.get_db()
+    hashes = [transaction["transaction_hash"] for transaction in transactions]
+    recorded = await db[EVENTS_COLLECTION].distinct("transaction_hash", {"transaction_hash": {"$in": hashes}})
+    await record_events([transaction for transaction in transactions if transaction["transaction_hash"] not in set(recorded)], db)
+
+
+def trends_pipeline(
+    event_type: str = "donation",
+    project_id=None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    unit: str = "day",
+    window: int = 7,
+) -> List[dict]:
+    """
+    Per-project series of `unit` buckets with:
+      amount / count            totals in the bucket
+      moving_amount / _count    totals over the last `window` units
+      cumulative_amount         running total since `start`
+      velocity                  amount per `unit` over the last `window` units
+    """
+    match = {"meta.type": event_type}
+    if project_id is not None:
+        match["meta.project_id"] = project_id
+    if start or end:
+        match["ts"] = {}
+        if start:
+            match["ts"]["$gte"] = start
+        if end:
+            match["ts"]["$lte"] = end
+    trailing = {"range": [-(window - 1), 0], "unit": unit}
+    return [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": {"project": "$meta.project_id", "bucket": {"$dateTrunc": {"date": "$ts", "unit": unit}}},
+                "amount": {"$sum": "$amount"},
+                "count": {"$sum": 1},
+            }
+        },
+        {"$project": {"_id": 0, "project_id": "$_id.project", "bucket": "$_id.bucket", "amount": 1, "count": 1}},
+        {
+            "$setWindowFields": {
+                "partitionBy": "$project_id",
+                "sortBy": {"bucket": 1},
+                "output": {
+                    "moving_amount": {"$sum": "$amount", "window": trailing},
+                    "moving_count": {"$sum": "$count", "window": trailing},
+                    "cumulative_amount": {"$sum": "$amount", "window": {"documents": ["unbounded", "current"]}},
+                },
+            }
+        },
+        {
+            "$setWindowFields": {
+                "partitionBy": "$project_id",
+                "sortBy": {"bucket": 1},
+                "output": {
+                    "velocity": {"$derivative": {"input": "$cumulative_amount", "unit": unit}, "window": trailing},
+                },
+            }
+        },
+        {"$sort": {"project_id": 1, "bucket": 1}},
+    ]
+
+
+async def get_trends(db=None, **kwargs) -> List[dict]:
+    db = db if db is not None else Database.get_db()
+    return await db[EVENTS_COLLECTION].aggregate(trends_pipeline(**kwargs), allowDiskUse=True).to_list(length=None)
+
+
+async def backfill(db=None, batch_size: int = 1000) -> int:
+    """
+    Copies transactions older than the oldest recorded event. Time-series
+    collections have no unique indexes, so this cutoff is what keeps a rerun
+    (or events already written by the app) from being duplicated.
+    """
+    db = db if db is not None else Database.get_db()
+    await ensure_events_collection(db)
+    query = {"type": {"$in": EVENT_TYPES}, "status": {"$in": CONFIRMED_STATUSES}}
+    oldest = await db[EVENTS_COLLECTION].find_one({}, {"ts": 1}, sort=[("ts", 1)])
+    if oldest is not None:
+        query["created_at"] = {"$lt": oldest["ts"]}
+    copied = 0
+    batch = []
+    cursor = db["transactions"].find(query).batch_size(batch_size)
+    async for transaction in cursor:
+        batch.append(to_event(transaction))
+        if len(batch) >= batch_size:
+            await db[EVENTS_COLLECTION].insert_many(batch, ordered=False)
+            copied += len(batch)
+            batch = []
+    if batch:
+        await db[EVENTS_COLLECTION].insert_many(batch, ordered=False)
+        copied += len(batch)
+    return copied
+
+
+async def main(batch_size: int):
+    await Database.connect_to_mongo()
+    try:
+        print(f"Copied {await backfill(batch_size=batch_size)} events into {EVENTS_COLLECTION}")
+    finally:
+        await Database.close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backfill", action="store_true", required=True)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
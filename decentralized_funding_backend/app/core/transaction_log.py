@@ -0,0 +1,133 @@
+# app/core/transaction_log.py
+#
+# Every Stellar transaction we record (donations, student payments, ...) goes
+# through record_transaction(), which buffers it in a write-behind buffer.
+# Counters are updated once the batch containing it has been inserted.
+# Everything else (time-series events, donation rollups, project funding
+# totals and trending scores) only counts confirmed transactions, like
+# funding does: pending donations get a confirm_donation job
+# (app/core/project_funding.py) that runs after_confirmation() for them once
+# the ledger has them.
+# Each of those follow-up steps runs on its own (app/core/repairs.py): a
+# failed one is recorded and redone by the reconciler instead of skipping
+# the steps after it.
+
+import asyncio
+import os
+from datetime import datetime
+from typing import List
+from bson import ObjectId
+from dotenv import load_dotenv
+from .database import Database
+from .write_buffer import WriteBehindBuffer
+from . import counters, metrics, repairs
+from .donation_rollups import rebuild_days_of, record_donations
+from .project_funding import (
+    FUNDED_PROJECT_PROJECTION, PENDING_STATUS, apply_donation, enqueue_confirmations, is_confirmed,
+    rebuild_project_totals,
+)
+from .transaction_events import record_events, record_missing_events
+from .trending import trending_tracker
+
+load_dotenv()
+
+TRANSACTION_WRITE_BEHIND_ENABLED = os.getenv("TRANSACTION_WRITE_BEHIND_ENABLED", "true").lower() in ("1", "true", "yes")
+TRANSACTION_WRITE_BATCH_SIZE = int(os.getenv("TRANSACTION_WRITE_BATCH_SIZE", "500"))
+TRANSACTION_WRITE_FLUSH_INTERVAL_SECONDS = float(os.getenv("TRANSACTION_WRITE_FLUSH_INTERVAL_SECONDS", "0.5"))
+# Upper bound on buffered transactions per worker before producers get a 503
+TRANSACTION_WRITE_MAX_PENDING = int(os.getenv("TRANSACTION_WRITE_MAX_PENDING", "10000"))
+# Flushes a rejected transaction is retried on before it goes to transactions_dead_letter
+TRANSACTION_WRITE_MAX_ATTEMPTS = int(os.getenv("TRANSACTION_WRITE_MAX_ATTEMPTS", "5"))
+
+# Steps run after an insert, as recorded in side_effect_repairs
+ROLLUPS_STEP = "donation_rollups"
+FUNDING_STEP = "project_funding"
+CONFIRMATIONS_STEP = "donation_confirmations"
+EVENTS_STEP = "transaction_events"
+
+
+async def apply_confirmed_donations(donations: List[dict]):
+    """Adds confirmed donations to their projects' totals and trending scores. Call once per donation."""
+    projects = await asyncio.gather(*(apply_donation(donation) for donation in donations))
+    for donation, project in zip(donations, projects):
+        if project is not None:
+            trending_tracker.record_donation(donation, project)
+
+
+def _pending(donations: List[dict]) -> List[dict]:
+    # A donation without a status has not been checked against the ledger either
+    return [donation for donation in donations if donation.get("status", PENDING_STATUS) == PENDING_STATUS]
+
+
+async def _after_insert(transactions: List[dict]):
+    # Only documents the insert accepted get here, so a replayed hash never reaches apply_donation.
+    # increment() never raises; counter drift is fixed by the reconciler anyway
+    await counters.increment({counters.TRANSACTIONS_TOTAL: len(transactions)})
+    donations = [transaction for transaction in transactions if transaction.get("type") == "donation"]
+    if donations:
+        confirmed = [donation for donation in donations if is_confirmed(donation)]
+        if confirmed:
+            await repairs.run_step(ROLLUPS_STEP, record_donations, confirmed)
+            await repairs.run_step(FUNDING_STEP, apply_confirmed_donations, confirmed)
+        if pending := _pending(donations):
+            await repairs.run_step(CONFIRMATIONS_STEP, enqueue_confirmations, pending)
+    # record_events skips anything unconfirmed itself
+    await repairs.run_step(EVENTS_STEP, record_events, transactions)
+
+
+async def after_confirmation(donations: List[dict]):
+    """The insert-time steps skipped for donations the confirm_donation job has just confirmed."""
+    await repairs.run_step(ROLLUPS_STEP, record_donations, donations)
+    await repairs.run_step(FUNDING_STEP, apply_confirmed_donations, donations)
+    await repairs.run_step(EVENTS_STEP, record_events, donations)
+
+
+async def _repair_funding(transactions: List[dict]):
+    # apply_confirmed_donations only updates trending once every project update went through
+    donations = [transaction for transaction in transactions if is_confirmed(transaction)]
+    project_ids = {donation["project_id"] for donation in donations if donation.get("project_id") is not None}
+    if not project_ids:
+        return
+    await rebuild_project_totals(project_ids=project_ids)
+    projects = await Database.get_db()["projects"].find(
+        {"_id": {"$in": list(project_ids)}}, FUNDED_PROJECT_PROJECTION
+    ).to_list(length=None)
+    projects = {project["_id"]: project for project in projects}
+    for donation in donations:
+        if donation.get("project_id") in projects:
+            trending_tracker.record_donation(donation, projects[donation["project_id"]])
+
+
+async def _repair_confirmations(transactions: List[dict]):
+    # Jobs for donations that got confirmed meanwhile return straight away
+    await enqueue_confirmations(_pending(transactions))
+
+
+repairs.register(ROLLUPS_STEP, rebuild_days_of)
+repairs.register(FUNDING_STEP, _repair_funding)
+repairs.register(CONFIRMATIONS_STEP, _repair_confirmations)
+repairs.register(EVENTS_STEP, record_missing_events)
+
+
+transaction_writer = WriteBehindBuffer(
+    "transactions",
+    max_batch=TRANSACTION_WRITE_BATCH_SIZE,
+    flush_interval=TRANSACTION_WRITE_FLUSH_INTERVAL_SECONDS,
+    max_pending=TRANSACTION_WRITE_MAX_PENDING,
+    on_flush=_after_insert,
+    enabled=TRANSACTION_WRITE_BEHIND_ENABLED,
+    max_attempts=TRANSACTION_WRITE_MAX_ATTEMPTS,
+)
+metrics.register("transaction_writer", transaction_writer.stats)
+
+
+async def record_transaction(transaction: dict) -> dict:
+    """
+    Queues a transaction document for insertion and returns it with its _id
+    and created_at filled in. A replayed transaction_hash is dropped at flush
+    time by the unique index and has no side effects.
+    """
+    transaction.setdefault("_id", ObjectId())
+    transaction.setdefault("created_at", datetime.utcnow())
+    await transaction_writer.add(transaction)
+    return transaction
@@ -0,0 +1,248 @@
+# app/core/trending.py
+#
+# Trending projects: exponentially decayed donation velocity, boosted by how
+# far a project is towards its target. Scores use forward decay: each donation
+# adds amount * e^(λ·(t - TRENDING_EPOCH)) and we keep the log of the sum, so
+# a project's ranking key never changes while time passes and the per-category
+# top-K lists stay valid without re-decaying anything.
+#
+# Each worker updates its in-memory top-K as its donations are flushed and
+# periodically merges its contributions into `trending_scores` (log-sum-exp in
+# a pipeline update), then reloads the top-K from there to pick up the other
+# workers' donations.
+
+import asyncio
+import math
+import os
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import List, Optional
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from .database import Database
+from . import metrics
+
+load_dotenv()
+
+TRENDING_COLLECTION = "trending_scores"
+ALL_CATEGORIES = "all"
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "24"))
+# Weight of the funding ratio (capped at 1) in the score: score = velocity * (1 + weight * ratio)
+TRENDING_FUNDING_WEIGHT = float(os.getenv("TRENDING_FUNDING_WEIGHT", "1"))
+TRENDING_TOP_K = int(os.getenv("TRENDING_TOP_K", "100"))
+TRENDING_PERSIST_INTERVAL_SECONDS = float(os.getenv("TRENDING_PERSIST_INTERVAL_SECONDS", "60"))
+# Fixed origin of the forward-decay timeline; changing it invalidates stored scores
+TRENDING_EPOCH = datetime(2024, 1, 1)
+DECAY_RATE = math.log(2) / (TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def _elapsed(at: datetime) -> float:
+    return (at - TRENDING_EPOCH).total_seconds()
+
+
+def log_add(a: Optional[float], b: float) -> float:
+    """log(e^a + e^b) without overflow; a may be None for an empty sum."""
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def ranking_key(log_velocity: float, funding_ratio: float) -> float:
+    return log_velocity + math.log1p(TRENDING_FUNDING_WEIGHT * min(max(funding_ratio or 0, 0), 1))
+
+
+def _merge_update(project_id, state: dict, log_contribution: float) -> UpdateOne:
+    # Server-side log_add of this worker's contribution, so workers never overwrite each other.
+    # A missing score is log(0); any very negative number stands in for it
+    old, new = {"$ifNull": ["$log_velocity", -1e18]}, log_contribution
+    merged_velocity = {
+        "$add": [
+            {"$max": [old, new]},
+            {"$ln": {"$add": [1, {"$exp": {"$subtract": [{"$min": [old, new]}, {"$max": [old, new]}]}}]}},
+        ]
+    }
+    return UpdateOne(
+        {"_id": project_id},
+        [
+            {
+                "$set": {
+                    "category": state["category"],
+                    "status": state["status"],
+                    "funding_ratio": state["funding_ratio"],
+                    "log_velocity": merged_velocity,
+                    "updated_at": datetime.utcnow(),
+                }
+            },
+            {
+                "$set": {
+                    "key": {
+                        "$add": [
+                            "$log_velocity",
+                            {"$ln": {"$add": [1, {"$multiply": [TRENDING_FUNDING_WEIGHT, {"$min": [{"$max": ["$funding_ratio", 0]}, 1]}]}]}},
+                        ]
+                    }
+                }
+            },
+        ],
+        upsert=True,
+    )
+
+
+class TrendingTracker:
+    """
+    project_id -> {category, status, funding_ratio, log_velocity} for the
+    projects currently in a top-K list or updated since the last reload, plus
+    per-category lists of (-key, project_id) kept sorted and at most
+    TRENDING_TOP_K long. Only touched from the event loop.
+    """
+
+    def __init__(self):
+        self._task = None
+        self._states = {}
+        self._top = {}
+        # project_id -> log of this worker's contributions not yet persisted
+        self._pending = {}
+        self.donations = 0
+        self.persists = 0
+        self.last_persisted_at = None
+
+    def _unplace(self, project_id, state: dict):
+        for category in (state["category"], ALL_CATEGORIES):
+            top = self._top.get(category, [])
+            entry = (-state["key"], project_id)
+            position = bisect_left(top, entry)
+            if position < len(top) and top[position] == entry:
+                del top[position]
+
+    def _place(self, project_id, state: dict):
+        if state["status"] == "cancelled":
+            return
+        for category in (state["category"], ALL_CATEGORIES):
+            top = self._top.setdefault(category, [])
+            entry = (-state["key"], project_id)
+            if len(top) < TRENDING_TOP_K or entry < top[-1]:
+                insort(top, entry)
+                del top[TRENDING_TOP_K:]
+
+    def _set_state(self, project_id, state: dict):
+        previous = self._states.get(project_id)
+        if previous is not None:
+            self._unplace(project_id, previous)
+        state["key"] = ranking_key(state["log_velocity"], state["funding_ratio"])
+        self._states[project_id] = state
+        self._place(project_id, state)
+
+    def record_donation(self, donation: dict, project: dict):
+        """Called with each applied donation and the project as updated by it."""
+        amount = donation.get("amount") or 0
+        if amount <= 0:
+            return
+        at = donation.get("created_at") or datetime.utcnow()
+        contribution = math.log(amount) + DECAY_RATE * _elapsed(at)
+        project_id = project["_id"]
+        self._pending[project_id] = log_add(self._pending.get(project_id), contribution)
+        previous = self._states.get(project_id)
+        self._set_state(project_id, {
+            "category": project.get("category"),
+            "status": project.get("status"),
+            "funding_ratio": project.get("funding_ratio") or 0,
+            # A project outside the loaded top-K starts from this worker's share; the next reload fixes it
+            "log_velocity": log_add(previous and previous["log_velocity"], contribution),
+        })
+        self.donations += 1
+
+    def top(self, category: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """Best `limit` projects of a category (all categories when None)."""
+        now = _elapsed(datetime.utcnow())
+        feed = []
+        for _, project_id in self._top.get(category or ALL_CATEGORIES, [])[:limit]:
+            state = self._states[project_id]
+            velocity = math.exp(state["log_velocity"] - DECAY_RATE * now)
+            feed.append({
+                "project_id": project_id,
+                "category": state["category"],
+                "score": velocity * (1 + TRENDING_FUNDING_WEIGHT * min(max(state["funding_ratio"], 0), 1)),
+                "velocity": velocity,
+                "funding_ratio": state["funding_ratio"],
+            })
+        return feed
+
+    async def persist(self, db=None):
+        db = db if db is not None else Database.get_db()
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            await db[TRENDING_COLLECTION].bulk_write(
+                [_merge_update(project_id, self._states[project_id], contribution) for project_id, contribution in pending.items()],
+                ordered=False,
+            )
+        except Exception:
+            # Keep the contributions for the next attempt
+            for project_id, contribution in pending.items():
+                self._pending[project_id] = log_add(self._pending.get(project_id), contribution)
+            raise
+        self.persists += 1
+        self.last_persisted_at = datetime.utcnow()
+
+    async def load(self, db=None):
+        """Replaces the top-K lists with the persisted ones, keeping unpersisted local donations."""
+        db = db if db is not None else Database.get_db()
+        projection = {"category": 1, "status": 1, "funding_ratio": 1, "log_velocity": 1}
+        live = {"status": {"$ne": "cancelled"}}
+        loaded = await db[TRENDING_COLLECTION].find(live, projection).sort("key", -1).limit(TRENDING_TOP_K).to_list(length=TRENDING_TOP_K)
+        for category in await db[TRENDING_COLLECTION].distinct("category", live):
+            loaded += await db[TRENDING_COLLECTION].find(
+                {"category": category, **live}, projection
+            ).sort("key", -1).limit(TRENDING_TOP_K).to_list(length=TRENDING_TOP_K)
+
+        local = {project_id: self._states[project_id] for project_id in self._pending}
+        self._states, self._top = {}, {}
+        for doc in loaded:
+            project_id = doc.pop("_id")
+            if project_id not in self._states:
+                self._set_state(project_id, doc)
+        for project_id, state in local.items():
+            stored = self._states.get(project_id)
+            if stored is not None:
+                state = dict(state, log_velocity=log_add(stored["log_velocity"], self._pending[project_id]))
+            self._set_state(project_id, state)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.persist()
+                await self.load()
+            except Exception as e:
+                print(f"Trending scores sync failed: {e}")
+            await asyncio.sleep(TRENDING_PERSIST_INTERVAL_SECONDS)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.persist()
+        except Exception as e:
+            print(f"Could not persist trending scores on shutdown: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "half_life_hours": TRENDING_HALF_LIFE_HOURS,
+            "tracked_projects": len(self._states),
+            "categories": len(self._top),
+            "pending_projects": len(self._pending),
+            "donations": self.donations,
+            "persists": self.persists,
+            "last_persisted_at": self.last_persisted_at,
+        }
+
+
+trending_tracker = TrendingTracker()
+metrics.register("trending", trending_tracker.stats)
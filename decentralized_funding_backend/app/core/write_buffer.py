@@ -0,0 +1,274 @@
+# app/core/write_buffer.py
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from bson.errors import InvalidDocument
+from fastapi import HTTPException, status
+from pymongo.errors import BulkWriteError, DocumentTooLarge, DuplicateKeyError
+from .database import Database
+from .mongo_monitoring import _percentile
+
+DUPLICATE_KEY = 11000
+# Write errors that retrying the same document cannot fix:
+# BadValue, DocumentValidationFailure, BSONObjectTooLarge
+PERMANENT_ERRORS = {2, 121, 10334}
+
+
+class WriteBehindBuffer:
+    """
+    Coalesces single-document inserts into one collection into
+    insert_many(ordered=False) batches.
+
+    A flush happens when `max_batch` documents are waiting or every
+    `flush_interval` seconds, whichever comes first. At most `max_pending`
+    documents are held in memory: once full, add() flushes inline, which
+    slows producers down to the database's pace, and rejects with a 503 if
+    the database still cannot take the backlog.
+
+    `on_flush(docs)` runs after every flush with the documents that were
+    actually inserted (duplicates rejected by a unique index are left out),
+    so side effects such as counters only see durable writes.
+
+    A document the database rejects is retried on later flushes, up to
+    `max_attempts` times, then moved to `<collection>_dead_letter` with the
+    error so it stops holding up the documents behind it. Errors that cannot
+    succeed on retry (validation, oversized documents) are dead-lettered
+    straight away. Whole-batch failures (database unreachable) are retried
+    without a limit; add() pushes back with 503s meanwhile. The server may
+    have applied part of such a batch before the error reached us, so on
+    retry a duplicate _id of one of its documents counts as inserted.
+
+    With `enabled=False` add() inserts the document itself and raises if the
+    insert fails, so the caller never reports a write that did not happen.
+    """
+
+    def __init__(
+        self,
+        collection: str,
+        max_batch: int = 500,
+        flush_interval: float = 0.5,
+        max_pending: int = 10000,
+        on_flush: Optional[Callable[[List[dict]], Awaitable[None]]] = None,
+        enabled: bool = True,
+        max_attempts: int = 5,
+    ):
+        self.collection = collection
+        self.dead_letter_collection = f"{collection}_dead_letter"
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, max_batch)
+        self.on_flush = on_flush
+        self.enabled = enabled
+        self.max_attempts = max_attempts
+        self._pending: List[dict] = []
+        # Failed write attempts per pending document, by id() of the dict
+        self._attempts: Dict[int, int] = {}
+        # id() of documents requeued after a whole-batch failure: they may already be stored
+        self._requeued: Set[int] = set()
+        self._lock = asyncio.Lock()
+        self._batch_ready = asyncio.Event()
+        self._task = None
+        self.flushes = 0
+        self.written = 0
+        self.duplicates = 0
+        self.failures = 0
+        self.rejected = 0
+        self.dead_lettered = 0
+        self._latency_ms = deque(maxlen=1024)
+        self._batch_sizes = deque(maxlen=1024)
+
+    async def add(self, doc: dict):
+        if not self.enabled:
+            await self._write_through(doc)
+            return
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+            if len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many pending writes, please retry shortly.",
+                    headers={"Retry-After": "1"},
+                )
+        self._pending.append(doc)
+        if len(self._pending) >= self.max_batch:
+            self._batch_ready.set()
+
+    async def flush(self):
+        """Writes everything pending. Stops early (keeping the rest) if the database errors."""
+        async with self._lock:
+            while self._pending:
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                if not await self._write(batch):
+                    break
+
+    async def _write(self, batch: List[dict]) -> bool:
+        db = Database.get_db()
+        started = time.perf_counter()
+        ok = True
+        retry = []
+        try:
+            await db[self.collection].insert_many(batch, ordered=False)
+            inserted = batch
+        except BulkWriteError as e:
+            failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+            # Our own earlier attempt stored these; they still need on_flush
+            for i in [i for i, error in failed.items() if self._landed_earlier(batch[i], error)]:
+                del failed[i]
+            errors = [(batch[i], error) for i, error in failed.items() if error["code"] != DUPLICATE_KEY]
+            self.duplicates += len(failed) - len(errors)
+            inserted = [doc for i, doc in enumerate(batch) if i not in failed]
+            if errors:
+                retry = await self._retry_or_dead_letter(errors)
+                if retry:
+                    print(f"Write-behind flush to {self.collection}: {len(retry)} documents failed, will retry")
+                    self._requeue(retry)
+                    ok = False
+        except (DocumentTooLarge, InvalidDocument) as e:
+            # Raised by the driver before anything is sent, for the whole batch
+            if len(batch) > 1:
+                results = [await self._write([doc]) for doc in batch]
+                return all(results)
+            await self.dead_letter(batch[0], str(e), None)
+            inserted = []
+        except Exception as e:
+            print(f"Write-behind flush to {self.collection} failed, will retry: {e}")
+            self._requeued.update(id(doc) for doc in batch)
+            retry = batch
+            self._requeue(batch)
+            inserted = []
+            ok = False
+
+        # Whatever is not being retried was inserted, dropped or dead-lettered
+        retrying = {id(doc) for doc in retry}
+        for doc in batch:
+            if id(doc) not in retrying:
+                self._forget(doc)
+        self.flushes += 1
+        self.written += len(inserted)
+        self._latency_ms.append((time.perf_counter() - started) * 1000)
+        self._batch_sizes.append(len(batch))
+        if not ok:
+            self.failures += 1
+        if inserted and self.on_flush is not None:
+            try:
+                await self.on_flush(inserted)
+            except Exception as e:
+                print(f"Write-behind on_flush for {self.collection} failed: {e}")
+        return ok
+
+    def _landed_earlier(self, doc: dict, error: dict) -> bool:
+        if error["code"] != DUPLICATE_KEY or id(doc) not in self._requeued:
+            return False
+        # A duplicate on another unique index (transaction_hash) is a real replay
+        return "_id" in (error.get("keyPattern") or {}) or " index: _id_ " in error.get("errmsg", "")
+
+    def _forget(self, doc: dict):
+        self._attempts.pop(id(doc), None)
+        self._requeued.discard(id(doc))
+
+    def _requeue(self, docs: List[dict]):
+        # Failed documents go back in front so they are retried first
+        self._pending[:0] = docs
+
+    async def _retry_or_dead_letter(self, errors: List[tuple]) -> List[dict]:
+        """Dead-letters documents that cannot or may no longer be retried; returns the rest."""
+        retry = []
+        for doc, error in errors:
+            attempts = self._attempts.get(id(doc), 0) + 1
+            if error["code"] in PERMANENT_ERRORS or attempts >= self.max_attempts:
+                await self.dead_letter(doc, error.get("errmsg", ""), error["code"])
+            else:
+                self._attempts[id(doc)] = attempts
+                retry.append(doc)
+        return retry
+
+    async def dead_letter(self, doc: dict, error: str, code: Optional[int] = None):
+        """Moves a document to the dead-letter collection. Never raises."""
+        self._forget(doc)
+        self.dead_lettered += 1
+        print(f"Write-behind flush to {self.collection}: moving {doc.get('_id')} to {self.dead_letter_collection}: {error}")
+        entry = {"error": error, "code": code, "failed_at": datetime.utcnow()}
+        db = Database.get_db()
+        try:
+            await db[self.dead_letter_collection].insert_one({**entry, "document": doc})
+        except (DocumentTooLarge, InvalidDocument):
+            # The document itself is what Mongo cannot store; keep its text
+            try:
+                await db[self.dead_letter_collection].insert_one({**entry, "document_repr": repr(doc)[:100_000]})
+            except Exception as e:
+                print(f"Could not dead-letter {self.collection} document, dropping it: {e}: {doc!r}")
+        except Exception as e:
+            print(f"Could not dead-letter {self.collection} document, dropping it: {e}: {doc!r}")
+
+    async def _write_through(self, doc: dict):
+        """Inserts one document now and raises if it was not written (a replayed duplicate counts as written)."""
+        db = Database.get_db()
+        started = time.perf_counter()
+        try:
+            await db[self.collection].insert_one(doc)
+        except DuplicateKeyError:
+            self.duplicates += 1
+            return
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.flushes += 1
+            self._latency_ms.append((time.perf_counter() - started) * 1000)
+            self._batch_sizes.append(1)
+        self.written += 1
+        if self.on_flush is not None:
+            try:
+                await self.on_flush([doc])
+            except Exception as e:
+                print(f"Write-behind on_flush for {self.collection} failed: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Write-behind flush loop error: {e}")
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the timer and writes whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        if self._pending:
+            print(f"Write-behind buffer for {self.collection} lost {len(self._pending)} documents on shutdown")
+
+    def stats(self) -> dict:
+        latencies = list(self._latency_ms)
+        sizes = list(self._batch_sizes)
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "flushes": self.flushes,
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "dead_lettered": self.dead_lettered,
+            "batch_size_avg": round(sum(sizes) / len(sizes), 1) if sizes else 0.0,
+            "batch_size_max": max(sizes) if sizes else 0,
+            "flush_ms_p50": round(_percentile(latencies, 0.50), 3),
+            "flush_ms_p99": round(_percentile(latencies, 0.99), 3),
+        }
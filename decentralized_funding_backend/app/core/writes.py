@@ -0,0 +1,38 @@
+# app/core/writes.py
+#
+# Single-round-trip creates. Duplicates are caught by the collection's unique
+# indexes (see app/core/indexes.py) instead of a find_one pre-check, which both
+# saves a round trip and closes the check-then-insert race. The created
+# document is returned as inserted, with the fields the server would assign
+# (_id, timestamps) filled in client-side, so there is no re-read either.
+
+from datetime import datetime
+from bson import ObjectId
+from fastapi import HTTPException, status
+from pymongo.errors import DuplicateKeyError
+from .database import Database
+
+
+async def insert_document(
+    collection: str,
+    document: dict,
+    duplicate_detail: str = "Already exists",
+    timestamps: bool = True,
+    db=None,
+) -> dict:
+    """
+    Inserts `document` and returns it with _id (and created_at/updated_at
+    unless `timestamps` is False) set. A unique index violation becomes a 400
+    with `duplicate_detail`.
+    """
+    db = db if db is not None else Database.get_db()
+    document.setdefault("_id", ObjectId())
+    if timestamps:
+        now = datetime.utcnow()
+        document.setdefault("created_at", now)
+        document.setdefault("updated_at", now)
+    try:
+        await db[collection].insert_one(document)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=duplicate_detail)
+    return document
@@ -3,12 +3,27 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.responses import JSONResponse
 from app.core.database import Database
+from app.core.responses import MongoJSONResponse
+from app.core.security import hashing_pool
+from app.core.jobs import job_queue
+from app.core.indexes import ensure_indexes, MONGO_ENSURE_INDEXES
+from app.core.transaction_events import ensure_events_collection
+from app.core.counters import counter_reconciler
+from app.core.transaction_log import transaction_writer
+from app.core.query_profiler import slow_query_profiler
+from app.core.search_index import project_search_index
+from app.core.trending import trending_tracker
+from app.stellar_utils.horizon import Horizon
+from app.stellar_utils.account_management import account_funding # Registers the fund_account job handler
+from app.stellar_utils.transaction_submision_monitoring import confirm_donation # Registers the confirm_donation job handler
+from app.stellar_utils.account_management.keypair_pool import keypair_pool
 # Import all necessary routers
 from app.routes import student_transactions # Assuming this is your new router file
 from app.routes import user_routes # Assuming you have a user router
 from app.routes import project_routes # Assuming you have a project router
 from app.routes import donation_routes # Assuming you have a donation router
 from app.routes import auth # Assuming this is your auth router
+from app.routes import admin # Admin-only routes (user management, stats, metrics)
 
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel # Import BaseModel for defining schemas in OpenAPI manually
@@ -20,7 +35,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url=None,    # Disable default docs
     redoc_url=None,   # Disable default redoc
-    openapi_url=None  # Disable default OpenAPI schema
+    openapi_url=None,  # Disable default OpenAPI schema
+    default_response_class=MongoJSONResponse  # orjson, with ObjectId/Decimal128 support
 )
 
 # Add CORS middleware
@@ -39,12 +55,38 @@ async def startup_db_client():
     """Connects to the MongoDB database on application startup."""
     await Database.connect_to_mongo()
     print("Connected to MongoDB.") # Optional: Add logging
+    # One pooled Horizon client for the whole worker, like the Mongo client
+    await Horizon.connect()
+    await slow_query_profiler.start()
+    if MONGO_ENSURE_INDEXES:
+        await ensure_indexes()
+    else:
+        # Still needed: the first event insert would otherwise create a regular collection
+        await ensure_events_collection()
+    await job_queue.start()
+    await transaction_writer.start()
+    await keypair_pool.start()
+    await counter_reconciler.start()
+    await project_search_index.start()
+    await trending_tracker.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Closes the MongoDB connection on application shutdown."""
+    await project_search_index.stop()
+    await counter_reconciler.stop()
+    await keypair_pool.stop()
+    await job_queue.stop()
+    # Jobs are done with Stellar by now
+    await Horizon.close()
+    # Flush buffered transaction records before the connection goes away
+    await transaction_writer.stop()
+    # After the writer, so the donations of its final flush are in the persisted scores
+    await trending_tracker.stop()
+    await slow_query_profiler.stop()
     await Database.close_mongo_connection()
     print("Closed MongoDB connection.") # Optional: Add logging
+    hashing_pool.shutdown()
 
 # Include routers
 # Ensure the router variables match your imported router files
@@ -53,6 +95,7 @@ app.include_router(user_routes.router, prefix="/api/users", tags=["users"]) # As
 app.include_router(project_routes.router, prefix="/api/projects", tags=["projects"]) # Assuming project_router is a module with a 'router' instance
 app.include_router(donation_routes.router, prefix="/api/donations", tags=["donations"]) # Assuming donation_router is a module with a 'router' instance
 app.include_router(student_transactions.router, prefix="/api/stellar", tags=["stellar"]) # Include the new stellar transactions router
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 # Custom docs endpoints
 @app.get("/docs", include_in_schema=False)
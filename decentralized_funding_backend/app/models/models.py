@@ -1,36 +1,39 @@
 from datetime import datetime
-from typing import Optional, List, Any
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from functools import lru_cache
+from typing import Optional, List, Any, Annotated
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, GetJsonSchemaHandler, TypeAdapter
+from pydantic_core import core_schema
 from bson import ObjectId
 from enum import Enum
 
-# Assuming you have these custom types and base model defined as you showed
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+class _ObjectIdSchema:
+    """
+    Compiled core schema for ObjectId fields: ObjectId instances pass an
+    isinstance check, 24-hex-digit strings are converted, and JSON output is
+    the hex string. Python-mode dumps keep the ObjectId for writing back to Mongo.
+    """
 
     @classmethod
-    def validate(cls, v, handler):
-        if not v:
-            return None
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
+    def __get_pydantic_core_schema__(cls, source_type: Any, handler) -> core_schema.CoreSchema:
+        from_str = core_schema.chain_schema([
+            core_schema.str_schema(pattern="^[0-9a-fA-F]{24}$"),
+            core_schema.no_info_plain_validator_function(ObjectId),
+        ])
+        return core_schema.json_or_python_schema(
+            json_schema=from_str,
+            python_schema=core_schema.union_schema([core_schema.is_instance_schema(ObjectId), from_str]),
+            serialization=core_schema.plain_serializer_function_ser_schema(str, when_used="json"),
+        )
 
     @classmethod
-    def __get_pydantic_json_schema__(cls, field_schema: dict[str, Any], field) -> dict[str, Any]:
-        field_schema.update(type="string")
-        return field_schema
+    def __get_pydantic_json_schema__(cls, schema: core_schema.CoreSchema, handler: GetJsonSchemaHandler) -> dict[str, Any]:
+        return {"type": "string", "pattern": "^[0-9a-fA-F]{24}$"}
 
-    def __str__(self):
-        return str(self)
+PyObjectId = Annotated[ObjectId, _ObjectIdSchema]
 
 class MongoBaseModel(BaseModel):
     model_config = ConfigDict(
         populate_by_name=True,
-        arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str}
     )
 
 # Keep your existing Enums
@@ -74,7 +77,7 @@ class UserBase(MongoBaseModel):
 
 # Modified User model to include Stellar keys and link profiles
 class User(UserBase):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    id: PyObjectId = Field(default_factory=ObjectId, alias="_id")
     password_hash: str # Stored hash of the password
 
     # --- Added fields for Stellar Keys ---
@@ -83,6 +86,9 @@ class User(UserBase):
     # ------------------------------------
 
     role: UserRole = UserRole.STUDENT # Set default role here
+    is_verified: bool = False # Set by an admin via /admin/verify-student
+    token_version: int = 0 # Bumped to revoke tokens carrying embedded claims
+    funding_status: Optional[str] = None # "pending", "funded" or "failed" (Friendbot funding job)
 
     projects_created: List[PyObjectId] = [] # List of Project ObjectIds created by this user (if student)
     donations_made: List[PyObjectId] = [] # List of Transaction ObjectIds made by this user (if donor)
@@ -96,11 +102,29 @@ class User(UserBase):
     # Ensure correct aliases and config for MongoDB
     model_config = ConfigDict(
         populate_by_name=True,
-        arbitrary_types_allowed=True, # Allows PyObjectId and Keypair types if needed directly in models (be careful)
-        json_encoders={ObjectId: str}
     )
 class UserPublic(UserBase):
     pass  # For external responses, no password
+
+# Lightweight identity built from signed token claims (no database lookup)
+class Principal(MongoBaseModel):
+    id: str
+    email: EmailStr
+    role: UserRole
+    is_verified: bool = False
+    stellar_public_key: Optional[str] = None
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user: "User") -> "Principal":
+        return cls(
+            id=str(user.id),
+            email=user.email,
+            role=user.role,
+            is_verified=user.is_verified,
+            stellar_public_key=user.stellar_public_key,
+            token_version=user.token_version,
+        )
 # Keep ProjectBase and Project models
 
 class ProjectBase(MongoBaseModel):
@@ -119,7 +143,9 @@ class Project(ProjectBase):
     id: Optional[PyObjectId] = Field(alias="_id", default=None)
     creator_id: PyObjectId # Link back to the User (student) who created the project
 
-    current_amount: float = 0.0 # Keep track of funding received
+    current_amount: float = 0.0 # Keep track of funding received (maintained by app/core/project_funding.py)
+    donation_count: int = 0
+    funding_ratio: float = 0.0 # current_amount / target_amount, indexed for "most funded" listings
     status: ProjectStatus = ProjectStatus.PENDING
     media_urls: List[str] = []
     # Donors who have contributed directly to this project (list of User ObjectIds)
@@ -154,5 +180,30 @@ class Transaction(TransactionBase):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     block_height: Optional[int] = None # Ledger sequence number
     confirmed_at: Optional[datetime] = None # Timestamp when confirmed on ledger
+    applied_at: Optional[datetime] = None # When the donation was added to its project's totals
+
+    # Add fields for fees, operation type, etc if needed for detailed logging
+
+
+# A donation as POST /api/donations/ stores it in transactions: no Stellar
+# account ids, and "pending" until the confirm_donation job checks the ledger
+class Donation(TransactionBase):
+    id: PyObjectId = Field(alias="_id")
+    donor_id: PyObjectId
+    project_id: PyObjectId
+    type: str = "donation"
+    status: str = "pending" # "pending", "confirmed" or "failed"
+    created_at: datetime
+    block_height: Optional[int] = None
+    confirmed_at: Optional[datetime] = None
+
+
+# Validating a whole result list in one call skips the per-document Python
+# overhead of Model(**doc); adapters are built once per model
+@lru_cache(maxsize=None)
+def list_adapter(model: type) -> TypeAdapter:
+    return TypeAdapter(List[model])
 
-    # Add fields for fees, operation type, etc if needed for detailed logging
\ No newline at end of file
+def validate_many(model: type, documents: List[dict]) -> list:
+    """Validates raw Mongo documents into `model` instances in bulk."""
+    return list_adapter(model).validate_python(documents)
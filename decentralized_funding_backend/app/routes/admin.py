@@ -1,42 +1,146 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from ..core.auth import get_current_admin
+from fastapi.responses import StreamingResponse
+from ..core.auth import get_current_admin, invalidate_principal
 from ..core.database import Database
-from ..models.models import User
+from ..core import metrics
+from ..core.indexes import index_usage_report
+from ..core.query_profiler import SLOW_QUERY_MS, slow_query_profiler
+from ..core.export import EXPORT_FORMATS, stream_export
+from ..core import counters
+from ..core.cache import StaleWhileRevalidate
+from ..core.donation_rollups import merged_rollup_pipeline
+from ..core.transaction_events import get_trends
+from ..core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, build_page, decode_cursor
+from ..core.responses import MongoJSONResponse
+from ..stellar_utils.key_security import set_signing_key_cache_enabled
+from ..stellar_utils.key_rotation import rotate_all_secret_keys, get_rotation_checkpoints
+import asyncio
+from ..models.models import Principal
 from bson import ObjectId
 from enum import Enum
 from typing import List, Optional
 from datetime import datetime
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Dashboard snapshots younger than MAX_AGE are served as is; older ones are
+# served while a background refresh runs, up to MAX_STALE.
+DASHBOARD_CACHE_MAX_AGE_SECONDS = float(os.getenv("DASHBOARD_CACHE_MAX_AGE_SECONDS", "10"))
+DASHBOARD_CACHE_MAX_STALE_SECONDS = float(os.getenv("DASHBOARD_CACHE_MAX_STALE_SECONDS", "300"))
 
 class UserRole(str, Enum):
     ADMIN = "admin"
     DONOR = "donor"
     STUDENT = "student"
 
+class ExportCollection(str, Enum):
+    USERS = "users"
+    PROJECTS = "projects"
+    TRANSACTIONS = "transactions"
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
 router = APIRouter()
 
+# Background key rotation started from this worker (at most one at a time)
+_key_rotation_task: Optional[asyncio.Task] = None
+
+# Fields the admin UI renders; secrets and password hashes never leave the DB
+USER_LIST_PROJECTION = {
+    "email": 1,
+    "username": 1,
+    "full_name": 1,
+    "role": 1,
+    "is_verified": 1,
+    "stellar_public_key": 1,
+    "funding_status": 1,
+    "created_at": 1,
+}
+PROJECT_SUMMARY_PROJECTION = {
+    "title": 1,
+    "category": 1,
+    "status": 1,
+    "target_amount": 1,
+    "current_amount": 1,
+    "donation_count": 1,
+    "funding_ratio": 1,
+    "deadline": 1,
+    "created_at": 1,
+}
+DONATION_SUMMARY_PROJECTION = {
+    "amount": 1,
+    "asset_type": 1,
+    "donor_id": 1,
+    "project_id": 1,
+    "transaction_hash": 1,
+    "created_at": 1,
+}
+# Cap on rows embedded per parent by the detailed listings' $lookup stages
+MAX_EMBEDDED_ITEMS = 50
+
+def _created_at_range(start_date: Optional[datetime], end_date: Optional[datetime]) -> dict:
+    match_query = {}
+    if start_date or end_date:
+        match_query["created_at"] = {}
+        if start_date:
+            match_query["created_at"]["$gte"] = start_date
+        if end_date:
+            match_query["created_at"]["$lte"] = end_date
+    return match_query
+
+def _keyset_match(cursor: Optional[str]) -> dict:
+    # Pages are ordered newest first by _id
+    last_id = decode_cursor(cursor)
+    return {"_id": {"$lt": last_id}} if last_id is not None else {}
+
 @router.get("/users")
 async def list_users(
     role: Optional[UserRole] = None,
-    current_admin: User = Depends(get_current_admin)
-) -> List[dict]:
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_admin: Principal = Depends(get_current_admin)
+) -> dict:
     db = Database.get_db()
     filter_query = {"role": role} if role else {}
-    users = await db["users"].find(filter_query).to_list(length=None)
-    return users
+    filter_query.update(_keyset_match(cursor))
+    users = await (
+        db["users"]
+        .find(filter_query, USER_LIST_PROJECTION)
+        .sort("_id", -1)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    return MongoJSONResponse(build_page(users, limit))
 
 @router.get("/users/detailed")
 async def get_detailed_users(
     role: Optional[UserRole] = None,
-    current_admin: User = Depends(get_current_admin)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_admin: Principal = Depends(get_current_admin)
 ):
     db = Database.get_db()
+    match_query = {"role": role.value} if role else {}
+    match_query.update(_keyset_match(cursor))
     pipeline = [
-        {"$match": {"role": role.value} if role else {}},
+        {"$match": match_query},
+        {"$sort": {"_id": -1}},
+        {"$limit": limit + 1},
+        {"$project": USER_LIST_PROJECTION | {"wallet_address": 1}},
         {
             "$lookup": {
                 "from": "projects",
                 "localField": "_id",
                 "foreignField": "creator_id",
+                "pipeline": [
+                    {"$sort": {"created_at": -1}},
+                    {"$limit": MAX_EMBEDDED_ITEMS},
+                    {"$project": PROJECT_SUMMARY_PROJECTION},
+                ],
                 "as": "projects"
             }
         },
@@ -45,26 +149,38 @@ async def get_detailed_users(
                 "from": "transactions",
                 "localField": "wallet_address",
                 "foreignField": "recipient_wallet",
+                "pipeline": [
+                    {"$sort": {"created_at": -1}},
+                    {"$limit": MAX_EMBEDDED_ITEMS},
+                    {"$project": DONATION_SUMMARY_PROJECTION},
+                ],
                 "as": "received_donations"
             }
         }
     ]
-    users = await db["users"].aggregate(pipeline).to_list(length=None)
-    return users
+    users = await db["users"].aggregate(pipeline).to_list(length=limit + 1)
+    return MongoJSONResponse(build_page(users, limit))
 
 @router.post("/make-admin/{user_id}")
-async def make_admin(user_id: str, admin: User = Depends(get_current_admin)):
+async def make_admin(user_id: str, admin: Principal = Depends(get_current_admin)):
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=404, detail="User not found")
     db = Database.get_db()
-    await db["users"].update_one(
-        {"_id": user_id},
-        {"$set": {"role": "admin"}}
+    # Returns the document as it was before the update, for the counters
+    user = await db["users"].find_one_and_update(
+        {"_id": ObjectId(user_id), "role": {"$ne": "admin"}},
+        {"$set": {"role": "admin"}, "$inc": {"token_version": 1}},
+        projection={"email": 1, "role": 1, "is_verified": 1}
     )
+    if user:
+        invalidate_principal(user["email"], user["_id"])
+        await counters.increment(counters.user_change_deltas(user, {**user, "role": "admin"}))
     return {"message": "User role updated to admin"}
 
 @router.post("/promote/{user_id}")
 async def promote_to_admin(
     user_id: str,
-    current_admin: User = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin)
 ):
     db = Database.get_db()
     user = await db["users"].find_one({"_id": ObjectId(user_id)})
@@ -75,10 +191,14 @@ async def promote_to_admin(
     if user["role"] == "admin":
         raise HTTPException(status_code=400, detail="User is already an admin")
     
-    await db["users"].update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": {"role": "admin"}}
+    # Matching on the old role keeps the counters right if two admins race
+    result = await db["users"].update_one(
+        {"_id": ObjectId(user_id), "role": user["role"]},
+        {"$set": {"role": "admin"}, "$inc": {"token_version": 1}}
     )
+    invalidate_principal(user["email"], user["_id"])
+    if result.modified_count:
+        await counters.increment(counters.user_change_deltas(user, {**user, "role": "admin"}))
     
     return {"message": f"User {user['email']} has been promoted to admin"}
 
@@ -86,7 +206,7 @@ async def promote_to_admin(
 async def change_user_role(
     user_id: str,
     role: UserRole,
-    current_admin: User = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin)
 ):
     db = Database.get_db()
     user = await db["users"].find_one({"_id": ObjectId(user_id)})
@@ -103,79 +223,110 @@ async def change_user_role(
             detail="Cannot change role of other admin users"
         )
     
-    await db["users"].update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": {"role": role}}
+    result = await db["users"].update_one(
+        {"_id": ObjectId(user_id), "role": user["role"]},
+        {"$set": {"role": role}, "$inc": {"token_version": 1}}
     )
+    invalidate_principal(user["email"], user["_id"])
+    if result.modified_count:
+        await counters.increment(counters.user_change_deltas(user, {**user, "role": role.value}))
     
     return {"message": f"User {user['email']} role changed to {role}"}
 
 @router.get("/stats")
-async def get_stats(current_admin: User = Depends(get_current_admin)):
-    db = Database.get_db()
+async def get_stats(current_admin: Principal = Depends(get_current_admin)):
+    # Maintained incrementally (app/core/counters.py), so this is a single small read
+    values = await counters.get_counters()
     stats = {
-        "total_users": await db["users"].count_documents({}),
-        "total_admins": await db["users"].count_documents({"role": "admin"}),
-        "total_donors": await db["users"].count_documents({"role": "donor"}),
-        "total_students": await db["users"].count_documents({"role": "student"}),
-        "total_projects": await db["projects"].count_documents({}),
-        "total_transactions": await db["transactions"].count_documents({})
+        "total_users": values.get(counters.USERS_TOTAL, 0),
+        "total_admins": values.get(counters.users_with_role("admin"), 0),
+        "total_donors": values.get(counters.users_with_role("donor"), 0),
+        "total_students": values.get(counters.users_with_role("student"), 0),
+        "total_projects": values.get(counters.PROJECTS_TOTAL, 0),
+        "total_transactions": values.get(counters.TRANSACTIONS_TOTAL, 0),
+        "pending_verifications": values.get(counters.PENDING_VERIFICATIONS, 0)
     }
     return stats
 
-@router.get("/dashboard")
-async def get_admin_dashboard(current_admin: User = Depends(get_current_admin)):
+async def _compute_dashboard() -> dict:
     db = Database.get_db()
     
     # Get basic stats
-    basic_stats = await get_stats(current_admin)
+    basic_stats = await get_stats(None)
     
     # Get recent activities
     recent_activities = {
         "new_users": await db["users"]
-            .find()
+            .find({}, USER_LIST_PROJECTION)
             .sort("created_at", -1)
             .limit(5)
             .to_list(length=None),
             
         "recent_projects": await db["projects"]
-            .find()
+            .find({}, PROJECT_SUMMARY_PROJECTION)
             .sort("created_at", -1)
             .limit(5)
             .to_list(length=None),
             
         "recent_donations": await db["transactions"]
-            .find({"type": "donation"})
+            .find({"type": "donation"}, DONATION_SUMMARY_PROJECTION)
             .sort("created_at", -1)
             .limit(5)
             .to_list(length=None)
     }
     
     # Get verification requests
-    pending_verifications = await db["users"].count_documents({
-        "role": "student",
-        "is_verified": False
-    })
+    pending_verifications = basic_stats["pending_verifications"]
     
     return {
         "stats": basic_stats,
         "recent_activities": recent_activities,
-        "pending_verifications": pending_verifications
+        "pending_verifications": pending_verifications,
+        "generated_at": datetime.utcnow()
     }
 
+# One snapshot per worker shared by every admin watching the dashboard
+dashboard_cache = StaleWhileRevalidate(
+    _compute_dashboard,
+    max_age=DASHBOARD_CACHE_MAX_AGE_SECONDS,
+    max_stale=DASHBOARD_CACHE_MAX_STALE_SECONDS,
+)
+metrics.register("dashboard_cache", dashboard_cache.stats)
+
+@router.get("/dashboard")
+async def get_admin_dashboard(current_admin: Principal = Depends(get_current_admin)):
+    snapshot, age = await dashboard_cache.get()
+    return MongoJSONResponse({
+        **snapshot,
+        "snapshot_age_seconds": round(age, 3),
+        "stale": age >= dashboard_cache.max_age
+    })
+
 @router.get("/projects/student/{student_id}")
 async def get_student_projects(
     student_id: str,
-    current_admin: User = Depends(get_current_admin)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_admin: Principal = Depends(get_current_admin)
 ):
     db = Database.get_db()
+    match_query = {"creator_id": ObjectId(student_id)}
+    match_query.update(_keyset_match(cursor))
     pipeline = [
-        {"$match": {"creator_id": ObjectId(student_id)}},
+        {"$match": match_query},
+        {"$sort": {"_id": -1}},
+        {"$limit": limit + 1},
+        {"$project": PROJECT_SUMMARY_PROJECTION | {"wallet_address": 1}},
         {
             "$lookup": {
                 "from": "transactions",
                 "localField": "wallet_address",
                 "foreignField": "recipient_wallet",
+                "pipeline": [
+                    {"$sort": {"created_at": -1}},
+                    {"$limit": MAX_EMBEDDED_ITEMS},
+                    {"$project": DONATION_SUMMARY_PROJECTION},
+                ],
                 "as": "donations"
             }
         },
@@ -184,69 +335,83 @@ async def get_student_projects(
                 "from": "users",
                 "localField": "donations.donor_id",
                 "foreignField": "_id",
+                "pipeline": [{"$project": {"username": 1, "email": 1}}],
                 "as": "donors"
             }
         }
     ]
-    projects = await db["projects"].aggregate(pipeline).to_list(length=None)
-    if not projects:
+    projects = await db["projects"].aggregate(pipeline).to_list(length=limit + 1)
+    if not projects and cursor is None:
         raise HTTPException(status_code=404, detail="No projects found for this student")
-    return projects
+    return MongoJSONResponse(build_page(projects, limit))
 
 @router.get("/donations/analytics")
 async def get_donation_analytics(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    current_admin: User = Depends(get_current_admin)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_admin: Principal = Depends(get_current_admin)
 ):
     db = Database.get_db()
-    match_query = {}
-    if start_date or end_date:
-        match_query["created_at"] = {}
-        if start_date:
-            match_query["created_at"]["$gte"] = start_date
-        if end_date:
-            match_query["created_at"]["$lte"] = end_date
+    # Totals come from the hourly/daily donation rollups, not raw transactions
+    collection, pipeline = merged_rollup_pipeline(start_date, end_date)
 
-    pipeline = [
-        {"$match": match_query},
+    # Pages walk the (donor, project, asset) groups in _id order
+    last_group = decode_cursor(cursor)
+
+    pipeline += [
+        {"$sort": {"_id": 1}},
+        *([{"$match": {"_id": {"$gt": last_group}}}] if last_group is not None else []),
+        {"$limit": limit + 1},
+        # Join details for this page's groups only
         {
             "$lookup": {
                 "from": "users",
-                "localField": "donor_id",
+                "localField": "_id.donor",
                 "foreignField": "_id",
-                "as": "donor_info"
+                "pipeline": [{"$project": {"username": 1, "email": 1, "full_name": 1}}],
+                "as": "donor_details"
             }
         },
         {
             "$lookup": {
                 "from": "projects",
-                "localField": "project_id",
+                "localField": "_id.project",
                 "foreignField": "_id",
-                "as": "project_info"
-            }
-        },
-        {
-            "$group": {
-                "_id": {
-                    "donor": "$donor_id",
-                    "project": "$project_id"
-                },
-                "total_amount": {"$sum": "$amount"},
-                "transactions": {"$push": "$$ROOT"},
-                "donor_details": {"$first": "$donor_info"},
-                "project_details": {"$first": "$project_info"}
+                "pipeline": [{"$project": PROJECT_SUMMARY_PROJECTION}],
+                "as": "project_details"
             }
         }
     ]
-    
-    donations = await db["transactions"].aggregate(pipeline).to_list(length=None)
-    return donations
+
+    donations = await db[collection].aggregate(pipeline, allowDiskUse=True).to_list(length=limit + 1)
+    # Raw aggregation output; rendered straight from BSON types
+    return MongoJSONResponse(build_page(donations, limit))
+
+@router.get("/donations/trends")
+async def get_donation_trends(
+    project_id: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    unit: str = Query("day", pattern="^(hour|day|week|month)$"),
+    window: int = Query(7, ge=1, le=365),
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Per-project donation series with moving sums and velocity, from the time-series events."""
+    trends = await get_trends(
+        project_id=ObjectId(project_id) if project_id else None,
+        start=start_date,
+        end=end_date,
+        unit=unit,
+        window=window,
+    )
+    return MongoJSONResponse(trends)
 
 @router.post("/verify-student/{user_id}")
 async def verify_student(
     user_id: str,
-    current_admin: User = Depends(get_current_admin)
+    current_admin: Principal = Depends(get_current_admin)
 ):
     db = Database.get_db()
     user = await db["users"].find_one({"_id": ObjectId(user_id)})
@@ -257,9 +422,118 @@ async def verify_student(
     if user["role"] != "student":
         raise HTTPException(status_code=400, detail="User is not a student")
     
-    await db["users"].update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": {"is_verified": True}}
+    result = await db["users"].update_one(
+        {"_id": ObjectId(user_id), "is_verified": user.get("is_verified")},
+        {"$set": {"is_verified": True}, "$inc": {"token_version": 1}}
     )
+    invalidate_principal(user["email"], user["_id"])
+    if result.modified_count:
+        await counters.increment(counters.user_change_deltas(user, {**user, "is_verified": True}))
     
-    return {"message": f"Student {user['email']} has been verified"}
\ No newline at end of file
+    return {"message": f"Student {user['email']} has been verified"}
+
+@router.post("/revoke-tokens/{user_id}")
+async def revoke_user_tokens(
+    user_id: str,
+    current_admin: Principal = Depends(get_current_admin)
+):
+    db = Database.get_db()
+    user = await db["users"].find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        {"$inc": {"token_version": 1}},
+        projection={"email": 1}
+    )
+
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    invalidate_principal(user["email"], user["_id"])
+    return {"message": f"All tokens issued to {user['email']} have been revoked"}
+
+@router.post("/signing-key-cache")
+async def toggle_signing_key_cache(
+    enabled: bool,
+    current_admin: Principal = Depends(get_current_admin)
+):
+    # Kill switch for this worker; disabling also wipes all cached keypairs
+    set_signing_key_cache_enabled(enabled)
+    return {"message": f"Signing-key cache {'enabled' if enabled else 'disabled and wiped'}"}
+
+@router.post("/key-rotation")
+async def start_key_rotation(
+    batch_size: int = Query(1000, ge=1, le=10000),
+    restart: bool = False,
+    current_admin: Principal = Depends(get_current_admin)
+):
+    global _key_rotation_task
+    if _key_rotation_task and not _key_rotation_task.done():
+        raise HTTPException(status_code=409, detail="Key rotation is already running")
+
+    db = Database.get_db()
+    _key_rotation_task = asyncio.create_task(
+        rotate_all_secret_keys(db, batch_size=batch_size, restart=restart)
+    )
+    return {"message": "Key rotation started"}
+
+@router.get("/key-rotation")
+async def get_key_rotation_status(current_admin: Principal = Depends(get_current_admin)):
+    db = Database.get_db()
+    checkpoints = await get_rotation_checkpoints(db)
+    return {
+        "running": bool(_key_rotation_task and not _key_rotation_task.done()),
+        "checkpoints": checkpoints,
+    }
+
+@router.get("/indexes/report")
+async def get_index_report(current_admin: Principal = Depends(get_current_admin)):
+    """Index usage, missing registered indexes and profiled collection scans."""
+    return await index_usage_report(Database.get_db())
+
+@router.post("/counters/reconcile")
+async def reconcile_counters(current_admin: Principal = Depends(get_current_admin)):
+    """Recounts the /stats counters now; returns the drift that was corrected."""
+    return {"drift": await counters.reconcile_counters()}
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: str = Query("total_ms", pattern="^(total_ms|max_ms|avg_ms|slow_count|count)$"),
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """Query shapes that went over SLOW_QUERY_MS on this worker, with sampled explain plans."""
+    return {"threshold_ms": SLOW_QUERY_MS, "queries": slow_query_profiler.top(limit, order_by)}
+
+@router.delete("/slow-queries")
+async def reset_slow_queries(current_admin: Principal = Depends(get_current_admin)):
+    slow_query_profiler.reset()
+    return {"message": "Slow query stats cleared"}
+
+@router.get("/metrics")
+async def get_metrics(current_admin: Principal = Depends(get_current_admin)):
+    """In-process counters (caches, pools, queues) for this worker."""
+    return metrics.snapshot()
+
+@router.get("/export/{collection}")
+async def export_collection(
+    collection: ExportCollection,
+    format: ExportFormat = ExportFormat.NDJSON,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    role: Optional[UserRole] = None,
+    current_admin: Principal = Depends(get_current_admin)
+):
+    """
+    Streams a whole collection as NDJSON or CSV without loading it into memory.
+    Same date range filter as the analytics endpoint; role only applies to users.
+    """
+    query = _created_at_range(start_date, end_date)
+    if role:
+        if collection != ExportCollection.USERS:
+            raise HTTPException(status_code=400, detail="role filter only applies to the users export")
+        query["role"] = role.value
+
+    return StreamingResponse(
+        stream_export(Database.get_db(), collection.value, query, format.value),
+        media_type=EXPORT_FORMATS[format.value],
+        headers={"Content-Disposition": f'attachment; filename="{collection.value}.{format.value}"'},
+    )
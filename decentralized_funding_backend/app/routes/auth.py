@@ -8,16 +8,22 @@ from ..core.auth import (
     get_password_hash,
     get_current_user,
     get_current_admin,
+    get_current_principal,
+    invalidate_principal,
+    build_token_claims,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 # Import your updated User model
-from ..models.models import User, UserBase, UserRole, StudentProfile, DonorProfile
+from ..models.models import User, UserBase, UserRole, StudentProfile, DonorProfile, Principal
 from ..core.database import Database
+from ..core import counters
+from ..core.writes import insert_document
 from datetime import timedelta
 # Import key generation and security functions
-from ..stellar_utils.key_security import generate_stellar_keypair, encrypt_secret_key
-# Import funding function (implement this next, potentially in account_management)
-from ..stellar_utils.account_management.fund_testnet_account  import fund_testnet_account # Assuming Testnet for now
+from ..stellar_utils.key_security import generate_stellar_keypair, encrypt_secret_key, forget_signing_keypair
+# Account funding runs as a background job (Friendbot on Testnet)
+from ..stellar_utils.account_management.account_funding import enqueue_account_funding, FUNDING_PENDING, FUNDING_FUNDED
+from ..stellar_utils.account_management.keypair_pool import keypair_pool, KEYPAIR_POOL_ENABLED
 
 # from app.utils.fund_testnet_account import fund_testnet_account
 
@@ -27,74 +33,86 @@ router = APIRouter()
 async def signup(user: UserBase):
     db = Database.get_db()
 
-    # Check if email is already registered
-    if await db["users"].find_one({"email": user.email}):
-        raise HTTPException(
-            status_code=400,
-            detail="Email already registered"
-        )
+    # Duplicate emails are rejected by the email_unique index at insert time
 
-    # --- Generate and Encrypt Stellar Keypair ---
-    try:
-        stellar_keys = generate_stellar_keypair()
-        encrypted_secret = encrypt_secret_key(stellar_keys["secret_key"])
-        public_key = stellar_keys["public_key"]
-    except Exception as e:
-        # Handle errors during key generation or encryption
-        print(f"Error during Stellar key generation or encryption: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to generate Stellar account."
-        )
-    # ---------------------------------------------
-
-    # Prepare user data for database insertion
+    # Hash first: it can be slow or 503 when the hashing pool is busy, and
+    # nothing is claimed from the keypair pool yet that would need handing back
     user_dict = user.dict()
-    user_dict["password_hash"] = get_password_hash(user_dict.pop("password"))
+    user_dict["password_hash"] = await get_password_hash(user_dict.pop("password"))
     user_dict["role"] = UserRole.STUDENT.value # Set default role to STUDENT
 
-    # Add Stellar keys to the user data
-    user_dict["stellar_public_key"] = public_key
-    user_dict["stellar_secret_key_encrypted"] = encrypted_secret
-
-    # Initialize profile based on role (assuming student for registration for now)
-    if user_dict["role"] == UserRole.STUDENT.value:
-        # You'll need to collect student profile details during registration or later
-        # For now, let's assume UserBase includes basic student profile data or it's added separately
-        # Example: If UserBase included institution, year_of_study, etc.
-        # student_profile_data = {
-        #     "institution": user_dict.pop("institution"),
-        #     "year_of_study": user_dict.pop("year_of_study"),
-        #     # ... other student fields
-        # }
-        # user_dict["student_profile"] = StudentProfile(**student_profile_data).dict()
-        # If student profile is added later, initialize as None or a basic structure
-        user_dict["student_profile"] = None # Assuming profile details are added later
-
-
-    # Insert the new user into the database
+    pooled_keypair = None
+    inserted = False
     try:
-        result = await db["users"].insert_one(user_dict)
-        created_user = await db["users"].find_one({"_id": result.inserted_id})
-    except Exception as e:
-        print(f"Error inserting user into database: {e}")
-        # Consider compensating (e.g., logging that a keypair was generated but user not saved)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to create user."
-        )
-
-    # --- Fund the newly created Stellar account ---
-    # This operation should ideally be handled in a robust background task
-    # For a simple start, we can call it directly, but be aware of potential delays/failures
-    # Assuming Testnet funding via Friendbot
-    funding_success = await fund_testnet_account(public_key) # Implement this function
-
-    if not funding_success:
-        print(f"Warning: Failed to fund new account {public_key} on Testnet.")
-        # Decide how to handle funding failures (e.g., mark account as unfunded, notify admin)
-        pass # Continue registration even if funding fails initially
-
+        # --- Claim a pre-generated keypair, or Generate and Encrypt one ---
+        try:
+            pooled_keypair = await keypair_pool.claim(db) if KEYPAIR_POOL_ENABLED else None
+            if pooled_keypair:
+                encrypted_secret = pooled_keypair["stellar_secret_key_encrypted"]
+                public_key = pooled_keypair["stellar_public_key"]
+            else:
+                stellar_keys = generate_stellar_keypair()
+                encrypted_secret = encrypt_secret_key(stellar_keys["secret_key"])
+                public_key = stellar_keys["public_key"]
+            already_funded = bool(pooled_keypair and pooled_keypair.get("funded"))
+        except Exception as e:
+            # Handle errors during key generation or encryption
+            print(f"Error during Stellar key generation or encryption: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to generate Stellar account."
+            )
+        # ---------------------------------------------
+
+        # Add Stellar keys to the user data
+        user_dict["stellar_public_key"] = public_key
+        user_dict["stellar_secret_key_encrypted"] = encrypted_secret
+
+        # Initialize profile based on role (assuming student for registration for now)
+        if user_dict["role"] == UserRole.STUDENT.value:
+            # You'll need to collect student profile details during registration or later
+            # For now, let's assume UserBase includes basic student profile data or it's added separately
+            # Example: If UserBase included institution, year_of_study, etc.
+            # student_profile_data = {
+            #     "institution": user_dict.pop("institution"),
+            #     "year_of_study": user_dict.pop("year_of_study"),
+            #     # ... other student fields
+            # }
+            # user_dict["student_profile"] = StudentProfile(**student_profile_data).dict()
+            # If student profile is added later, initialize as None or a basic structure
+            user_dict["student_profile"] = None # Assuming profile details are added later
+
+        # Funding happens in the background; clients poll /funding-status
+        user_dict["funding_status"] = FUNDING_FUNDED if already_funded else FUNDING_PENDING
+
+        # Insert the new user into the database
+        try:
+            created_user = await insert_document("users", user_dict, duplicate_detail="Email already registered")
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Error inserting user into database: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create user."
+            )
+        inserted = True
+    finally:
+        # Whatever went wrong (duplicate email, database error, cancellation), hand the
+        # claimed keypair back rather than burning it
+        if pooled_keypair and not inserted:
+            await keypair_pool.release(pooled_keypair, db)
+
+    await counters.increment(counters.user_deltas(user_dict))
+
+    # --- Queue funding of the newly created Stellar account ---
+    # Friendbot is slow and flaky, so funding runs on the job queue with retries
+    # instead of holding the registration request open.
+    if not already_funded:
+        try:
+            await enqueue_account_funding(created_user["_id"], public_key)
+        except Exception as e:
+            print(f"Warning: Failed to queue funding for new account {public_key}: {e}")
     # --------------------------------------------
 
     # Return a response (do NOT include the secret key)
@@ -102,7 +120,8 @@ async def signup(user: UserBase):
         "email": created_user["email"],
         "username": created_user["username"],
         "stellar_public_key": created_user.get("stellar_public_key"), # Include public key
-        "message": "User created successfully. Stellar account generated."
+        "funding_status": created_user.get("funding_status"),
+        "message": "User created successfully. Stellar account generated; funding is in progress."
     }
 
 # The login and read_users_me endpoints can remain largely the same,
@@ -115,7 +134,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     # Fetch user, potentially including stellar_public_key and encrypted_secret_key
     user = await db["users"].find_one({"email": form_data.username})
 
-    if not user or not verify_password(form_data.password, user["password_hash"]):
+    if not user or not await verify_password(form_data.password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -125,7 +144,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
+        data=build_token_claims(user), expires_delta=access_token_expires
     )
 
     # Return access token and user's public key (optional, but useful for frontend)
@@ -135,6 +154,29 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         "stellar_public_key": user.get("stellar_public_key") # Include public key in login response
     }
 
+@router.post("/logout")
+async def logout(current_user: Principal = Depends(get_current_principal)):
+    # JWTs stay valid until they expire (or are revoked by an admin);
+    # logout wipes what this worker has cached for the user.
+    forget_signing_keypair(current_user.id)
+    invalidate_principal(current_user.email)
+    return {"message": "Logged out successfully."}
+
+@router.get("/funding-status")
+async def read_funding_status(current_user: Principal = Depends(get_current_principal)):
+    db = Database.get_db()
+    user = await db["users"].find_one(
+        {"email": current_user.email},
+        {"funding_status": 1, "funding_error": 1, "stellar_public_key": 1}
+    )
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {
+        "stellar_public_key": user.get("stellar_public_key"),
+        "funding_status": user.get("funding_status"),
+        "funding_error": user.get("funding_error"),
+    }
+
 @router.get("/me")
 async def read_users_me(current_user: User = Depends(get_current_user)):
     # The current_user object derived from the token will have the public key loaded from DB
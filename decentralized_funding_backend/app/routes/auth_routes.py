@@ -4,6 +4,9 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from ..core.database import Database
+from ..core import counters
+from ..core.writes import insert_document
+from ..core.security import hashing_pool
 from ..schemas.schemas import SignUpRequest, LoginRequest, TokenResponse
 from typing import Optional
 
@@ -31,23 +34,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 @router.post("/signup", response_model=TokenResponse)
 async def signup(user_data: SignUpRequest):
-    db = Database.get_db()
-    
-    # Check if email already exists
-    if await db["users"].find_one({"email": user_data.email}):
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
     # Hash the password
-    hashed_password = pwd_context.hash(user_data.password)
+    hashed_password = await hashing_pool.run(pwd_context.hash, user_data.password)
     
     # Create user document
     user_dict = user_data.dict()
     user_dict["password"] = hashed_password
-    user_dict["created_at"] = datetime.utcnow()
-    user_dict["updated_at"] = datetime.utcnow()
     
-    # Insert into database
-    result = await db["users"].insert_one(user_dict)
+    # Insert into database; the email_unique index rejects duplicates
+    await insert_document("users", user_dict, duplicate_detail="Email already registered")
+    await counters.increment(counters.user_deltas(user_dict))
     
     # Create access token
     access_token = create_access_token(
@@ -67,7 +63,7 @@ async def login(login_data: LoginRequest):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Verify password
-    if not pwd_context.verify(login_data.password, user["password"]):
+    if not await hashing_pool.run(pwd_context.verify, login_data.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Create access token
@@ -1,21 +1,33 @@
 from fastapi import APIRouter, HTTPException
-from ..models.models import Transaction
+from bson import ObjectId
+from ..models.models import Donation
 from ..schemas.schemas import DonationCreate
 from ..core.database import Database
+from ..core.responses import MongoJSONResponse
+from ..core.project_funding import PENDING_STATUS
+from ..core.transaction_log import record_transaction
 
 router = APIRouter()
 
-@router.post("/", response_model=Transaction)
+@router.post("/", response_model=Donation)
 async def create_donation(donation: DonationCreate):
-    db = Database.get_db()
     donation_dict = donation.dict()
-    result = await db.donations.insert_one(donation_dict)
-    created_donation = await db.donations.find_one({"_id": result.inserted_id})
-    return created_donation
+    # Donations live in transactions alongside everything the admin analytics read
+    for field in ("donor_id", "project_id"):
+        if not ObjectId.is_valid(donation_dict[field]):
+            raise HTTPException(status_code=400, detail=f"Invalid {field}")
+        donation_dict[field] = ObjectId(donation_dict[field])
+    donation_dict["type"] = "donation"
+    # Counts towards the project only once a confirm_donation job finds it on the ledger
+    donation_dict["status"] = PENDING_STATUS
+    # Written in batches; counters and rollups follow the insert
+    return await record_transaction(donation_dict)
 
 @router.get("/{donation_id}")
 async def get_donation(donation_id: str):
     db = Database.get_db()
-    if (donation := await db.donations.find_one({"_id": donation_id})) is not None:
-        return donation
-    raise HTTPException(status_code=404, detail="Donation not found")
\ No newline at end of file
+    if not ObjectId.is_valid(donation_id):
+        raise HTTPException(status_code=404, detail="Donation not found")
+    if (donation := await db.transactions.find_one({"_id": ObjectId(donation_id), "type": "donation"})) is not None:
+        return MongoJSONResponse(donation)
+    raise HTTPException(status_code=404, detail="Donation not found")
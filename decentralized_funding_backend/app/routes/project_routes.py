@@ -1,21 +1,163 @@
-from fastapi import APIRouter, HTTPException
-from ..models.models import Project
+from fastapi import APIRouter, HTTPException, Query
+from bson import ObjectId
+from typing import Optional
+from datetime import datetime
+import re
+from ..models.models import Project, ProjectStatus
 from ..schemas.schemas import ProjectCreate
 from ..core.database import Database
+from ..core import counters
+from ..core.writes import insert_document
+from ..core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, build_page, decode_cursor
+from ..core.responses import MongoJSONResponse
+from ..core.search_index import project_search_index
+from ..core.trending import TRENDING_TOP_K, trending_tracker
 
 router = APIRouter()
 
+# What search results carry; descriptions and funding internals stay out
+SEARCH_RESULT_PROJECTION = {
+    "title": 1,
+    "category": 1,
+    "status": 1,
+    "tags": 1,
+    "target_amount": 1,
+    "current_amount": 1,
+    "funding_ratio": 1,
+    "deadline": 1,
+    "score": 1,
+}
+
 @router.post("/", response_model=Project)
 async def create_project(project: ProjectCreate):
-    db = Database.get_db()
     project_dict = project.dict()
-    result = await db.projects.insert_one(project_dict)
-    created_project = await db.projects.find_one({"_id": result.inserted_id})
+    # Funding fields are maintained by app/core/project_funding.py from here on
+    project_dict.update(current_amount=0.0, donation_count=0, donors=[], funding_ratio=0.0)
+    created_project = await insert_document("projects", project_dict)
+    await counters.increment({counters.PROJECTS_TOTAL: 1})
     return created_project
 
+@router.get("/")
+async def list_projects_by_funding(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Projects ordered by funding progress, most funded first."""
+    db = Database.get_db()
+    query = {}
+    last = decode_cursor(cursor)
+    if last is not None:
+        last_ratio, last_id = last
+        query = {"$or": [
+            {"funding_ratio": {"$lt": last_ratio}},
+            {"funding_ratio": last_ratio, "_id": {"$lt": last_id}},
+        ]}
+    projects = await (
+        db.projects
+        .find(query)
+        .sort([("funding_ratio", -1), ("_id", -1)])
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    return MongoJSONResponse(build_page(projects, limit, key=lambda project: [project.get("funding_ratio", 0.0), project["_id"]]))
+
+@router.get("/search")
+async def search_projects(
+    q: str = Query(..., min_length=1, max_length=200),
+    category: Optional[str] = None,
+    status: Optional[ProjectStatus] = None,
+    deadline_after: Optional[datetime] = None,
+    deadline_before: Optional[datetime] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Full-text search over title, tags, category, objectives and description, best match first."""
+    db = Database.get_db()
+    match_query = {"$text": {"$search": q}}
+    if category:
+        match_query["category"] = category
+    if status:
+        match_query["status"] = status.value
+    if deadline_after or deadline_before:
+        match_query["deadline"] = {}
+        if deadline_after:
+            match_query["deadline"]["$gte"] = deadline_after
+        if deadline_before:
+            match_query["deadline"]["$lte"] = deadline_before
+
+    pipeline = [
+        {"$match": match_query},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    # Pages walk (score, _id) downwards
+    last = decode_cursor(cursor)
+    if last is not None:
+        last_score, last_id = last
+        pipeline.append({"$match": {"$or": [
+            {"score": {"$lt": last_score}},
+            {"score": last_score, "_id": {"$lt": last_id}},
+        ]}})
+    pipeline += [
+        {"$sort": {"score": -1, "_id": -1}},
+        {"$limit": limit + 1},
+        {"$project": SEARCH_RESULT_PROJECTION},
+    ]
+    projects = await db.projects.aggregate(pipeline).to_list(length=limit + 1)
+    return MongoJSONResponse(build_page(projects, limit, key=lambda project: [project["score"], project["_id"]]))
+
+@router.get("/autocomplete")
+async def autocomplete_projects(
+    q: str = Query(..., min_length=1, max_length=100),
+    category: Optional[str] = None,
+    status: Optional[ProjectStatus] = None,
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Search-as-you-type: every word must match and the last one may be
+    partial. Served from the in-process index when it is enabled and warm,
+    otherwise by a title prefix query.
+    """
+    if project_search_index.ready:
+        return MongoJSONResponse(
+            project_search_index.search(q, limit=limit, category=category, status=status.value if status else None)
+        )
+
+    db = Database.get_db()
+    query = {"title": {"$regex": f"^{re.escape(q)}", "$options": "i"}}
+    if category:
+        query["category"] = category
+    if status:
+        query["status"] = status.value
+    return MongoJSONResponse(await db.projects.find(query, {"title": 1, "category": 1}).limit(limit).to_list(length=limit))
+
+@router.get("/trending")
+async def trending_projects(
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=TRENDING_TOP_K)
+):
+    """
+    Projects with the most recent donation momentum, served from the
+    in-memory top-K (app/core/trending.py); only the listed projects are read.
+    """
+    feed = trending_tracker.top(category, limit)
+    db = Database.get_db()
+    projects = {
+        project["_id"]: project
+        async for project in db.projects.find(
+            {"_id": {"$in": [entry["project_id"] for entry in feed]}}, SEARCH_RESULT_PROJECTION
+        )
+    }
+    return MongoJSONResponse([
+        {**projects[entry["project_id"]], "trending_score": entry["score"], "velocity": entry["velocity"]}
+        for entry in feed
+        if entry["project_id"] in projects
+    ])
+
 @router.get("/{project_id}")
 async def get_project(project_id: str):
+    if not ObjectId.is_valid(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
     db = Database.get_db()
-    if (project := await db.projects.find_one({"_id": project_id})) is not None:
-        return project
+    if (project := await db.projects.find_one({"_id": ObjectId(project_id)})) is not None:
+        return MongoJSONResponse(project)
     raise HTTPException(status_code=404, detail="Project not found")
\ No newline at end of file
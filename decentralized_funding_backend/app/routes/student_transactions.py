@@ -4,14 +4,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from stellar_sdk import Optional
 
-from app.stellar_utils.account_management.get_account_balances import get_account_balances
 # Import necessary modules
 from ..core.database import Database
-from ..core.auth import get_current_user # Assuming this fetches the User model with keys
-from ..models.models import User, UserRole
+from ..core.transaction_log import record_transaction, transaction_writer
+from ..core.auth import get_current_user, get_current_principal # Assuming this fetches the User model with keys
+from ..models.models import User, UserRole, Principal
 # Import decryption and transaction sending functions
-from ..stellar_utils.key_security import decrypt_secret_key
+from ..stellar_utils.key_security import get_signing_keypair
 from ..stellar_utils.transaction_operations.transaction_operations import send_stellar_payment # Assuming this is where send_stellar_payment is
+from ..stellar_utils import gateway # All Horizon calls are async and go through here
 
 
 router = APIRouter()
@@ -41,11 +42,9 @@ async def student_send_xlm(
              detail="Your account does not have a Stellar secret key associated or it was not stored."
          )
 
-    # --- Decrypt the student's secret key ---
+    # --- Decrypt the student's secret key (served from the signing-key cache when enabled) ---
     try:
-        source_secret = decrypt_secret_key(current_user.stellar_secret_key_encrypted)
-        if not source_secret:
-             raise ValueError("Decrypted secret key is empty.")
+        source_keypair = get_signing_keypair(str(current_user.id), current_user.stellar_secret_key_encrypted)
     except Exception as e:
         # Handle decryption errors (e.g., invalid key, corrupted data)
         print(f"Error decrypting secret key for user {current_user.email}: {e}")
@@ -62,7 +61,7 @@ async def student_send_xlm(
     print(f"User {current_user.email} attempting to send {amount_str} XLM to {request_data.destination_public_key}")
 
     transaction_result = await send_stellar_payment(
-        source_secret=source_secret,
+        source_keypair=source_keypair,
         destination_public=request_data.destination_public_key,
         amount=amount_str,
         asset_code="XLM", # Hardcoded for sending XLM
@@ -72,18 +71,25 @@ async def student_send_xlm(
 
     # Process the transaction result
     if transaction_result["successful"]:
-        # You might want to log this transaction in your database
-        # db = Database.get_db()
-        # await db["transactions"].insert_one({
-        #     "donor_id": current_user.id, # Or link as sender_id
-        #     "recipient_wallet": request_data.destination_public_key,
-        #     "amount": request_data.amount,
-        #     "asset_type": "XLM",
-        #     "transaction_hash": transaction_result["hash"],
-        #     "status": "successful", # Or "pending" if monitoring is needed
-        #     "created_at": datetime.utcnow(),
-        #     # ... other relevant fields
-        # })
+        # Log the payment (buffered, written in batches by the transaction log)
+        payment = {
+            "type": "payment",
+            "sender_id": current_user.id,
+            "source_account_id": current_user.stellar_public_key,
+            "destination_account_id": request_data.destination_public_key,
+            "recipient_wallet": request_data.destination_public_key,
+            "amount": request_data.amount,
+            "asset_type": "XLM",
+            "transaction_hash": transaction_result["hash"],
+            "status": "successful",
+        }
+        try:
+            await record_transaction(payment)
+        except Exception as e:
+            # The XLM already moved, so the student still gets the hash; the record is kept for replay
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            print(f"Payment {transaction_result['hash']} by {current_user.email} not recorded: {detail}")
+            await transaction_writer.dead_letter(payment, detail)
 
         return {
             "message": "Transaction submitted successfully.",
@@ -101,7 +107,7 @@ async def student_send_xlm(
         
 @router.get("/student/balance", status_code=status.HTTP_200_OK)
 async def get_student_balance(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal) # Only needs role and public key
 ):
     # 🚫 Ensure only students can access
     if current_user.role != UserRole.STUDENT:
@@ -119,7 +125,7 @@ async def get_student_balance(
 
     # 🔁 Fetch balance
     try:
-        balances = get_account_balances(current_user.stellar_public_key)
+        balances = await gateway.get_balances(current_user.stellar_public_key)
         if balances is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -130,9 +136,9 @@ async def get_student_balance(
         formatted_balances = []
         for bal in balances:
             formatted_balances.append({
-                "asset_type": bal.asset_type,
-                "asset_code": bal.asset_code if hasattr(bal, "asset_code") else "XLM",
-                "balance": bal.balance
+                "asset_type": bal["asset_type"],
+                "asset_code": bal.get("asset_code", "XLM"),
+                "balance": bal["balance"]
             })
 
         return {
@@ -140,6 +146,8 @@ async def get_student_balance(
             "balances": formatted_balances
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error retrieving balance for {current_user.email}: {e}")
         raise HTTPException(
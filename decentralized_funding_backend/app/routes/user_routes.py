@@ -3,22 +3,17 @@ from bson import ObjectId
 from ..models.models import User
 from ..schemas.schemas import UserCreate, UserResponse
 from ..core.database import Database
+from ..core import counters
+from ..core.writes import insert_document
 
 router = APIRouter()
 
 @router.post("/", response_model=UserResponse)
 async def create_user(user: UserCreate):
-    db = Database.get_db()
-    if await db["users"].find_one({"email": user.email}):
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    user_dict = user.dict()
-    result = await db["users"].insert_one(user_dict)
-    
-    created_user = await db["users"].find_one({"_id": result.inserted_id})
-    if created_user is None:
-        raise HTTPException(status_code=500, detail="Failed to create user")
-    
+    # The email_unique index rejects duplicates
+    created_user = await insert_document("users", user.dict(), duplicate_detail="Email already registered")
+    await counters.increment(counters.user_deltas(created_user))
+
     # Convert ObjectId to string before returning
     created_user["_id"] = str(created_user["_id"])
     return UserResponse(**created_user)
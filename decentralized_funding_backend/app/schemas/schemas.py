@@ -1,29 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
-from typing import Optional, List, Any
+from typing import Optional, List
 from datetime import datetime
-from bson import ObjectId
-
-
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v, handler):
-        if not v:
-            return None
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __get_pydantic_json_schema__(cls, field_schema: dict[str, Any], field) -> dict[str, Any]:
-        field_schema.update(type="string")
-        return field_schema
-
-    def __str__(self):
-        return str(self)
 
 
 class UserCreate(BaseModel):
@@ -46,8 +23,7 @@ class UserResponse(BaseModel):
     wallet_address: Optional[str] = None
 
     model_config = ConfigDict(
-        populate_by_name=True,
-        json_encoders={ObjectId: str}
+        populate_by_name=True
     )
 
 
@@ -108,19 +84,16 @@ class ProjectResponse(BaseModel):
     updated_at: datetime
 
     model_config = ConfigDict(
-        populate_by_name=True,
-        json_encoders={ObjectId: str}
+        populate_by_name=True
     )
 
 
 class DonationCreate(BaseModel):
     amount: float = Field(..., gt=0, description="Donation amount must be greater than 0")
     transaction_hash: str = Field(
-        ..., 
-        min_length=66, 
-        max_length=66, 
-        pattern="^0x[a-fA-F0-9]{64}$",
-        description="Ethereum transaction hash"
+        ...,
+        pattern="^(0x)?[a-fA-F0-9]{64}$",
+        description="Stellar transaction hash (64 hex digits, 0x prefix accepted)"
     )
     message: Optional[str] = Field(None, max_length=500)
     project_id: str = Field(..., description="ID of the project receiving the donation")
@@ -131,7 +104,7 @@ class DonationCreate(BaseModel):
         json_schema_extra={
             "example": {
                 "amount": 100.0,
-                "transaction_hash": "0x0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef",
+                "transaction_hash": "0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef",
                 "message": "Supporting your great project!",
                 "project_id": "507f1f77bcf86cd799439011",
                 "donor_id": "507f1f77bcf86cd799439012"
@@ -145,6 +118,11 @@ class DonationCreate(BaseModel):
             raise ValueError("Amount must be greater than 0")
         return v
 
+    @field_validator('transaction_hash')
+    def normalize_transaction_hash(cls, v: str) -> str:
+        # Stored the way Horizon spells it, so the unique index sees one spelling per payment
+        return v.removeprefix("0x").lower()
+
 
 class DonationResponse(BaseModel):
     id: str = Field(alias="_id")
@@ -159,7 +137,6 @@ class DonationResponse(BaseModel):
 
     model_config = ConfigDict(
         populate_by_name=True,
-        json_encoders={ObjectId: str},
         json_schema_extra={
             "example": {
                 "id": "507f1f77bcf86cd799439013",
@@ -0,0 +1,44 @@
+# app/stellar_utils/account_management/account_funding.py
+
+from bson import ObjectId
+from datetime import datetime
+from ...core.database import Database
+from ...core.jobs import job_queue
+from .fund_testnet_account import account_exists, fund_testnet_account
+
+FUND_ACCOUNT_JOB = "fund_account"
+
+# Values of users.funding_status (clients poll GET /api/auth/funding-status)
+FUNDING_PENDING = "pending"
+FUNDING_FUNDED = "funded"
+FUNDING_FAILED = "failed"
+
+async def _set_funding_status(user_id: str, funding_status: str, error: str = None):
+    db = Database.get_db()
+    await db["users"].update_one(
+        {"_id": ObjectId(user_id)},
+        {"$set": {
+            "funding_status": funding_status,
+            "funding_error": error,
+            "updated_at": datetime.utcnow(),
+        }}
+    )
+
+async def enqueue_account_funding(user_id, public_key: str):
+    """Queues Friendbot funding for a newly registered user's Stellar account."""
+    await job_queue.enqueue(FUND_ACCOUNT_JOB, {"user_id": str(user_id), "public_key": public_key})
+
+async def handle_fund_account(payload: dict):
+    if not await fund_testnet_account(payload["public_key"]):
+        # Raising lets the job queue retry with backoff
+        raise RuntimeError(f"Friendbot could not fund {payload['public_key']}")
+    await _set_funding_status(payload["user_id"], FUNDING_FUNDED)
+
+async def handle_fund_account_failure(payload: dict):
+    # The last attempt may have gone through after all (timed out on our side)
+    if await account_exists(payload["public_key"]):
+        await _set_funding_status(payload["user_id"], FUNDING_FUNDED)
+        return
+    await _set_funding_status(payload["user_id"], FUNDING_FAILED, "Friendbot funding failed after retries")
+
+job_queue.register(FUND_ACCOUNT_JOB, handle_fund_account, on_failure=handle_fund_account_failure)
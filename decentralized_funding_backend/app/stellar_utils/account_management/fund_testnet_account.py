@@ -1,15 +1,32 @@
+import os
 import httpx
 from httpx import HTTPError  # Catch errors from httpx if needed
+from .. import gateway
+
+FRIENDBOT_TIMEOUT_SECONDS = float(os.getenv("FRIENDBOT_TIMEOUT_SECONDS", "20"))
+
+async def account_exists(public_key: str) -> bool:
+    """Whether the account is on the ledger (Friendbot created it). False if Horizon cannot tell."""
+    try:
+        return await gateway.get_balances(public_key) is not None
+    except Exception as e:
+        print(f"Could not look up account {public_key}: {e}")
+        return False
 
 async def fund_testnet_account(public_key: str):
     """Asynchronously funds a Testnet account using Friendbot."""
     friendbot_url = f"https://friendbot.stellar.org/?addr={public_key}"
     try:
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(timeout=FRIENDBOT_TIMEOUT_SECONDS) as client:
             response = await client.get(friendbot_url)
             response.raise_for_status()
             print(f"Friendbot response: {response.json()}")
             return True
     except HTTPError as e:
+        # Friendbot answers 400 once the account exists, e.g. when a request that
+        # timed out on our side went through and this is the retry
+        if isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 400 and await account_exists(public_key):
+            print(f"Friendbot: {public_key} is already funded")
+            return True
         print(f"Error funding account with Friendbot: {e}")
         return False
@@ -1,4 +1,5 @@
 import os
+from stellar_sdk import Keypair
 # You might need a library to load environment variables, like python-dotenv
 # from dotenv import load_dotenv
 # load_dotenv() # Load variables from a .env file in development
@@ -12,6 +13,10 @@ def get_app_secret_key():
     # You might add validation here to ensure it's a valid secret key format
     return secret_key
 
+def get_app_public_key():
+    """The application's Stellar account ID (derived from its secret key)."""
+    return Keypair.from_secret(get_app_secret_key()).public_key
+
 # Example usage (in a function that needs the secret key):
 # app_secret = get_app_secret_key()
 # app_keypair = Keypair.from_secret(app_secret)
\ No newline at end of file
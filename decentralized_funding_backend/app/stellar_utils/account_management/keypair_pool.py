@@ -0,0 +1,151 @@
+# app/stellar_utils/account_management/keypair_pool.py
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from ...core.database import Database
+from ...core import metrics
+from ..key_security import generate_stellar_keypair, encrypt_secret_key
+from .fund_testnet_account import fund_testnet_account
+
+# Pre-generated keypair pool settings
+# With the pool enabled, registration claims a ready keypair instead of
+# generating, encrypting (and funding) one on the request path.
+KEYPAIR_POOL_ENABLED = os.getenv("KEYPAIR_POOL_ENABLED", "false").lower() in ("1", "true", "yes")
+KEYPAIR_POOL_LOW_WATERMARK = int(os.getenv("KEYPAIR_POOL_LOW_WATERMARK", "50"))
+KEYPAIR_POOL_TARGET = int(os.getenv("KEYPAIR_POOL_TARGET", "200"))
+KEYPAIR_POOL_REFILL_INTERVAL_SECONDS = float(os.getenv("KEYPAIR_POOL_REFILL_INTERVAL_SECONDS", "10"))
+# Fund pool accounts with Friendbot ahead of time (Testnet only)
+KEYPAIR_POOL_PREFUND = os.getenv("KEYPAIR_POOL_PREFUND", "false").lower() in ("1", "true", "yes")
+KEYPAIR_POOL_FUND_CONCURRENCY = int(os.getenv("KEYPAIR_POOL_FUND_CONCURRENCY", "5"))
+
+KEYPAIR_POOL_COLLECTION = "stellar_keypair_pool"
+
+def _generate_encrypted_keypairs(count: int):
+    # CPU-bound; runs on the default executor
+    now = datetime.utcnow()
+    docs = []
+    for _ in range(count):
+        keys = generate_stellar_keypair()
+        docs.append({
+            "stellar_public_key": keys["public_key"],
+            "stellar_secret_key_encrypted": encrypt_secret_key(keys["secret_key"]),
+            "funded": False,
+            "created_at": now,
+        })
+    return docs
+
+
+class KeypairPool:
+    """Keeps a collection of ready, encrypted (optionally funded) keypairs topped up."""
+
+    def __init__(self):
+        self._task = None
+        self.depth = None
+        self.funded_depth = None
+        self.generated = 0
+        self.funded = 0
+        self.claims = 0
+        self.claim_misses = 0
+        self.last_refill_rate = 0.0
+
+    async def claim(self, db=None):
+        """
+        Atomically takes one keypair out of the pool, preferring funded ones.
+        Returns None when the pool is empty so the caller can fall back to
+        generating a keypair inline.
+        """
+        db = db if db is not None else Database.get_db()
+        # Deleting on claim leaves no second copy of the encrypted secret behind
+        keypair = await db[KEYPAIR_POOL_COLLECTION].find_one_and_delete({}, sort=[("funded", -1), ("_id", 1)])
+        if keypair is None:
+            self.claim_misses += 1
+            return None
+        self.claims += 1
+        if self.depth:
+            self.depth -= 1
+        return keypair
+
+    async def release(self, keypair: dict, db=None):
+        """Returns a claimed keypair that ended up unused (e.g. the registration failed)."""
+        db = db if db is not None else Database.get_db()
+        try:
+            await db[KEYPAIR_POOL_COLLECTION].insert_one(keypair)
+        except Exception as e:
+            print(f"Could not return keypair {keypair.get('stellar_public_key')} to the pool: {e}")
+            return
+        self.claims -= 1
+        if self.depth is not None:
+            self.depth += 1
+
+    async def refill(self, db=None):
+        db = db if db is not None else Database.get_db()
+        pool = db[KEYPAIR_POOL_COLLECTION]
+
+        self.depth = await pool.count_documents({})
+        if self.depth < KEYPAIR_POOL_LOW_WATERMARK:
+            missing = max(KEYPAIR_POOL_TARGET, KEYPAIR_POOL_LOW_WATERMARK) - self.depth
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            docs = await loop.run_in_executor(None, _generate_encrypted_keypairs, missing)
+            await pool.insert_many(docs, ordered=False)
+            self.generated += len(docs)
+            self.depth += len(docs)
+            self.last_refill_rate = round(len(docs) / (time.perf_counter() - started), 1)
+            print(f"Keypair pool refilled with {len(docs)} keypairs ({self.last_refill_rate}/s)")
+
+        if KEYPAIR_POOL_PREFUND:
+            await self._fund_pending(pool)
+            self.funded_depth = await pool.count_documents({"funded": True})
+
+    async def _fund_pending(self, pool):
+        unfunded = await pool.find({"funded": False}, {"stellar_public_key": 1}).to_list(length=KEYPAIR_POOL_TARGET)
+        semaphore = asyncio.Semaphore(KEYPAIR_POOL_FUND_CONCURRENCY)
+
+        async def fund(doc):
+            async with semaphore:
+                if await fund_testnet_account(doc["stellar_public_key"]):
+                    await pool.update_one(
+                        {"_id": doc["_id"]},
+                        {"$set": {"funded": True, "funded_at": datetime.utcnow()}}
+                    )
+                    self.funded += 1
+
+        await asyncio.gather(*(fund(doc) for doc in unfunded))
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refill()
+            except Exception as e:
+                print(f"Keypair pool refill failed: {e}")
+            await asyncio.sleep(KEYPAIR_POOL_REFILL_INTERVAL_SECONDS)
+
+    async def start(self):
+        if KEYPAIR_POOL_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": KEYPAIR_POOL_ENABLED,
+            "depth": self.depth,
+            "funded_depth": self.funded_depth,
+            "low_watermark": KEYPAIR_POOL_LOW_WATERMARK,
+            "target": KEYPAIR_POOL_TARGET,
+            "generated": self.generated,
+            "funded": self.funded,
+            "claims": self.claims,
+            "claim_misses": self.claim_misses,
+            "last_refill_keys_per_second": self.last_refill_rate,
+        }
+
+
+keypair_pool = KeypairPool()
+metrics.register("keypair_pool", keypair_pool.stats)
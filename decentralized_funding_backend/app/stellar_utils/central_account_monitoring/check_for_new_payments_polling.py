@@ -1,23 +1,24 @@
-# Assuming 'server' is initialized from 2.1.2 and 'get_app_public_key()' exists
-import time
+import asyncio
+from stellar_sdk import ServerAsync
+from stellar_sdk.exceptions import NotFoundError
+from .. import gateway
+from ..account_management.get_app_secret_key import get_app_public_key
 
-def check_for_new_payments_polling(last_cursor: str):
+async def check_for_new_payments_polling(last_cursor: str, server: ServerAsync = None):
     """Checks for new incoming payments to the central account using polling."""
     central_account_id = get_app_public_key()
     try:
         # Fetch payments since the last cursor, ordered ascending
-        payments_page = server.payments().for_account(central_account_id).cursor(last_cursor).order("asc").call()
-
-        new_payments = payments_page['records']
+        new_payments = await gateway.get_payments(central_account_id, cursor=last_cursor, server=server)
         if new_payments:
             print(f"Found {len(new_payments)} new payments.")
             for payment in new_payments:
-                 if payment['to'] == central_account_id and payment['from'] != central_account_id:
-                    print(f"Received donation from {payment['from']} for {payment['amount']} {payment['asset_code']}")
+                 if payment.get('to') == central_account_id and payment.get('from') != central_account_id:
+                    print(f"Received donation from {payment['from']} for {payment['amount']} {payment.get('asset_code', 'XLM')}")
                     # *** Trigger your funding algorithm or add the amount to a queue ***
-                    # Update last_cursor to the paging_token of the last processed payment
-                    last_cursor = payment['paging_token']
-                    # Save the new last_cursor to your database immediately
+                 # Update last_cursor to the paging_token of the last processed payment
+                 last_cursor = payment['paging_token']
+                 # Save the new last_cursor to your database immediately
 
         return last_cursor # Return the updated cursor
 
@@ -29,8 +30,8 @@ def check_for_new_payments_polling(last_cursor: str):
         print(f"Error during payment polling: {e}")
         return last_cursor # Return the same cursor in case of error
 
-# To run this periodically (needs a background task mechanism):
+# To run this periodically (as a background task, e.g. asyncio.create_task):
 # last_processed_cursor = "now" # Load from DB on startup
 # while True:
-#     last_processed_cursor = check_for_new_payments_polling(last_processed_cursor)
-#     time.sleep(60) # Check every 60 seconds (adjust as needed)
\ No newline at end of file
+#     last_processed_cursor = await check_for_new_payments_polling(last_processed_cursor)
+#     await asyncio.sleep(60) # Check every 60 seconds (adjust as needed)
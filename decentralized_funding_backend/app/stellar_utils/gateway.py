@@ -0,0 +1,91 @@
+# app/stellar_utils/gateway.py
+#
+# The one place the app talks to Horizon from. Every call goes through the
+# shared ServerAsync (app/stellar_utils/horizon.py) and is awaited, so a slow
+# Horizon response only holds up the request waiting on it, never the event
+# loop. Nothing here may use the sync stellar_sdk Server (a `requests` call
+# per round trip); tests/test_stellar_gateway.py fails if any of these
+# blocks the loop.
+#
+# Like the helpers, every function takes an optional `server`.
+
+from typing import Any, AsyncGenerator, Dict, List, Optional
+from stellar_sdk import Account, ServerAsync
+from stellar_sdk.exceptions import NotFoundError
+from .horizon import Horizon
+
+
+def _server(server: Optional[ServerAsync]) -> ServerAsync:
+    return server or Horizon.get_server()
+
+
+async def load_account(account_id: str, server: ServerAsync = None) -> Account:
+    """Account with its current sequence number, ready for a TransactionBuilder. Raises NotFoundError."""
+    return await _server(server).load_account(account_id=account_id)
+
+
+async def get_balances(account_id: str, server: ServerAsync = None) -> Optional[List[Dict[str, Any]]]:
+    """Horizon balance dicts (asset_type, asset_code, balance, ...), or None if the account does not exist."""
+    try:
+        account = await _server(server).accounts().account_id(account_id).call()
+    except NotFoundError:
+        return None
+    return account["balances"]
+
+
+async def submit_transaction(transaction, server: ServerAsync = None) -> Dict[str, Any]:
+    """Submits a signed transaction (envelope or XDR) and waits for it to be in a ledger."""
+    return await _server(server).submit_transaction(transaction)
+
+
+async def get_transaction(transaction_hash: str, server: ServerAsync = None) -> Optional[Dict[str, Any]]:
+    """The transaction record, or None if Horizon has not seen it (yet)."""
+    try:
+        return await _server(server).transactions().transaction(transaction_hash).call()
+    except NotFoundError:
+        return None
+
+
+async def get_transaction_payments(transaction_hash: str, server: ServerAsync = None) -> List[Dict[str, Any]]:
+    """Payment operations (payment, path payments, create_account) of one transaction."""
+    return (await _server(server).payments().for_transaction(transaction_hash).limit(200).call())["_embedded"]["records"]
+
+
+async def get_account_transactions(
+    account_id: str, limit: int = 10, desc: bool = True, cursor: str = None, server: ServerAsync = None
+) -> List[Dict[str, Any]]:
+    """One page of an account's transactions."""
+    builder = _server(server).transactions().for_account(account_id).limit(limit).order(desc=desc)
+    if cursor is not None:
+        builder = builder.cursor(cursor)
+    return (await builder.call())["_embedded"]["records"]
+
+
+async def get_payments(
+    account_id: str, cursor: str = None, limit: int = 200, desc: bool = False, server: ServerAsync = None
+) -> List[Dict[str, Any]]:
+    """One page of payment operations to or from an account, oldest first by default."""
+    builder = _server(server).payments().for_account(account_id).limit(limit).order(desc=desc)
+    if cursor is not None:
+        builder = builder.cursor(cursor)
+    return (await builder.call())["_embedded"]["records"]
+
+
+def stream_transactions(account_id: str, cursor: str = "now", server: ServerAsync = None) -> AsyncGenerator[Dict[str, Any], None]:
+    """An account's transactions as they close; resumes from the last one after a disconnect."""
+    return _server(server).transactions().for_account(account_id).cursor(cursor).stream()
+
+
+def stream_payments(account_id: str, cursor: str = "now", server: ServerAsync = None) -> AsyncGenerator[Dict[str, Any], None]:
+    """An account's payments as they close; resumes from the last one after a disconnect."""
+    return _server(server).payments().for_account(account_id).cursor(cursor).stream()
+
+
+async def fee_stats(server: ServerAsync = None) -> Dict[str, Any]:
+    """Fee statistics over the last few ledgers (GET /fee_stats)."""
+    return await _server(server).fee_stats().call()
+
+
+async def base_fee(server: ServerAsync = None) -> int:
+    """Base fee in stroops of the last ledger, falling back to the network minimum."""
+    return await _server(server).fetch_base_fee()
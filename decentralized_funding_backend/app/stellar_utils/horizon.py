@@ -0,0 +1,183 @@
+# app/stellar_utils/horizon.py
+#
+# One ServerAsync per worker, backed by a pooled httpx.AsyncClient so Horizon
+# calls reuse keep-alive connections instead of paying a TLS handshake each.
+# It is opened at startup and closed at shutdown (app/main.py), the same way
+# as the Mongo client; helpers take an optional `server` and default to
+# Horizon.get_server().
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncGenerator, Dict, Optional
+import httpx
+from dotenv import load_dotenv
+from stellar_sdk import Network, ServerAsync
+from stellar_sdk.__version__ import __version__ as STELLAR_SDK_VERSION
+from stellar_sdk.client.base_async_client import BaseAsyncClient
+from stellar_sdk.client.response import Response
+from stellar_sdk.exceptions import ConnectionError, StreamClientError
+from ..core import metrics
+
+load_dotenv()
+
+HORIZON_URL = os.getenv("HORIZON_URL", "https://horizon-testnet.stellar.org")
+NETWORK_PASSPHRASE = os.getenv("STELLAR_NETWORK_PASSPHRASE", Network.TESTNET_NETWORK_PASSPHRASE)
+HORIZON_MAX_CONNECTIONS = int(os.getenv("HORIZON_MAX_CONNECTIONS", "50"))
+HORIZON_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HORIZON_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HORIZON_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HORIZON_KEEPALIVE_EXPIRY_SECONDS", "60"))
+HORIZON_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HORIZON_CONNECT_TIMEOUT_SECONDS", "5"))
+HORIZON_TIMEOUT_SECONDS = float(os.getenv("HORIZON_TIMEOUT_SECONDS", "15"))
+# Submissions wait for the transaction to make it into a ledger
+HORIZON_SUBMIT_TIMEOUT_SECONDS = float(os.getenv("HORIZON_SUBMIT_TIMEOUT_SECONDS", "35"))
+# Also bounds how long a request waits for a free pooled connection
+HORIZON_POOL_TIMEOUT_SECONDS = float(os.getenv("HORIZON_POOL_TIMEOUT_SECONDS", "5"))
+# Stream reconnects back off from Horizon's suggested retry (0.1s) up to this
+HORIZON_STREAM_MAX_RETRY_SECONDS = float(os.getenv("HORIZON_STREAM_MAX_RETRY_SECONDS", "30"))
+
+_HEADERS = {
+    "X-Client-Name": "py-stellar-base",
+    "X-Client-Version": STELLAR_SDK_VERSION,
+}
+
+
+def _response(response: httpx.Response) -> Response:
+    return Response(
+        status_code=response.status_code,
+        text=response.text,
+        headers=dict(response.headers),
+        url=str(response.url),
+    )
+
+
+class HttpxClient(BaseAsyncClient):
+    """stellar_sdk async client on a shared, pooled httpx.AsyncClient."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport = None):
+        self.requests = 0
+        self.errors = 0
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            headers=_HEADERS,
+            limits=httpx.Limits(
+                max_connections=HORIZON_MAX_CONNECTIONS,
+                max_keepalive_connections=HORIZON_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HORIZON_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(
+                HORIZON_TIMEOUT_SECONDS,
+                connect=HORIZON_CONNECT_TIMEOUT_SECONDS,
+                pool=HORIZON_POOL_TIMEOUT_SECONDS,
+            ),
+        )
+
+    async def get(self, url: str, params: Dict[str, str] = None) -> Response:
+        self.requests += 1
+        try:
+            return _response(await self._client.get(url, params=params))
+        except httpx.HTTPError as e:
+            self.errors += 1
+            raise ConnectionError(e)
+
+    async def post(self, url: str, data: Dict[str, str] = None, json_data: Dict[str, Any] = None) -> Response:
+        self.requests += 1
+        try:
+            response = await self._client.post(
+                url, data=data, json=json_data, timeout=httpx.Timeout(
+                    HORIZON_SUBMIT_TIMEOUT_SECONDS, connect=HORIZON_CONNECT_TIMEOUT_SECONDS, pool=HORIZON_POOL_TIMEOUT_SECONDS
+                )
+            )
+            return _response(response)
+        except httpx.HTTPError as e:
+            self.errors += 1
+            raise ConnectionError(e)
+
+    async def stream(self, url: str, params: Dict[str, str] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Server-sent events from Horizon, resuming from the last event id after a
+        disconnect. Reconnects back off exponentially (reset once an event
+        arrives); a 4xx other than 429 will not go away and raises StreamClientError.
+        """
+        query_params = dict(params or {})
+        base_retry = 0.1
+        retry = base_retry
+        while True:
+            received = False
+            try:
+                async with self._client.stream(
+                    "GET", url, params=query_params,
+                    headers={"Accept": "text/event-stream"},
+                    # Horizon keeps the stream open between events
+                    timeout=httpx.Timeout(None, connect=HORIZON_CONNECT_TIMEOUT_SECONDS),
+                ) as response:
+                    if 400 <= response.status_code < 500 and response.status_code != 429:
+                        raise StreamClientError(
+                            query_params.get("cursor"), f"Horizon refused stream {url}: {response.status_code}"
+                        )
+                    response.raise_for_status()
+                    event_id, data = None, []
+                    async for line in response.aiter_lines():
+                        if line.startswith("id:"):
+                            event_id = line[3:].strip()
+                        elif line.startswith("data:"):
+                            data.append(line[5:].strip())
+                        elif line.startswith("retry:"):
+                            base_retry = int(line[6:].strip()) / 1000
+                        elif not line and data:
+                            payload = "\n".join(data)
+                            data = []
+                            if event_id:
+                                query_params["cursor"] = event_id
+                            # Horizon greets and says goodbye with plain strings
+                            if payload not in ('"hello"', '"byebye"'):
+                                received = True
+                                retry = base_retry
+                                yield json.loads(payload)
+            except httpx.HTTPError as e:
+                print(f"Horizon stream {url} dropped, reconnecting in {retry}s: {e}")
+            except json.JSONDecodeError as e:
+                raise StreamClientError(query_params.get("cursor"), "Failed to decode stream message") from e
+            await asyncio.sleep(retry)
+            # Streams that keep closing without delivering anything back off too
+            retry = base_retry if received else min(retry * 2, HORIZON_STREAM_MAX_RETRY_SECONDS)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "max_connections": HORIZON_MAX_CONNECTIONS,
+            "max_keepalive_connections": HORIZON_MAX_KEEPALIVE_CONNECTIONS,
+        }
+
+
+class Horizon:
+    client: Optional[HttpxClient] = None
+    server: Optional[ServerAsync] = None
+
+    @classmethod
+    async def connect(cls, transport: httpx.AsyncBaseTransport = None):
+        # `transport` swaps the network out, e.g. for an httpx.MockTransport
+        cls.client = HttpxClient(transport)
+        cls.server = ServerAsync(horizon_url=HORIZON_URL, client=cls.client)
+
+    @classmethod
+    async def close(cls):
+        if cls.server is not None:
+            await cls.server.close()
+            cls.client = cls.server = None
+
+    @classmethod
+    def get_server(cls) -> ServerAsync:
+        if cls.server is None:
+            raise RuntimeError("Horizon client is not initialised; Horizon.connect() runs at startup")
+        return cls.server
+
+    @classmethod
+    def stats(cls) -> dict:
+        return cls.client.stats() if cls.client is not None else {"connected": False}
+
+
+metrics.register("horizon", Horizon.stats)
@@ -0,0 +1,154 @@
+# app/stellar_utils/key_rotation.py
+#
+# Resumable bulk re-encryption of stored Stellar secret keys (the
+# stellar_secret_key_encrypted field of users and of the pre-generated keypair
+# pool) with the primary encryption key (see ENCRYPTION_KEYS in key_security.py).
+#
+# Usage (from decentralized_funding_backend/):
+#   python -m app.stellar_utils.key_rotation --batch-size 1000 --workers 8
+#   python -m app.stellar_utils.key_rotation --restart   # ignore the checkpoint
+
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pymongo import UpdateOne
+from ..core.database import Database
+from .key_security import (
+    ENCRYPTION_KEYS,
+    clear_signing_key_cache,
+    is_encrypted_with_primary_key,
+    rotate_encrypted_secret_key,
+)
+from .account_management.keypair_pool import KEYPAIR_POOL_COLLECTION
+
+CHECKPOINT_COLLECTION = "key_rotation_checkpoints"
+# Collections holding a stellar_secret_key_encrypted field; one checkpoint each
+ROTATED_COLLECTIONS = ["users", KEYPAIR_POOL_COLLECTION]
+
+def primary_key_fingerprint() -> str:
+    """Identifies the primary key without storing it, so checkpoints survive restarts."""
+    return hashlib.sha256(ENCRYPTION_KEYS[0].encode()).hexdigest()[:16]
+
+def _rotate_chunk(docs):
+    # Runs on the worker pool: returns (_id, old, new) for values that need rotating
+    rotated = []
+    for doc in docs:
+        old_value = doc["stellar_secret_key_encrypted"]
+        if is_encrypted_with_primary_key(old_value):
+            continue
+        rotated.append((doc["_id"], old_value, rotate_encrypted_secret_key(old_value)))
+    return rotated
+
+async def get_rotation_checkpoints(db):
+    return await db[CHECKPOINT_COLLECTION].find({"_id": {"$in": ROTATED_COLLECTIONS}}).to_list(length=None)
+
+async def rotate_secret_keys(db, collection: str = "users", batch_size: int = 1000, workers: int = None, restart: bool = False):
+    """
+    Streams a collection by _id, re-encrypts the stored secret keys in parallel and writes
+    them back with unordered bulk_write batches. Progress is checkpointed after
+    every batch; a rerun with the same primary key continues where it stopped.
+    """
+    workers = workers or os.cpu_count() or 2
+    fingerprint = primary_key_fingerprint()
+    checkpoints = db[CHECKPOINT_COLLECTION]
+
+    checkpoint = await checkpoints.find_one({"_id": collection})
+    if restart or not checkpoint or checkpoint.get("primary_key") != fingerprint:
+        checkpoint = {
+            "_id": collection,
+            "primary_key": fingerprint,
+            "last_id": None,
+            "scanned": 0,
+            "rotated": 0,
+            "started_at": datetime.utcnow(),
+            "finished_at": None,
+        }
+        await checkpoints.replace_one({"_id": collection}, checkpoint, upsert=True)
+    elif checkpoint.get("finished_at"):
+        print(f"Key rotation of {collection} already completed for the current primary key.")
+        return checkpoint
+
+    query = {"stellar_secret_key_encrypted": {"$type": "string"}}
+    if checkpoint["last_id"] is not None:
+        query["_id"] = {"$gt": checkpoint["last_id"]}
+    cursor = (
+        db[collection]
+        .find(query, {"stellar_secret_key_encrypted": 1})
+        .sort("_id", 1)
+        .batch_size(batch_size)
+    )
+
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    scanned_this_run = 0
+
+    async def flush(batch):
+        nonlocal scanned_this_run
+        chunk_size = max(1, len(batch) // workers)
+        chunks = [batch[i:i + chunk_size] for i in range(0, len(batch), chunk_size)]
+        results = await asyncio.gather(*(loop.run_in_executor(pool, _rotate_chunk, chunk) for chunk in chunks))
+
+        # Only overwrite values nobody changed while we were re-encrypting
+        requests = [
+            UpdateOne(
+                {"_id": _id, "stellar_secret_key_encrypted": old_value},
+                {"$set": {"stellar_secret_key_encrypted": new_value}},
+            )
+            for rotated in results
+            for _id, old_value, new_value in rotated
+        ]
+        if requests:
+            await db[collection].bulk_write(requests, ordered=False)
+
+        scanned_this_run += len(batch)
+        checkpoint["last_id"] = batch[-1]["_id"]
+        checkpoint["scanned"] += len(batch)
+        checkpoint["rotated"] += len(requests)
+        checkpoint["docs_per_second"] = round(scanned_this_run / (time.perf_counter() - started), 1)
+        checkpoint["updated_at"] = datetime.utcnow()
+        await checkpoints.replace_one({"_id": collection}, checkpoint)
+        print(
+            f"Key rotation of {collection}: scanned {checkpoint['scanned']}, rotated {checkpoint['rotated']} "
+            f"({checkpoint['docs_per_second']} docs/s)"
+        )
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="key-rotation") as pool:
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+
+    checkpoint["finished_at"] = datetime.utcnow()
+    await checkpoints.replace_one({"_id": collection}, checkpoint)
+    clear_signing_key_cache()
+    print(f"Key rotation of {collection} finished: {checkpoint['rotated']} of {checkpoint['scanned']} secrets re-encrypted.")
+    return checkpoint
+
+async def rotate_all_secret_keys(db, batch_size: int = 1000, workers: int = None, restart: bool = False):
+    return [
+        await rotate_secret_keys(db, collection, batch_size=batch_size, workers=workers, restart=restart)
+        for collection in ROTATED_COLLECTIONS
+    ]
+
+async def main(batch_size: int, workers: int, restart: bool):
+    await Database.connect_to_mongo()
+    try:
+        await rotate_all_secret_keys(Database.get_db(), batch_size=batch_size, workers=workers, restart=restart)
+    finally:
+        await Database.close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--restart", action="store_true", help="Ignore any saved checkpoint")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.workers, args.restart))
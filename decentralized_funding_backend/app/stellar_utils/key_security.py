@@ -1,8 +1,11 @@
 # app/stellar_utils/key_security.py
 
 from stellar_sdk import Keypair
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+from collections import deque
 import os
+from ..core.cache import TTLCache
+from ..core import metrics
 # You might need to install python-dotenv for local development: pip install python-dotenv
 from dotenv import load_dotenv
 load_dotenv() # Load environment variables from .env fil
@@ -14,10 +17,21 @@ load_dotenv() # Load environment variables from .env fil
 # Store this key securely and provide it via an environment variable like STELLAR_SECRET_KEY_ENCRYPTION_KEY
 ENCRYPTION_KEY = os.getenv("STELLAR_SECRET_KEY_ENCRYPTION_KEY")
 
-if not ENCRYPTION_KEY:
+# For key rotation, STELLAR_SECRET_KEY_ENCRYPTION_KEYS holds a comma-separated list
+# of keys, newest first. New secrets are encrypted with the first (primary) key and
+# any listed key can decrypt. Retire an old key only after running the rotation job
+# (python -m app.stellar_utils.key_rotation).
+ENCRYPTION_KEYS = [
+    key.strip()
+    for key in os.getenv("STELLAR_SECRET_KEY_ENCRYPTION_KEYS", ENCRYPTION_KEY or "").split(",")
+    if key.strip()
+]
+
+if not ENCRYPTION_KEYS:
     raise ValueError("STELLAR_SECRET_KEY_ENCRYPTION_KEY environment variable not set.")
 
-cipher_suite = Fernet(ENCRYPTION_KEY)
+primary_cipher = Fernet(ENCRYPTION_KEYS[0])
+cipher_suite = MultiFernet([primary_cipher] + [Fernet(key) for key in ENCRYPTION_KEYS[1:]])
 
 def generate_stellar_keypair():
     """Generates a new Stellar keypair."""
@@ -37,6 +51,18 @@ def encrypt_secret_key(secret_key: str) -> str:
         # Handle encryption errors appropriately (e.g., log, raise custom exception)
         raise
 
+def is_encrypted_with_primary_key(encrypted_secret_key: str) -> bool:
+    """True if the value already decrypts with the primary (newest) key."""
+    try:
+        primary_cipher.decrypt(encrypted_secret_key.encode())
+        return True
+    except InvalidToken:
+        return False
+
+def rotate_encrypted_secret_key(encrypted_secret_key: str) -> str:
+    """Re-encrypts a stored secret key with the primary key."""
+    return cipher_suite.rotate(encrypted_secret_key.encode()).decode()
+
 def decrypt_secret_key(encrypted_secret_key: str) -> str:
     """Decrypts a Stellar secret key."""
     if not encrypted_secret_key:
@@ -48,4 +74,76 @@ def decrypt_secret_key(encrypted_secret_key: str) -> str:
     except Exception as e:
         print(f"Error decrypting secret key: {e}")
         # Handle decryption errors (e.g., log, raise custom exception - could indicate tampered data)
-        raise
\ No newline at end of file
+        raise
+
+# --- Decrypted Signing-Key Cache ---
+# Opt-in cache of ready Keypair objects keyed by user id, so bursts of payouts
+# from one account do not repeat Fernet decryption and key parsing.
+# Entries live for a short TTL, the entry count is capped, and the cache can be
+# wiped per user (logout) or entirely (key rotation). Dropping an entry only
+# releases the reference; Python cannot zero the underlying memory.
+SIGNING_KEY_CACHE_ENABLED = os.getenv("SIGNING_KEY_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+SIGNING_KEY_CACHE_TTL_SECONDS = float(os.getenv("SIGNING_KEY_CACHE_TTL_SECONDS", "60"))
+SIGNING_KEY_CACHE_MAX_ENTRIES = int(os.getenv("SIGNING_KEY_CACHE_MAX_ENTRIES", "256"))
+
+_residency_seconds = deque(maxlen=1024)
+_signing_key_stats = {"decrypts": 0, "decrypts_avoided": 0, "wipes": 0}
+
+def _record_residency(user_id, keypair, age_seconds):
+    _residency_seconds.append(age_seconds)
+
+signing_key_cache = TTLCache(
+    maxsize=SIGNING_KEY_CACHE_MAX_ENTRIES,
+    ttl=SIGNING_KEY_CACHE_TTL_SECONDS,
+    on_remove=_record_residency,
+)
+
+def get_signing_keypair(user_id: str, encrypted_secret_key: str) -> Keypair:
+    """Returns the user's signing Keypair, from the cache when enabled."""
+    if SIGNING_KEY_CACHE_ENABLED:
+        signing_key_cache.purge_expired()
+        keypair = signing_key_cache.get(user_id)
+        if keypair is not None:
+            _signing_key_stats["decrypts_avoided"] += 1
+            return keypair
+
+    secret_key = decrypt_secret_key(encrypted_secret_key)
+    if not secret_key:
+        raise ValueError("Decrypted secret key is empty.")
+    _signing_key_stats["decrypts"] += 1
+    keypair = Keypair.from_secret(secret_key)
+
+    if SIGNING_KEY_CACHE_ENABLED:
+        signing_key_cache.set(user_id, keypair)
+    return keypair
+
+def forget_signing_keypair(user_id: str):
+    """Wipes one user's cached Keypair (e.g. on logout)."""
+    if signing_key_cache.pop(user_id) is not None:
+        _signing_key_stats["wipes"] += 1
+
+def clear_signing_key_cache():
+    """Wipes every cached Keypair (e.g. after an encryption key rotation)."""
+    _signing_key_stats["wipes"] += len(signing_key_cache)
+    signing_key_cache.clear()
+
+def set_signing_key_cache_enabled(enabled: bool):
+    """Kill switch: disabling also wipes everything currently cached."""
+    global SIGNING_KEY_CACHE_ENABLED
+    SIGNING_KEY_CACHE_ENABLED = enabled
+    if not enabled:
+        clear_signing_key_cache()
+
+def signing_key_cache_stats() -> dict:
+    residency = sorted(_residency_seconds)
+    return {
+        "enabled": SIGNING_KEY_CACHE_ENABLED,
+        "entries": len(signing_key_cache),
+        "max_entries": signing_key_cache.maxsize,
+        "ttl_seconds": signing_key_cache.ttl,
+        **_signing_key_stats,
+        "residency_seconds_avg": round(sum(residency) / len(residency), 3) if residency else 0.0,
+        "residency_seconds_max": round(residency[-1], 3) if residency else 0.0,
+    }
+
+metrics.register("signing_key_cache", signing_key_cache_stats)
@@ -1,15 +1,16 @@
-# Assuming 'server' and 'NETWORK_PASSPHRASE' are initialized from 2.1.2
-from stellar_sdk import TransactionBuilder, server, NETWORK_PASSPHRASE
+from stellar_sdk import TransactionBuilder, ServerAsync
 from stellar_sdk.exceptions import NotFoundError
+from ..horizon import NETWORK_PASSPHRASE
+from .. import gateway
 
-async def build_transaction(source_public_key: str, operations: list, memo=None, timeout: int = 30):
+async def build_transaction(source_public_key: str, operations: list, memo=None, timeout: int = 30, server: ServerAsync = None):
     """Builds a transaction from a list of operations."""
     try:
         # 1. Load the source account to get its sequence number
-        source_account = await server.load_account(account_id=source_public_key)
+        source_account = await gateway.load_account(source_public_key, server=server)
 
         # Get the base fee from Horizon
-        base_fee = await server.fetch_base_fee()
+        base_fee = await gateway.base_fee(server=server)
 
         # 2. Create a TransactionBuilder
         transaction_builder = (
@@ -1,4 +1,4 @@
-from stellar_sdk import Server, Keypair, TransactionBuilder, Payment, Network, Asset
+from stellar_sdk import ServerAsync, Keypair, TransactionBuilder, Payment, Network, Asset
 # Removing SubmitTransactionError import as it consistently fails in your environment
 from stellar_sdk.exceptions import NotFoundError
 
@@ -27,22 +27,16 @@ SOURCE_SECRET_KEY = "SAI75GAPTCHVB4Y6FZVDGMOOZTEKXAXBFLY73HDQO6I5T3M3YPA5U2VT" #
 # --- Network Configuration ---
 # Choose the network: Testnet for testing, Public Network for real transactions
 
-# Using string literal passphrases as Network attributes failed repeatedly in your environment
-HORIZON_URL = "https://horizon-testnet.stellar.org"
-NETWORK_PASSPHRASE = "Test SDF Network ; September 2015"
-
-# For Public Network (uncomment the lines below and comment the Testnet ones to use):
-# HORIZON_URL = "https://horizon.stellar.org"
-# NETWORK_PASSPHRASE = "Public Global Stellar Network ; September 2015"
+# Set HORIZON_URL / STELLAR_NETWORK_PASSPHRASE for the Public Network
+from ..horizon import Horizon, HORIZON_URL, NETWORK_PASSPHRASE
+from .. import gateway
 
 
 # --- Stellar Transaction Logic ---
 
-async def send_xlm(source_secret: str, destination_public: str, amount: str):
+async def send_xlm(source_secret: str, destination_public: str, amount: str, server: ServerAsync = None):
     """Sends XLM from a source account to a destination account."""
     try:
-        # Initialize Server
-        server = Server(horizon_url=HORIZON_URL)
         # Attempt to use use_network_passphrase if it exists in your installation,
         # otherwise rely on the passphrase being passed in opts.
         try:
@@ -66,13 +60,13 @@ async def send_xlm(source_secret: str, destination_public: str, amount: str):
         # 2. Load the source account from Horizon to get its current sequence number
         # The sequence number is crucial for transaction ordering and preventing replay attacks.
         # This requires 'await' for async methods in standard SDK
-        source_account = await server.load_account(account_id=source_keypair.public_key)
+        source_account = await gateway.load_account(source_keypair.public_key, server=server)
         print(f"Source account loaded. Sequence number: {source_account.sequence}")
 
         # 3. Get the current base fee from Horizon
         # This is the minimum fee required per operation.
         # This requires 'await' for async methods in standard SDK
-        base_fee = await server.fetch_base_fee()
+        base_fee = await gateway.base_fee(server=server)
         print(f"Base fee fetched: {base_fee}")
 
         # 4. Create a Payment operation
@@ -107,7 +101,7 @@ async def send_xlm(source_secret: str, destination_public: str, amount: str):
         # 7. Submit the signed transaction to Horizon
         print("Submitting transaction to Horizon...")
         # Catch any exception during submission as SubmitTransactionError import fails
-        response = await server.submit_transaction(transaction)
+        response = await gateway.submit_transaction(transaction, server=server)
 
         print("\nTransaction successful!")
         print("Transaction Hash:", response['hash'])
@@ -144,7 +138,11 @@ async def main():
         print("       Do NOT hardcode your secret key in production applications.")
         return
 
-    transaction_hash = await send_xlm(SOURCE_SECRET_KEY, DESTINATION_PUBLIC_KEY, AMOUNT_TO_SEND)
+    await Horizon.connect()
+    try:
+        transaction_hash = await send_xlm(SOURCE_SECRET_KEY, DESTINATION_PUBLIC_KEY, AMOUNT_TO_SEND)
+    finally:
+        await Horizon.close()
 
     if transaction_hash:
         print(f"\nTransaction completed. Check status on a Stellar explorer:")
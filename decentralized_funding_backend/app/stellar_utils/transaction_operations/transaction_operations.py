@@ -1,32 +1,33 @@
 # app/stellar_utils/stellar_transactions.py
 
-from stellar_sdk import Server, Keypair, TransactionBuilder, Network, Asset
-from stellar_sdk.exceptions import NotFoundError
-
+from stellar_sdk import Keypair, TransactionBuilder, Asset, ServerAsync
+from stellar_sdk.exceptions import BadRequestError, NotFoundError
 # Horizon & Network config
-HORIZON_URL = "https://horizon-testnet.stellar.org"
-NETWORK_PASSPHRASE = Network.TESTNET_NETWORK_PASSPHRASE  # Equivalent to "Test SDF Network ; September 2015"
+from ..horizon import NETWORK_PASSPHRASE
+from .. import gateway
 
 async def send_stellar_payment(
-    source_secret: str,
-    destination_public: str,
-    amount: str,
+    source_secret: str = None,
+    destination_public: str = None,
+    amount: str = None,
     asset_code: str = "XLM",
     asset_issuer: str = None,
-    memo_text: str = None
+    memo_text: str = None,
+    source_keypair: Keypair = None,
+    server: ServerAsync = None
 ):
     """
     Sends a Stellar payment from a source account to a destination.
+    Pass either the source secret or an already-built source Keypair.
     """
     try:
-        server = Server(horizon_url=HORIZON_URL)
-
         # 1. Load source keypair and account
-        source_keypair = Keypair.from_secret(source_secret)
+        if source_keypair is None:
+            source_keypair = Keypair.from_secret(source_secret)
         source_public = source_keypair.public_key
         print(f"Using source public key: {source_public}")
 
-        source_account = server.load_account(account_id=source_public)
+        source_account = await gateway.load_account(source_public, server=server)
         print(f"Source account loaded with sequence: {source_account.sequence}")
 
         # 2. Define asset
@@ -66,7 +67,7 @@ async def send_stellar_payment(
         # 8. Submit transaction
         print("Submitting transaction...")
         try:
-            response = server.submit_transaction(transaction)  # remove `await` unless using async SDK
+            response = await gateway.submit_transaction(transaction, server=server)
             print("Transaction successful!")
             print("Hash:", response["hash"])
             print("Ledger:", response["ledger"])
@@ -78,6 +79,16 @@ async def send_stellar_payment(
                 "result_codes": None
             }
 
+        except BadRequestError as e:
+            # Horizon rejected it; the result codes say why (tx_bad_seq, op_underfunded, ...)
+            result_codes = (e.extras or {}).get("result_codes")
+            print(f"Submission rejected: {result_codes}")
+            return {
+                "hash": None,
+                "successful": False,
+                "error": e.title or str(e),
+                "result_codes": result_codes
+            }
         except Exception as e:
             print(f"Submission error: {e}")
             return {
@@ -1,16 +1,16 @@
-# Assuming 'server' is initialized from 2.1.2
 import asyncio
-from stellar_sdk.exceptions import NotFoundError
+from stellar_sdk import ServerAsync
+from .. import gateway
 
-async def check_transaction_status(transaction_hash: str, max_attempts: int = 10, delay_seconds: int = 5):
+async def check_transaction_status(transaction_hash: str, max_attempts: int = 10, delay_seconds: int = 5, server: ServerAsync = None):
     """Checks the status of a transaction by polling Horizon."""
     for attempt in range(max_attempts):
         try:
-            transaction_record = await server.transactions().transaction_id(transaction_hash).call()
-            print(f"Transaction {transaction_hash} status: Success")
-            # Transaction found means it was successful
-            return {"status": "success", "record": transaction_record}
-        except NotFoundError:
+            transaction_record = await gateway.get_transaction(transaction_hash, server=server)
+            if transaction_record is not None:
+                print(f"Transaction {transaction_hash} status: Success")
+                # Transaction found means it was successful
+                return {"status": "success", "record": transaction_record}
             print(f"Attempt {attempt+1}: Transaction {transaction_hash} not yet found.")
             await asyncio.sleep(delay_seconds) # Wait before next attempt
         except Exception as e:
@@ -0,0 +1,121 @@
+# app/stellar_utils/transaction_submision_monitoring/confirm_donation.py
+#
+# confirm_donation job: checks a pending donation against the ledger and, if
+# its transaction really moved the money from the donor's account to the
+# project creator's, marks it confirmed and applies it to the project's
+# totals, rollups and events. Queued by app/core/transaction_log.py
+# after the donation is inserted; main imports this module to register it.
+
+import json
+import os
+from bson import ObjectId
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
+from ...core.database import Database
+from ...core.jobs import job_queue
+from ...core.project_funding import CONFIRM_DONATION_JOB, CONFIRMED_STATUS, FAILED_STATUS, PENDING_STATUS
+from ...core.transaction_log import after_confirmation
+from .. import gateway
+
+load_dotenv()
+
+# Issuer of every non-native asset donations may be made in, as JSON, e.g.
+# {"USDC": "GA5ZSEJYB37JRC5AVCIA5MOP4RHTM335X2KGX3IHOJAPP5RE34K4KZVN"}.
+# A payment in an asset whose code is not listed never confirms a donation.
+DONATION_ASSET_ISSUERS = json.loads(os.getenv("DONATION_ASSET_ISSUERS", "{}"))
+
+# Donations stored before statuses were set count as pending too
+NOT_CONFIRMED = {"$in": [PENDING_STATUS, None]}
+
+PAYMENT_TYPES = ("payment", "path_payment_strict_receive", "path_payment_strict_send")
+
+
+def _pays(operation: dict, donor_wallet: str, project_wallet: str, amount: float, asset_type: str) -> bool:
+    """Whether this payment operation moved `amount` of the asset from the donor to the project."""
+    if operation.get("type") == "create_account":
+        return (
+            asset_type == "XLM"
+            and operation.get("funder") == donor_wallet
+            and operation.get("account") == project_wallet
+            and float(operation["starting_balance"]) >= amount
+        )
+    if operation.get("type") not in PAYMENT_TYPES:
+        return False
+    if operation.get("from") != donor_wallet or operation.get("to") != project_wallet:
+        return False
+    if asset_type == "XLM":
+        if operation.get("asset_type") != "native":
+            return False
+    elif operation.get("asset_code") != asset_type or operation.get("asset_issuer") != DONATION_ASSET_ISSUERS.get(asset_type):
+        return False
+    return float(operation["amount"]) >= amount
+
+
+async def _wallet(db, user_id) -> Optional[str]:
+    user = await db["users"].find_one({"_id": user_id}, {"stellar_public_key": 1})
+    return (user or {}).get("stellar_public_key")
+
+
+async def _rejection(db, donation: dict, record: dict, transaction_hash: str) -> Optional[str]:
+    """Why the ledger does not back this donation, or None if it does."""
+    if not record.get("successful", False):
+        return "Stellar transaction failed"
+    project = await db["projects"].find_one({"_id": donation.get("project_id")}, {"creator_id": 1})
+    if project is None:
+        return "Project not found"
+    project_wallet = await _wallet(db, project.get("creator_id"))
+    if not project_wallet:
+        return "Project creator has no Stellar account"
+    # Otherwise anyone could claim someone else's payment to the project
+    donor_wallet = await _wallet(db, donation.get("donor_id"))
+    if not donor_wallet:
+        return "Donor has no Stellar account"
+    asset_type = donation.get("asset_type", "XLM")
+    operations = await gateway.get_transaction_payments(transaction_hash)
+    if not any(_pays(operation, donor_wallet, project_wallet, donation["amount"], asset_type) for operation in operations):
+        return f"Transaction does not pay {donation['amount']} {asset_type} from the donor to the project"
+    return None
+
+
+async def _mark_failed(transaction_id: ObjectId, error: str):
+    db = Database.get_db()
+    await db["transactions"].update_one(
+        {"_id": transaction_id, "status": NOT_CONFIRMED},
+        {"$set": {"status": FAILED_STATUS, "error": error, "updated_at": datetime.utcnow()}},
+    )
+
+
+async def handle_confirm_donation(payload: dict):
+    db = Database.get_db()
+    transaction_id = ObjectId(payload["transaction_id"])
+    donation = await db["transactions"].find_one({"_id": transaction_id, "status": NOT_CONFIRMED})
+    if donation is None:
+        return  # already confirmed or failed
+
+    # DonationCreate normalizes hashes; documents recorded before it may still carry 0x
+    transaction_hash = donation["transaction_hash"].removeprefix("0x").lower()
+    record = await gateway.get_transaction(transaction_hash)
+    if record is None:
+        # Raising lets the job queue retry with backoff while the ledger catches up
+        raise RuntimeError(f"Transaction {transaction_hash} not found on the ledger yet")
+
+    error = await _rejection(db, donation, record, transaction_hash)
+    if error is not None:
+        print(f"Donation {transaction_id} rejected: {error}")
+        await _mark_failed(transaction_id, error)
+        return
+
+    confirmed = {"status": CONFIRMED_STATUS, "confirmed_at": datetime.utcnow(), "block_height": record.get("ledger")}
+    result = await db["transactions"].update_one({"_id": transaction_id, "status": NOT_CONFIRMED}, {"$set": confirmed})
+    # Only the job that flipped the status applies it, so a rerun cannot count it twice;
+    # a failed step is recorded for repair rather than retried here
+    if result.modified_count == 1:
+        await after_confirmation([{**donation, **confirmed}])
+
+
+async def handle_confirm_donation_failure(payload: dict):
+    await _mark_failed(ObjectId(payload["transaction_id"]), "Transaction not confirmed on the ledger after retries")
+
+
+job_queue.register(CONFIRM_DONATION_JOB, handle_confirm_donation, on_failure=handle_confirm_donation_failure)
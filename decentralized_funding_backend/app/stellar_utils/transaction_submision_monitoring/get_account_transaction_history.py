@@ -1,13 +1,12 @@
-# Assuming 'server' is initialized from 2.1.2
+from stellar_sdk import ServerAsync
 from stellar_sdk.exceptions import NotFoundError
+from .. import gateway
 
-def get_account_transaction_history(account_id: str, limit: int = 10, order: str = "desc"):
+async def get_account_transaction_history(account_id: str, limit: int = 10, order: str = "desc", server: ServerAsync = None):
     """Retrieves transaction history for a given Stellar account ID."""
     try:
-        # You can paginate results using .cursor() if needed
-        operations_page = server.transactions().for_account(account_id).limit(limit).order(order).call()
-        # The response contains 'records' which are the transactions
-        transactions = operations_page['records']
+        # You can paginate results by passing cursor= if needed
+        transactions = await gateway.get_account_transactions(account_id, limit=limit, desc=order == "desc", server=server)
         return transactions
     except NotFoundError:
         print(f"Account {account_id} not found on the network.")
@@ -17,7 +16,7 @@ def get_account_transaction_history(account_id: str, limit: int = 10, order: str
         return None
 
 # Example usage:
-# history = get_account_transaction_history(student_public_key)
+# history = await get_account_transaction_history(student_public_key)
 # if history:
 #     for tx in history:
 #         print(f"Tx Hash: {tx['hash']}, Created At: {tx['created_at']}")
@@ -1,7 +1,9 @@
-# Assuming 'server' is initialized from 2.1.2
-# This would typically run in a separate background process or task
-def start_account_transaction_streaming(account_id: str):
-    """Starts streaming transactions for a given account."""
+# This would typically run as a background task (asyncio.create_task)
+from stellar_sdk import ServerAsync
+from .. import gateway
+
+async def start_account_transaction_streaming(account_id: str, server: ServerAsync = None):
+    """Streams transactions for a given account until cancelled."""
     # Use a cursor to start from a specific point (e.g., 'now' or last processed)
     # You'll need to manage the cursor's persistence to avoid processing duplicates
     cursor = "now" # Or load the last processed cursor from your database
@@ -12,13 +14,11 @@ def start_account_transaction_streaming(account_id: str):
         # Here you would update your database, trigger events, etc.
         # Remember to save the cursor (response['paging_token']) periodically
 
-    def on_error(exception):
-        print(f"Streaming error for {account_id}: {exception}")
-        # Handle errors, potentially reconnect
-
     print(f"Starting transaction stream for {account_id}...")
-    return server.transactions().for_account(account_id).cursor(cursor).stream(process_transaction, on_error)
+    # The pooled client reconnects from the last event on its own
+    async for response in gateway.stream_transactions(account_id, cursor=cursor, server=server):
+        process_transaction(response)
 
-# Example usage (might run in a separate thread or process):
-# stream = start_account_transaction_streaming(your_app_public_key)
-# To stop streaming: stream.close()
\ No newline at end of file
+# Example usage:
+# stream = asyncio.create_task(start_account_transaction_streaming(your_app_public_key))
+# To stop streaming: stream.cancel()
\ No newline at end of file
@@ -1,17 +1,17 @@
-# Assuming 'server' is initialized from 2.1.2
-from stellar_sdk import server
-from stellar_sdk.exceptions import SubmitTransactionError
+from stellar_sdk import ServerAsync
+from stellar_sdk.exceptions import BadRequestError as SubmitTransactionError
+from .. import gateway
 
-async def submit_stellar_transaction(signed_transaction):
+async def submit_stellar_transaction(signed_transaction, server: ServerAsync = None):
     """Submits a signed transaction to the Stellar network."""
     try:
-        response = await server.submit_transaction(signed_transaction)
+        response = await gateway.submit_transaction(signed_transaction, server=server)
         print(f"Transaction submitted successfully: {response['hash']}")
         return {"hash": response['hash'], "successful": True}
     except SubmitTransactionError as e:
-        print(f"Transaction submission failed: {e.message}")
-        # You can inspect e.extras.result_codes for more details
-        return {"hash": None, "successful": False, "error": e.message, "result_codes": e.extras.result_codes}
+        print(f"Transaction submission failed: {e.title}")
+        # e.extras["result_codes"] says why
+        return {"hash": None, "successful": False, "error": e.title, "result_codes": (e.extras or {}).get("result_codes")}
     except Exception as e:
         print(f"An unexpected error occurred during submission: {e}")
         return {"hash": None, "successful": False, "error": str(e), "result_codes": None}
@@ -0,0 +1,94 @@
+# benchmarks/bench_auth_me.py
+#
+# Requests per second on /api/auth/me with and without the users lookup.
+#
+#   "db"     -> subject-only token, get_current_user (principal cache disabled)
+#   "claims" -> token with embedded claims, get_current_principal
+#
+# Needs a reachable MongoDB (MONGODB_URL). Run from decentralized_funding_backend/:
+#   python -m benchmarks.bench_auth_me --requests 5000 --concurrency 50
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app.core import auth
+from app.core.database import Database
+from app.models.models import Principal, User
+
+BENCH_EMAIL = "bench-auth-me@example.com"
+
+bench_app = FastAPI()
+
+@bench_app.get("/api/auth/me")
+async def me_from_db(current_user: User = Depends(auth.get_current_user)):
+    return {"email": current_user.email, "role": current_user.role}
+
+@bench_app.get("/api/auth/me/claims")
+async def me_from_claims(current_user: Principal = Depends(auth.get_current_principal)):
+    return {"email": current_user.email, "role": current_user.role}
+
+
+async def run(client, path, token, total, concurrency):
+    headers = {"Authorization": f"Bearer {token}"}
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - started)
+
+
+async def main(total, concurrency):
+    await Database.connect_to_mongo()
+    db = Database.get_db()
+    await db["users"].delete_many({"email": BENCH_EMAIL})
+    result = await db["users"].insert_one({
+        "email": BENCH_EMAIL,
+        "username": "bench",
+        "password": "",
+        "password_hash": "",
+        "role": "student",
+        "stellar_public_key": None,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    })
+    user = await db["users"].find_one({"_id": result.inserted_id})
+
+    # Force the DB hop on every request for the baseline
+    auth.principal_cache.ttl = 0
+    expires = timedelta(minutes=30)
+    subject_token = auth.create_access_token({"sub": BENCH_EMAIL}, expires)
+    auth.JWT_EMBED_CLAIMS = True
+    claims_token = auth.create_access_token(auth.build_token_claims(user), expires)
+
+    transport = httpx.ASGITransport(app=bench_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        try:
+            db_rps = await run(client, "/api/auth/me", subject_token, total, concurrency)
+            claims_rps = await run(client, "/api/auth/me/claims", claims_token, total, concurrency)
+        finally:
+            await db["users"].delete_many({"email": BENCH_EMAIL})
+            await Database.close_mongo_connection()
+
+    print(f"with DB lookup:    {db_rps:10.1f} req/s")
+    print(f"claims only:       {claims_rps:10.1f} req/s")
+    print(f"speedup:           {claims_rps / db_rps:10.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,91 @@
+# benchmarks/bench_horizon_client.py
+#
+# Latency percentiles and throughput of Horizon account lookups (what
+# load_account / get_account_balances do) through:
+#
+#   "per_call" -> a new sync stellar_sdk Server for every call, run inline on
+#                 the event loop, as the Stellar helpers did before
+#                 app/stellar_utils/horizon.py (a fresh connection and TLS
+#                 handshake each time, and nothing else runs meanwhile)
+#   "pooled"   -> the shared ServerAsync on the pooled httpx client, with
+#                 --concurrency calls in flight
+#
+# Needs network access to HORIZON_URL (Testnet by default). Run from
+# decentralized_funding_backend/:
+#   python -m benchmarks.bench_horizon_client --requests 200 --concurrency 20 --account G...
+
+import argparse
+import asyncio
+import time
+
+from stellar_sdk import Server
+
+from app.stellar_utils.horizon import Horizon, HORIZON_URL
+
+# Any funded account works; this is the Testnet friendbot's
+DEFAULT_ACCOUNT = "GAIH3ULLFQ4DGSECF2AR555KZ4KNDGEKN4AFI4SU2M7B43MGK3QJZNSR"
+
+
+def percentile(samples, p):
+    index = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+    return samples[index] * 1000
+
+
+async def bench_per_call(account, total, concurrency):
+    latencies = []
+
+    async def worker(count):
+        for _ in range(count):
+            started = time.perf_counter()
+            Server(horizon_url=HORIZON_URL).accounts().account_id(account).call()
+            latencies.append(time.perf_counter() - started)
+
+    # The blocking calls serialize the workers no matter how many there are
+    await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+    return latencies
+
+
+async def bench_pooled(account, total, concurrency):
+    latencies = []
+    server = Horizon.get_server()
+
+    async def worker(count):
+        for _ in range(count):
+            started = time.perf_counter()
+            await server.accounts().account_id(account).call()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+    return latencies
+
+
+async def main(account, total, concurrency, modes):
+    await Horizon.connect()
+    try:
+        # Warm up DNS and the pool so the first handshake is not counted
+        await Horizon.get_server().accounts().account_id(account).call()
+        print(f"{HORIZON_URL}, {total} lookups, concurrency {concurrency}")
+        for name in modes:
+            bench = bench_per_call if name == "per_call" else bench_pooled
+            started = time.perf_counter()
+            latencies = sorted(await bench(account, total, concurrency))
+            elapsed = time.perf_counter() - started
+            print(
+                f"{name:<9} p50 {percentile(latencies, 0.50):8.1f} ms"
+                f"  p95 {percentile(latencies, 0.95):8.1f} ms"
+                f"  p99 {percentile(latencies, 0.99):8.1f} ms"
+                f"  {len(latencies) / elapsed:7.1f} req/s"
+            )
+        print(f"pooled client: {Horizon.stats()}")
+    finally:
+        await Horizon.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--account", default=DEFAULT_ACCOUNT)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--modes", nargs="+", default=["per_call", "pooled"])
+    args = parser.parse_args()
+    asyncio.run(main(args.account, args.requests, args.concurrency, args.modes))
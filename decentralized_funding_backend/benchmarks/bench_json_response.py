@@ -0,0 +1,112 @@
+# benchmarks/bench_json_response.py
+#
+# Serialization time and peak memory of a large admin response (documents
+# shaped like GET /api/admin/users/detailed: ObjectIds, datetimes and embedded
+# project/donation lists) through:
+#
+#   "jsonable" -> FastAPI's jsonable_encoder + JSONResponse (stdlib json), the
+#                 path every endpoint used before MongoJSONResponse (it only
+#                 handles ObjectId at all thanks to app/core/responses.py)
+#   "orjson"   -> MongoJSONResponse rendering the raw documents
+#
+# No database needed. Run from decentralized_funding_backend/:
+#   python -m benchmarks.bench_json_response --documents 50000
+
+import argparse
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.responses import MongoJSONResponse
+
+
+def detailed_users(count):
+    now = datetime.utcnow()
+    users = []
+    for n in range(count):
+        user_id = ObjectId()
+        users.append({
+            "_id": user_id,
+            "email": f"user{n}@example.com",
+            "username": f"user{n}",
+            "full_name": f"User {n}",
+            "role": "student",
+            "is_verified": n % 2 == 0,
+            "stellar_public_key": "G" + "A" * 55,
+            "funding_status": "funded",
+            "created_at": now - timedelta(minutes=n),
+            "wallet_address": "G" + "B" * 55,
+            "projects": [
+                {
+                    "_id": ObjectId(),
+                    "title": f"Project {n}-{p}",
+                    "category": "education",
+                    "status": "active",
+                    "target_amount": 1000.0,
+                    "current_amount": 250.5,
+                    "donation_count": 12,
+                    "funding_ratio": 0.2505,
+                    "deadline": now + timedelta(days=30),
+                    "created_at": now,
+                }
+                for p in range(2)
+            ],
+            "received_donations": [
+                {
+                    "_id": ObjectId(),
+                    "amount": 10.0,
+                    "asset_type": "XLM",
+                    "donor_id": ObjectId(),
+                    "project_id": ObjectId(),
+                    "created_at": now,
+                }
+                for _ in range(3)
+            ],
+        })
+    return {"items": users, "next_cursor": None}
+
+
+def render_jsonable(content):
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def render_orjson(content):
+    return MongoJSONResponse(content).body
+
+
+def measure(render, content, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        body = render(content)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    render(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return timings, peak, len(body)
+
+
+def main(documents, repeats):
+    content = detailed_users(documents)
+    print(f"{documents} documents, best/median of {repeats} runs")
+    for label, render in (("jsonable", render_jsonable), ("orjson", render_orjson)):
+        timings, peak, size = measure(render, content, repeats)
+        print(
+            f"{label:<9} best {min(timings) * 1000:8.1f} ms"
+            f"  median {statistics.median(timings) * 1000:8.1f} ms"
+            f"  peak {peak / 2**20:7.1f} MiB  body {size / 2**20:6.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=50000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    main(args.documents, args.repeats)
@@ -0,0 +1,104 @@
+# benchmarks/bench_model_validation.py
+#
+# Per-document validation cost of User, Project and Transaction built from
+# raw Mongo documents (ObjectId ids and references), the way get_current_user
+# and friends do it:
+#
+#   "kwargs"   -> Model(**doc)
+#   "validate" -> Model.model_validate(doc)
+#   "adapter"  -> list_adapter(Model).validate_python(docs), one call per batch
+#
+# No database needed. Run from decentralized_funding_backend/:
+#   python -m benchmarks.bench_model_validation --documents 20000
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.models import models
+
+
+def user_doc(n):
+    return {
+        "_id": ObjectId(),
+        "email": f"user{n}@example.com",
+        "username": f"user{n}",
+        "password": "",
+        "password_hash": "$2b$12$" + "x" * 53,
+        "wallet_address": "G" + "A" * 55,
+        "role": "student",
+        "is_verified": True,
+        "projects_created": [ObjectId() for _ in range(3)],
+        "donations_made": [ObjectId() for _ in range(5)],
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def project_doc(n):
+    return {
+        "_id": ObjectId(),
+        "title": f"Project {n}",
+        "description": "Benchmark project description",
+        "objectives": "Benchmark project objectives",
+        "deliverables": "Benchmark project deliverables",
+        "category": "education",
+        "target_amount": 1000.0,
+        "deadline": datetime.utcnow() + timedelta(days=30),
+        "creator_id": ObjectId(),
+        "current_amount": 120.0,
+        "donors": [ObjectId() for _ in range(10)],
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def transaction_doc(n):
+    return {
+        "_id": ObjectId(),
+        "amount": 10.0,
+        "transaction_hash": f"{n:064x}",
+        "donor_id": ObjectId(),
+        "project_id": ObjectId(),
+        "source_account_id": "G" + "A" * 55,
+        "destination_account_id": "G" + "B" * 55,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def per_document_us(run, documents, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run(documents)
+        best = min(best, time.perf_counter() - started)
+    return best / len(documents) * 1e6
+
+
+def main(count, repeats):
+    cases = (
+        ("User", models.User, user_doc),
+        ("Project", models.Project, project_doc),
+        ("Transaction", models.Transaction, transaction_doc),
+    )
+    for name, model, make in cases:
+        documents = [make(n) for n in range(count)]
+        runs = {
+            "kwargs": lambda docs: [model(**doc) for doc in docs],
+            "validate": lambda docs: [model.model_validate(doc) for doc in docs],
+        }
+        # Not available before the core-schema ObjectId type
+        if hasattr(models, "list_adapter"):
+            runs["adapter"] = lambda docs: models.list_adapter(model).validate_python(docs)
+        for label, run in runs.items():
+            print(f"{name:<12} {label:<9} {per_document_us(run, documents, repeats):8.2f} us/document")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    main(args.documents, args.repeats)
@@ -0,0 +1,148 @@
+# benchmarks/bench_project_search.py
+#
+# Build time, memory and query latency percentiles of the in-process project
+# search index over synthetic projects. With --mongo the same queries are also
+# run against the `project_search_text` text index (the synthetic projects
+# are inserted into MONGODB_URL first and removed afterwards).
+#
+# Run from decentralized_funding_backend/:
+#   python -m benchmarks.bench_project_search --projects 1000000 --queries 2000
+#   python -m benchmarks.bench_project_search --projects 100000 --mongo
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+import uuid
+
+from app.core.search_index import ProjectSearchIndex
+
+WORDS = [
+    "solar", "water", "school", "library", "clinic", "garden", "bridge", "farm",
+    "community", "youth", "robotics", "coding", "music", "theatre", "recycling",
+    "wind", "clean", "rural", "urban", "health", "science", "reading", "sports",
+    "women", "startup", "research", "ocean", "forest", "housing", "kitchen",
+] + [f"term{i}" for i in range(5000)]
+CATEGORIES = ["education", "health", "environment", "technology", "arts", "community"]
+STATUSES = ["pending", "active", "cancelled"]
+
+
+def percentile(samples, p):
+    index = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+    return samples[index] * 1000
+
+
+def synthetic_projects(total, run_id, rng):
+    for n in range(total):
+        yield {
+            "_id": f"{run_id}-{n}",
+            "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))),
+            "category": rng.choice(CATEGORIES),
+            "status": rng.choice(STATUSES),
+            "tags": rng.sample(WORDS[:30], 2),
+        }
+
+
+def queries(total, rng):
+    # Search-as-you-type: full words followed by a partial last word
+    result = []
+    for _ in range(total):
+        words = [rng.choice(WORDS[:30]) for _ in range(rng.randint(1, 3))]
+        words[-1] = words[-1][:rng.randint(1, len(words[-1]))]
+        result.append(" ".join(words))
+    return result
+
+
+def report(label, latencies):
+    latencies.sort()
+    print(
+        f"{label:<24} p50 {percentile(latencies, 0.50):8.3f} ms"
+        f"  p95 {percentile(latencies, 0.95):8.3f} ms"
+        f"  p99 {percentile(latencies, 0.99):8.3f} ms"
+    )
+
+
+def bench_memory(projects, query_strings, limit, trace_memory):
+    index = ProjectSearchIndex()
+    # tracemalloc slows the build down a lot, so memory is only measured on request
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    index.bulk_load(projects)
+    build_seconds = time.perf_counter() - started
+    print(f"Indexed {len(index)} projects, {index.stats()['terms']} terms in {build_seconds:.2f}s")
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Peak memory during build: {peak / 2**20:.0f} MiB")
+
+    for label, run in (
+        ("index search", lambda q: index.search(q, limit=limit)),
+        ("index search+category", lambda q: index.search(q, limit=limit, category="education")),
+        ("index autocomplete", lambda q: index.autocomplete(q, limit=limit)),
+    ):
+        latencies = []
+        for query in query_strings:
+            started = time.perf_counter()
+            run(query)
+            latencies.append(time.perf_counter() - started)
+        report(label, latencies)
+
+
+async def bench_mongo(projects, query_strings, limit, run_id):
+    from app.core.database import Database
+    from app.core.indexes import ensure_indexes
+
+    await Database.connect_to_mongo()
+    db = Database.get_db()
+    try:
+        await ensure_indexes(db)
+        batch = []
+        for project in projects:
+            batch.append(project)
+            if len(batch) >= 10000:
+                await db["projects"].insert_many(batch, ordered=False)
+                batch = []
+        if batch:
+            await db["projects"].insert_many(batch, ordered=False)
+
+        latencies = []
+        for query in query_strings:
+            started = time.perf_counter()
+            await db["projects"].aggregate([
+                {"$match": {"$text": {"$search": query}}},
+                {"$addFields": {"score": {"$meta": "textScore"}}},
+                {"$sort": {"score": -1, "_id": -1}},
+                {"$limit": limit},
+                {"$project": {"title": 1, "score": 1}},
+            ]).to_list(length=limit)
+            latencies.append(time.perf_counter() - started)
+        report("mongo $text", latencies)
+    finally:
+        await db["projects"].delete_many({"_id": {"$regex": f"^{run_id}-"}})
+        await Database.close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mongo", action="store_true")
+    parser.add_argument("--trace-memory", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    run_id = f"bench-search-{uuid.uuid4().hex[:8]}"
+    projects = list(synthetic_projects(args.projects, run_id, rng))
+    query_strings = queries(args.queries, rng)
+
+    bench_memory(projects, query_strings, args.limit, args.trace_memory)
+    if args.mongo:
+        asyncio.run(bench_mongo(projects, query_strings, args.limit, run_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_register.py
+#
+# Latency percentiles of POST /api/auth/register under concurrent sign-ups.
+# Funding jobs are only enqueued here (the job workers are not started), so the
+# numbers reflect what a client waits for.
+#
+# Needs a reachable MongoDB (MONGODB_URL). Run from decentralized_funding_backend/:
+#   python -m benchmarks.bench_register --users 500 --concurrency 50
+#
+# Before/after moving Friendbot off the request (987c0bf^ -> 987c0bf). 200
+# sign-ups, 50 concurrent, on 1 CPU. Measured against an in-memory Motor
+# stand-in that adds 1 ms per database command (no mongod was available).
+# Friendbot was stubbed to answer after 5 s, about one ledger close:
+#
+#   bcrypt              sign-ups/s     p50 ms          p95 ms          p99 ms
+#   default rounds      2.4 -> 2.9     19664 -> 16432  21027 -> 17637  24058 -> 18960
+#   4 rounds            8.6 -> 290.8   5151 -> 141     7115 -> 188     7465 -> 201
+#
+# With default rounds, bcrypt on the event loop dominates both runs (it moves
+# to a thread pool later in the series). The 4-round row isolates what this
+# change removes: the wait on Friendbot.
+
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from app.core.database import Database
+from app.main import app
+
+EMAIL_DOMAIN = "bench-register.example.com"
+
+
+def percentile(samples, p):
+    index = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+    return samples[index] * 1000
+
+
+async def main(total, concurrency):
+    await Database.connect_to_mongo()
+    db = Database.get_db()
+    run_id = uuid.uuid4().hex[:8]
+    latencies = []
+    remaining = total
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                email = f"{run_id}-{remaining}@{EMAIL_DOMAIN}"
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/auth/register",
+                    json={"email": email, "username": email, "password": "bench-password"},
+                )
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        try:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        finally:
+            bench_users = {"email": {"$regex": f"^{run_id}-.*@{EMAIL_DOMAIN}$"}}
+            user_ids = [str(user["_id"]) async for user in db["users"].find(bench_users, {"_id": 1})]
+            await db["jobs"].delete_many({"type": "fund_account", "payload.user_id": {"$in": user_ids}})
+            await db["users"].delete_many(bench_users)
+            await Database.close_mongo_connection()
+
+    latencies.sort()
+    print(f"sign-ups:     {total} ({concurrency} concurrent), {total / elapsed:.1f}/s")
+    print(f"p50:          {percentile(latencies, 0.50):8.1f} ms")
+    print(f"p95:          {percentile(latencies, 0.95):8.1f} ms")
+    print(f"p99:          {percentile(latencies, 0.99):8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.concurrency))
@@ -0,0 +1,92 @@
+# tests/conftest.py
+#
+# Run from decentralized_funding_backend/:
+#   pip install -r requirements-dev.txt
+#   python -m pytest
+#
+# Async tests use the anyio pytest plugin (anyio is already a FastAPI
+# dependency) with `pytestmark = pytest.mark.anyio`. Nothing needs a running
+# MongoDB or Horizon.
+
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.core.database import Database
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeCollection:
+    """
+    Just enough of a Motor collection for unit tests: find_one/update_one
+    match on equality (plus $in), inserts keep the documents, and every call
+    is kept in `calls` as (method, args, kwargs).
+    """
+
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+        self.calls = []
+
+    def calls_to(self, method):
+        return [(args, kwargs) for name, args, kwargs in self.calls if name == method]
+
+    @staticmethod
+    def matches(doc, query):
+        for field, condition in query.items():
+            if isinstance(condition, dict) and "$in" in condition:
+                if doc.get(field) not in condition["$in"]:
+                    return False
+            elif doc.get(field) != condition:
+                return False
+        return True
+
+    async def find_one(self, query=None, *args, **kwargs):
+        self.calls.append(("find_one", (query, *args), kwargs))
+        return next((dict(doc) for doc in self.docs if self.matches(doc, query or {})), None)
+
+    async def insert_one(self, doc, *args, **kwargs):
+        self.calls.append(("insert_one", (doc, *args), kwargs))
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(doc)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs, *args, **kwargs):
+        self.calls.append(("insert_many", (docs, *args), kwargs))
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+        self.docs.extend(docs)
+        return SimpleNamespace(inserted_ids=[doc["_id"] for doc in docs])
+
+    async def update_one(self, query, update, *args, **kwargs):
+        """Supports $set only."""
+        self.calls.append(("update_one", (query, update, *args), kwargs))
+        doc = next((doc for doc in self.docs if self.matches(doc, query)), None)
+        if doc is not None:
+            doc.update(update.get("$set", {}))
+        return SimpleNamespace(matched_count=int(doc is not None), modified_count=int(doc is not None))
+
+    async def bulk_write(self, requests, *args, **kwargs):
+        self.calls.append(("bulk_write", (requests, *args), kwargs))
+        return SimpleNamespace()
+
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """A FakeDB returned by Database.get_db() for the duration of the test."""
+    db = FakeDB()
+    monkeypatch.setattr(Database, "get_db", staticmethod(lambda: db))
+    return db
@@ -0,0 +1,42 @@
+# tests/test_account_funding.py
+
+import json
+
+import httpx
+import pytest
+from stellar_sdk import Keypair
+
+from app.stellar_utils.account_management import fund_testnet_account as friendbot
+from app.stellar_utils.horizon import Horizon
+
+pytestmark = pytest.mark.anyio
+
+EXISTING = Keypair.random().public_key
+MISSING = Keypair.random().public_key
+
+
+def horizon_handler(request):
+    if request.url.path == f"/accounts/{EXISTING}":
+        body = {"id": EXISTING, "account_id": EXISTING, "sequence": "1",
+                "balances": [{"asset_type": "native", "balance": "10000.0000000"}]}
+        return httpx.Response(200, content=json.dumps(body), headers={"content-type": "application/json"})
+    return httpx.Response(404, json={"status": 404, "title": "Resource Missing"})
+
+
+@pytest.fixture
+async def already_funded(monkeypatch):
+    """Friendbot answers every request with its 'account already funded' 400."""
+    await Horizon.connect(transport=httpx.MockTransport(horizon_handler))
+    real_client = httpx.AsyncClient
+    transport = httpx.MockTransport(lambda request: httpx.Response(400, json={"detail": "createAccountAlreadyExist"}))
+    monkeypatch.setattr(friendbot.httpx, "AsyncClient", lambda **kwargs: real_client(transport=transport, **kwargs))
+    yield
+    await Horizon.close()
+
+
+async def test_retry_after_a_lost_reply_counts_as_funded(already_funded):
+    assert await friendbot.fund_testnet_account(EXISTING) is True
+
+
+async def test_rejection_for_an_account_that_does_not_exist_is_a_failure(already_funded):
+    assert await friendbot.fund_testnet_account(MISSING) is False
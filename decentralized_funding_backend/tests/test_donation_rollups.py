@@ -0,0 +1,86 @@
+# tests/test_donation_rollups.py
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.core import donation_rollups
+from app.core.donation_rollups import (
+    DAILY_COLLECTION, HOURLY_COLLECTION, merged_rollup_pipeline, record_donations, split_range,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def test_split_range_uses_days_hours_and_raw_edges():
+    raw, hourly, daily = split_range(datetime(2025, 1, 1, 22, 30), datetime(2025, 1, 4, 1, 15))
+    assert raw == [
+        (datetime(2025, 1, 1, 22, 30), datetime(2025, 1, 1, 23), False),
+        (datetime(2025, 1, 4, 1), datetime(2025, 1, 4, 1, 15), True),
+    ]
+    assert hourly == [(datetime(2025, 1, 1, 23), datetime(2025, 1, 2)), (datetime(2025, 1, 4), datetime(2025, 1, 4, 1))]
+    assert daily == [(datetime(2025, 1, 2), datetime(2025, 1, 4))]
+
+
+def test_split_range_within_one_hour_is_raw_only():
+    start, end = datetime(2025, 1, 1, 10, 5), datetime(2025, 1, 1, 10, 55)
+    assert split_range(start, end) == ([(start, end, True)], [], [])
+
+
+def test_open_ended_range_does_not_count_the_first_full_hour_twice():
+    raw, hourly, daily = split_range(datetime(2025, 1, 1, 10, 30), None)
+    # The first hour bucket starts at 11:00, so the raw edge must stop short of it
+    assert raw == [(datetime(2025, 1, 1, 10, 30), datetime(2025, 1, 1, 11), False)]
+    assert hourly == [(datetime(2025, 1, 1, 11), datetime(2025, 1, 2))]
+    assert daily == [(datetime(2025, 1, 2), None)]
+    _, stages = merged_rollup_pipeline(datetime(2025, 1, 1, 10, 30), None)
+    raw_match = next(
+        stage["$unionWith"]["pipeline"][0]["$match"] for stage in stages
+        if stage.get("$unionWith", {}).get("coll") == "transactions"
+    )
+    assert raw_match["$or"] == [{"created_at": {"$gte": datetime(2025, 1, 1, 10, 30), "$lt": datetime(2025, 1, 1, 11)}}]
+
+
+def test_merged_pipeline_reads_only_the_sources_it_needs():
+    collection, stages = merged_rollup_pipeline(datetime(2025, 1, 1), datetime(2025, 1, 10))
+    assert collection == DAILY_COLLECTION
+    unions = [stage["$unionWith"]["coll"] for stage in stages if "$unionWith" in stage]
+    # Aligned to whole days: the raw edge is the inclusive end instant only
+    assert unions == ["transactions"]
+
+
+async def test_donations_sharing_a_bucket_are_combined(fake_db):
+    donor, project = ObjectId(), ObjectId()
+    at = datetime(2025, 1, 1, 10, 15)
+    await record_donations([
+        {"amount": 5.0, "donor_id": donor, "project_id": project, "created_at": at, "status": "confirmed"},
+        {"amount": 2.0, "donor_id": donor, "project_id": project, "created_at": at + timedelta(minutes=30), "status": "confirmed"},
+        {"amount": 1.0, "donor_id": donor, "project_id": project, "created_at": at + timedelta(hours=1), "status": "confirmed"},
+        # Not counted until the ledger confirms it, like in the project's totals
+        {"amount": 9.0, "donor_id": donor, "project_id": project, "created_at": at, "status": "pending"},
+        {"amount": 9.0, "donor_id": donor, "project_id": project, "created_at": at, "status": "failed"},
+    ])
+    hourly = [request for (requests, *_), _ in fake_db[HOURLY_COLLECTION].calls_to("bulk_write") for request in requests]
+    daily = [request for (requests, *_), _ in fake_db[DAILY_COLLECTION].calls_to("bulk_write") for request in requests]
+    assert len(hourly) == 2 and len(daily) == 1
+    first_hour = next(request for request in hourly if request._filter["bucket"] == datetime(2025, 1, 1, 10))
+    assert first_hour._doc["$inc"] == {"total_amount": 7.0, "count": 2}
+    assert first_hour._doc["$min"] == {"min_amount": 2.0} and first_hour._doc["$max"] == {"max_amount": 5.0}
+    assert daily[0]._filter == {"bucket": datetime(2025, 1, 1), "donor_id": donor, "project_id": project, "asset_type": "XLM"}
+    assert daily[0]._doc["$inc"] == {"total_amount": 8.0, "count": 3}
+    assert daily[0]._upsert
+
+
+
+async def test_repair_waits_until_the_day_is_over(monkeypatch):
+    backfilled = []
+
+    async def backfill(db, start, end):
+        backfilled.append((start, end))
+
+    monkeypatch.setattr(donation_rollups, "backfill", backfill)
+    assert await donation_rollups.rebuild_days_of([{"created_at": datetime.utcnow()}]) is False
+    assert backfilled == []
+    assert await donation_rollups.rebuild_days_of([{"created_at": datetime(2025, 1, 1, 23, 59)}]) is True
+    assert backfilled == [(datetime(2025, 1, 1), datetime(2025, 1, 2))]
@@ -0,0 +1,49 @@
+# tests/test_donation_routes.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import transaction_log
+from app.main import app
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    docs = []
+
+    async def add(doc):
+        docs.append(doc)
+
+    monkeypatch.setattr(transaction_log.transaction_writer, "add", add)
+    return docs
+
+
+def test_create_donation_returns_the_stored_pending_donation(recorded):
+    # No `with`: the app's startup (Mongo, Horizon, workers) is not needed here
+    client = TestClient(app)
+    response = client.post("/api/donations/", json={
+        "amount": 5,
+        "transaction_hash": "0x" + "ab" * 32,
+        "project_id": "507f1f77bcf86cd799439011",
+        "donor_id": "507f1f77bcf86cd799439012",
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["_id"] == str(recorded[0]["_id"])
+    assert body["status"] == "pending" and body["type"] == "donation"
+    assert body["project_id"] == "507f1f77bcf86cd799439011"
+    assert recorded[0]["status"] == "pending"
+    # Stored the way Horizon spells it, whatever the client sent
+    assert recorded[0]["transaction_hash"] == "ab" * 32
+
+
+def test_create_donation_rejects_bad_ids(recorded):
+    client = TestClient(app)
+    response = client.post("/api/donations/", json={
+        "amount": 5,
+        "transaction_hash": "0x" + "ab" * 32,
+        "project_id": "not-an-id",
+        "donor_id": "507f1f77bcf86cd799439012",
+    })
+    assert response.status_code == 400
+    assert recorded == []
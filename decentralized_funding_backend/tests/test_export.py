@@ -0,0 +1,79 @@
+# tests/test_export.py
+
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.core import export
+from app.core.export import stream_export
+
+pytestmark = pytest.mark.anyio
+
+
+def matches(doc, query):
+    for field, condition in query.items():
+        if field == "$and":
+            if not all(matches(doc, part) for part in condition):
+                return False
+        elif field == "$or":
+            if not any(matches(doc, part) for part in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(field)
+            for op, bound in condition.items():
+                if op == "$ne" and value == bound:
+                    return False
+                if op == "$gt" and (value is None or not value > bound):
+                    return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+
+class SortedFind:
+    def __init__(self, docs, query, calls):
+        self.docs, self.query, self.calls = docs, query, calls
+
+    def sort(self, keys):
+        self.keys = keys
+        return self
+
+    def limit(self, limit):
+        self.limit_to = limit
+        return self
+
+    async def to_list(self, length=None):
+        self.calls.append(self.query)
+        found = [doc for doc in self.docs if matches(doc, self.query)]
+        # Missing created_at sorts first, as in Mongo
+        found.sort(key=lambda doc: tuple((doc.get(field) is not None, doc.get(field) or 0) for field, _ in self.keys))
+        return found[:self.limit_to]
+
+
+class ExportCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def find(self, query, projection):
+        return SortedFind(self.docs, query, self.calls)
+
+
+async def test_export_pages_through_ties_without_losing_or_repeating_rows(monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    day = datetime(2025, 1, 1)
+    ids = sorted(ObjectId() for _ in range(5))
+    docs = [
+        {"_id": ids[4], "type": "donation"},  # predates created_at
+        {"_id": ids[2], "type": "donation", "created_at": day},
+        {"_id": ids[0], "type": "donation", "created_at": day},
+        {"_id": ids[1], "type": "donation", "created_at": day},
+        {"_id": ids[3], "type": "donation", "created_at": datetime(2025, 1, 2)},
+    ]
+    collection = ExportCollection(docs)
+    chunks = [chunk async for chunk in stream_export({"transactions": collection}, "transactions", {}, "ndjson")]
+    exported = [json.loads(line)["_id"] for chunk in chunks for line in chunk.splitlines()]
+    assert exported == [str(ids[4]), str(ids[0]), str(ids[1]), str(ids[2]), str(ids[3])]
+    assert len(collection.calls) == 3
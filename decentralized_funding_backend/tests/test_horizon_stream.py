@@ -0,0 +1,71 @@
+# tests/test_horizon_stream.py
+
+import httpx
+import pytest
+from stellar_sdk.exceptions import StreamClientError
+
+from app.stellar_utils import horizon
+from app.stellar_utils.horizon import HttpxClient
+
+pytestmark = pytest.mark.anyio
+
+URL = "https://horizon.example/ledgers"
+
+
+class Stop(Exception):
+    pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records reconnect delays instead of sleeping; gives up after eight."""
+    delays = []
+    real_sleep = horizon.asyncio.sleep
+
+    async def sleep(delay):
+        if delay == 0:  # asyncio.sleep is patched for everyone; let the rest of the loop yield
+            return await real_sleep(0)
+        delays.append(delay)
+        if len(delays) == 8:
+            raise Stop
+
+    monkeypatch.setattr(horizon.asyncio, "sleep", sleep)
+    return delays
+
+
+async def drain(client):
+    return [event async for event in client.stream(URL)]
+
+
+async def test_reconnects_back_off_up_to_the_cap(sleeps, monkeypatch):
+    monkeypatch.setattr(horizon, "HORIZON_STREAM_MAX_RETRY_SECONDS", 1.0)
+    client = HttpxClient(transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+    with pytest.raises(Stop):
+        await drain(client)
+    await client.close()
+    assert sleeps == [0.1, 0.2, 0.4, 0.8, 1.0, 1.0, 1.0, 1.0]
+
+
+async def test_an_event_resets_the_backoff(sleeps):
+    responses = iter([httpx.Response(503), httpx.Response(503)])
+
+    def handler(request):
+        return next(responses, httpx.Response(200, text='id: 7\ndata: {"sequence": 7}\n\n'))
+
+    client = HttpxClient(transport=httpx.MockTransport(handler))
+    events = []
+    with pytest.raises(Stop):
+        async for event in client.stream(URL):
+            events.append(event)
+    await client.close()
+    assert events[0] == {"sequence": 7}
+    assert sleeps[:4] == [0.1, 0.2, 0.1, 0.1]
+
+
+@pytest.mark.parametrize("status_code", [400, 404])
+async def test_client_errors_stop_the_stream(sleeps, status_code):
+    client = HttpxClient(transport=httpx.MockTransport(lambda request: httpx.Response(status_code)))
+    with pytest.raises(StreamClientError):
+        await drain(client)
+    await client.close()
+    assert sleeps == []
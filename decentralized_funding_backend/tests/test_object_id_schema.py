@@ -0,0 +1,62 @@
+# tests/test_object_id_schema.py
+
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pydantic import ValidationError
+
+from app.models.models import Donation, MongoBaseModel, Project, PyObjectId, list_adapter, validate_many
+
+
+class Ref(MongoBaseModel):
+    ref: PyObjectId
+
+
+def test_object_ids_pass_through_and_hex_strings_are_converted():
+    oid = ObjectId()
+    assert Ref(ref=oid).ref is oid
+    converted = Ref(ref=str(oid)).ref
+    assert isinstance(converted, ObjectId) and converted == oid
+    assert Ref.model_validate_json(f'{{"ref": "{oid}"}}').ref == oid
+
+
+@pytest.mark.parametrize("value", ["not-an-id", "0" * 23, "g" * 24, 42, None])
+def test_anything_else_is_rejected(value):
+    with pytest.raises(ValidationError):
+        Ref(ref=value)
+
+
+def test_json_dumps_hex_and_python_dumps_keep_the_object_id():
+    oid = ObjectId()
+    ref = Ref(ref=oid)
+    assert ref.model_dump()["ref"] is oid
+    assert ref.model_dump(mode="json")["ref"] == str(oid)
+    assert ref.model_dump_json() == f'{{"ref":"{oid}"}}'
+
+
+def test_json_schema_is_a_hex_string():
+    schema = Ref.model_json_schema()["properties"]["ref"]
+    assert schema["type"] == "string" and schema["pattern"] == "^[0-9a-fA-F]{24}$"
+
+
+def project_doc(**fields):
+    return {
+        "_id": ObjectId(), "creator_id": ObjectId(), "title": "t", "description": "d", "objectives": "o",
+        "deliverables": "d", "category": "science", "target_amount": 100.0, "deadline": datetime(2026, 1, 1),
+        **fields,
+    }
+
+
+def test_validate_many_validates_raw_documents_in_one_call():
+    docs = [project_doc(), project_doc(donors=[ObjectId()])]
+    projects = validate_many(Project, docs)
+    assert [project.id for project in projects] == [doc["_id"] for doc in docs]
+    assert projects[1].donors == docs[1]["donors"]
+    with pytest.raises(ValidationError):
+        validate_many(Project, [project_doc(creator_id="nope")])
+
+
+def test_list_adapters_are_built_once_per_model():
+    assert list_adapter(Project) is list_adapter(Project)
+    assert list_adapter(Project) is not list_adapter(Donation)
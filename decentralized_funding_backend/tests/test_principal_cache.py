@@ -0,0 +1,87 @@
+# tests/test_principal_cache.py
+
+import pytest
+from bson import ObjectId
+
+from app.core import auth, cache
+from app.core.cache import TTLCache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    removed = []
+    principals = TTLCache(maxsize=10, ttl=30, on_remove=lambda key, value, age: removed.append((key, age)))
+    principals.set("a@example.com", "principal")
+    clock[0] += 29
+    assert principals.get("a@example.com") == "principal"
+    clock[0] += 1
+    assert principals.get("a@example.com") is None
+    assert removed == [("a@example.com", 30)]
+    assert principals.stats()["hits"] == 1 and principals.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    principals = TTLCache(maxsize=2, ttl=30)
+    principals.set("a", 1)
+    principals.set("b", 2)
+    principals.get("a")
+    principals.set("c", 3)
+    assert "b" not in principals
+    assert principals.get("a") == 1 and principals.get("c") == 3
+    assert principals.evictions == 1
+
+
+def test_purge_expired(clock):
+    principals = TTLCache(maxsize=10, ttl=30)
+    principals.set("a", 1)
+    clock[0] += 10
+    principals.set("b", 2)
+    clock[0] += 25
+    assert principals.purge_expired() == 1
+    assert len(principals) == 1 and "b" in principals
+
+
+@pytest.fixture
+def principals(monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    monkeypatch.setattr(auth, "principal_cache", TTLCache(maxsize=10, ttl=30))
+    monkeypatch.setattr(auth, "token_version_cache", TTLCache(maxsize=10, ttl=30))
+
+
+@pytest.fixture
+def user(fake_db):
+    doc = {
+        "_id": ObjectId(),
+        "email": "student@example.com",
+        "username": "student",
+        "password": "",  # UserBase still requires it, even on stored users
+        "password_hash": "hash",
+        "role": "student",
+    }
+    fake_db["users"].docs.append(doc)
+    return doc
+
+
+async def test_current_user_is_loaded_once_per_ttl(principals, fake_db, user):
+    token = auth.create_access_token({"sub": user["email"]})
+    first = await auth.get_current_user(token)
+    second = await auth.get_current_user(token)
+    assert first.email == second.email == user["email"]
+    assert len(fake_db["users"].calls_to("find_one")) == 1
+
+
+async def test_invalidated_principal_is_reloaded(principals, fake_db, user):
+    token = auth.create_access_token({"sub": user["email"]})
+    await auth.get_current_user(token)
+    fake_db["users"].docs[0]["role"] = "admin"
+    auth.invalidate_principal(user["email"])
+    assert (await auth.get_current_user(token)).role == "admin"
+    assert len(fake_db["users"].calls_to("find_one")) == 2
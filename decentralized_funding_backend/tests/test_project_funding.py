@@ -0,0 +1,214 @@
+# tests/test_project_funding.py
+
+import json
+
+import httpx
+import pytest
+from bson import ObjectId
+
+from app.core import project_funding, transaction_log
+from app.core.jobs import JOBS_COLLECTION
+from app.core.project_funding import CONFIRM_DONATION_JOB, apply_donation, is_confirmed
+from app.schemas.schemas import DonationCreate
+from app.stellar_utils.horizon import Horizon
+from app.stellar_utils.transaction_submision_monitoring import confirm_donation
+
+pytestmark = pytest.mark.anyio
+
+WALLET = "GCREATORWALLET"
+DONOR_WALLET = "GDONORWALLET"
+DONOR_ID = ObjectId()
+PAID_HASH = "ab" * 32
+UNKNOWN_HASH = "cd" * 32
+
+
+@pytest.mark.parametrize("status, confirmed", [
+    (None, False), ("pending", False), ("failed", False),
+    ("confirmed", True), ("completed", True), ("successful", True),
+])
+def test_only_confirmed_statuses_count(status, confirmed):
+    transaction = {"amount": 1.0} if status is None else {"amount": 1.0, "status": status}
+    assert is_confirmed(transaction) is confirmed
+
+
+async def test_pending_donation_does_not_touch_the_project(fake_db):
+    assert await apply_donation({"amount": 5.0, "project_id": ObjectId(), "status": "pending"}) is None
+    assert fake_db["projects"].calls == []
+
+
+@pytest.fixture
+def project_updates(fake_db):
+    updates = []
+
+    async def find_one_and_update(query, update, **kwargs):
+        updates.append((query, update))
+        return {"_id": query["_id"], "funding_ratio": 0.5}
+
+    fake_db["projects"].find_one_and_update = find_one_and_update
+    return updates
+
+
+def stored_donation(fake_db, **fields):
+    doc = {"_id": ObjectId(), "type": "donation", "amount": 5.0, "project_id": ObjectId(),
+           "donor_id": ObjectId(), "status": "confirmed", "transaction_hash": PAID_HASH, **fields}
+    fake_db["transactions"].docs.append(doc)
+    return doc
+
+
+async def test_confirmed_donation_is_one_atomic_update(fake_db, project_updates):
+    doc = stored_donation(fake_db)
+    await apply_donation(dict(doc))
+    (query, pipeline), = project_updates
+    assert query == {"_id": doc["project_id"]}
+    totals = pipeline[0]["$set"]
+    assert totals["donors"] == {"$setUnion": [{"$ifNull": ["$donors", []]}, [doc["donor_id"]]]}
+    assert "funding_ratio" in pipeline[1]["$set"]
+    assert doc["applied_at"] is not None
+
+
+async def test_a_transaction_hash_is_applied_once(fake_db, project_updates):
+    doc = stored_donation(fake_db)
+    assert await apply_donation(dict(doc)) is not None
+    assert await apply_donation(dict(doc)) is None
+    assert len(project_updates) == 1
+
+
+async def test_failed_project_update_gives_the_claim_back(fake_db):
+    async def find_one_and_update(query, update, **kwargs):
+        raise RuntimeError("not primary")
+
+    fake_db["projects"].find_one_and_update = find_one_and_update
+    doc = stored_donation(fake_db)
+    with pytest.raises(RuntimeError):
+        await apply_donation(dict(doc))
+    assert doc["applied_at"] is None
+
+
+async def test_insert_applies_confirmed_and_queues_pending_donations(fake_db, monkeypatch):
+    applied = []
+
+    async def apply(donations):
+        applied.extend(donations)
+
+    monkeypatch.setattr(transaction_log, "apply_confirmed_donations", apply)
+    confirmed = {"_id": ObjectId(), "type": "donation", "amount": 1.0, "status": "confirmed"}
+    pending = {"_id": ObjectId(), "type": "donation", "amount": 2.0, "status": "pending"}
+    unchecked = {"_id": ObjectId(), "type": "donation", "amount": 3.0}
+    await transaction_log._after_insert([confirmed, pending, unchecked])
+    assert applied == [confirmed]
+    jobs = fake_db[JOBS_COLLECTION].docs
+    assert [job["type"] for job in jobs] == [CONFIRM_DONATION_JOB] * 2
+    assert [job["payload"]["transaction_id"] for job in jobs] == [str(pending["_id"]), str(unchecked["_id"])]
+    assert jobs[0]["max_attempts"] == project_funding.DONATION_CONFIRM_MAX_ATTEMPTS
+
+
+def horizon_handler(request):
+    path = request.url.path
+    if path == f"/transactions/{PAID_HASH}":
+        body = {"hash": PAID_HASH, "ledger": 42, "successful": True}
+    elif path == f"/transactions/{PAID_HASH}/payments":
+        body = {"_embedded": {"records": [
+            {"type": "payment", "from": DONOR_WALLET, "to": WALLET, "asset_type": "native", "amount": "10.0000000"},
+            {"type": "payment", "from": DONOR_WALLET, "to": WALLET, "asset_type": "credit_alphanum4",
+             "asset_code": "USDC", "asset_issuer": "GFAKEISSUER", "amount": "10.0000000"},
+        ]}}
+    else:
+        return httpx.Response(404, json={"status": 404, "title": "Resource Missing"})
+    return httpx.Response(200, content=json.dumps(body), headers={"content-type": "application/json"})
+
+
+@pytest.fixture
+async def ledger(fake_db, monkeypatch):
+    """A project whose creator's wallet received 10 XLM (and 10 fake USDC) from the donor in PAID_HASH."""
+    applied = []
+
+    async def apply(donations):
+        applied.extend(donations)
+
+    monkeypatch.setattr(confirm_donation, "after_confirmation", apply)
+    creator_id, project_id = ObjectId(), ObjectId()
+    fake_db["users"].docs.append({"_id": creator_id, "stellar_public_key": WALLET})
+    fake_db["users"].docs.append({"_id": DONOR_ID, "stellar_public_key": DONOR_WALLET})
+    fake_db["projects"].docs.append({"_id": project_id, "creator_id": creator_id})
+    await Horizon.connect(transport=httpx.MockTransport(horizon_handler))
+    yield project_id, applied
+    await Horizon.close()
+
+
+def donation(project_id, amount, transaction_hash=PAID_HASH, **fields):
+    return {
+        "_id": ObjectId(), "type": "donation", "status": "pending", "amount": amount, "donor_id": DONOR_ID,
+        "project_id": project_id, "transaction_hash": transaction_hash, "asset_type": "XLM", **fields,
+    }
+
+
+async def confirm(doc):
+    await confirm_donation.handle_confirm_donation({"transaction_id": str(doc["_id"])})
+
+
+async def test_paid_donation_is_confirmed_and_applied_once(fake_db, ledger):
+    project_id, applied = ledger
+    doc = donation(project_id, 10.0)
+    fake_db["transactions"].docs.append(doc)
+    await confirm(doc)
+    await confirm(doc)
+    assert doc["status"] == "confirmed" and doc["block_height"] == 42
+    assert [applied_doc["_id"] for applied_doc in applied] == [doc["_id"]]
+
+
+async def test_donation_without_a_status_is_checked_too(fake_db, ledger):
+    project_id, applied = ledger
+    doc = donation(project_id, 1.0)
+    del doc["status"]
+    fake_db["transactions"].docs.append(doc)
+    await confirm(doc)
+    assert doc["status"] == "confirmed" and len(applied) == 1
+
+
+async def test_donation_claiming_more_than_was_paid_fails(fake_db, ledger):
+    project_id, applied = ledger
+    doc = donation(project_id, 50.0)
+    fake_db["transactions"].docs.append(doc)
+    await confirm(doc)
+    assert doc["status"] == "failed"
+    assert applied == []
+
+
+async def test_unknown_transaction_is_retried_then_failed(fake_db, ledger):
+    project_id, applied = ledger
+    doc = donation(project_id, 1.0, transaction_hash=UNKNOWN_HASH)
+    fake_db["transactions"].docs.append(doc)
+    with pytest.raises(RuntimeError):
+        await confirm(doc)
+    assert doc["status"] == "pending"
+    await confirm_donation.handle_confirm_donation_failure({"transaction_id": str(doc["_id"])})
+    assert doc["status"] == "failed" and applied == []
+
+
+async def test_someone_elses_payment_cannot_be_claimed(fake_db, ledger):
+    project_id, applied = ledger
+    other_donor = ObjectId()
+    fake_db["users"].docs.append({"_id": other_donor, "stellar_public_key": "GSOMEONEELSE"})
+    doc = donation(project_id, 1.0, donor_id=other_donor)
+    fake_db["transactions"].docs.append(doc)
+    await confirm(doc)
+    assert doc["status"] == "failed" and applied == []
+
+
+async def test_asset_from_an_unlisted_issuer_does_not_count(fake_db, ledger, monkeypatch):
+    project_id, applied = ledger
+    doc = donation(project_id, 1.0, asset_type="USDC")
+    fake_db["transactions"].docs.append(doc)
+    await confirm(doc)
+    assert doc["status"] == "failed"
+    monkeypatch.setattr(confirm_donation, "DONATION_ASSET_ISSUERS", {"USDC": "GFAKEISSUER"})
+    doc = donation(project_id, 1.0, asset_type="USDC")
+    fake_db["transactions"].docs.append(doc)
+    await confirm(doc)
+    assert doc["status"] == "confirmed" and len(applied) == 1
+
+
+@pytest.mark.parametrize("spelling", [PAID_HASH, PAID_HASH.upper(), f"0x{PAID_HASH}", f"0x{PAID_HASH.upper()}"])
+def test_every_spelling_of_a_hash_is_stored_the_same(spelling):
+    posted = DonationCreate(amount=1, transaction_hash=spelling, project_id="p", donor_id="d")
+    assert posted.transaction_hash == PAID_HASH
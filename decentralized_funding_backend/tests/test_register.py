@@ -0,0 +1,59 @@
+# tests/test_register.py
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes import auth as auth_routes
+from app.stellar_utils.account_management.keypair_pool import keypair_pool
+
+NEW_USER = {"email": "new@example.com", "username": "new", "password": "correct horse battery"}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Claims and releases against a one-keypair pool; returns the release log."""
+    claimed, released = [], []
+
+    async def claim(db):
+        keypair = {"stellar_public_key": "GPOOLED", "stellar_secret_key_encrypted": "encrypted", "funded": True}
+        claimed.append(keypair)
+        return keypair
+
+    async def release(keypair, db=None):
+        released.append(keypair)
+
+    monkeypatch.setattr(auth_routes, "KEYPAIR_POOL_ENABLED", True)
+    monkeypatch.setattr(keypair_pool, "claim", claim)
+    monkeypatch.setattr(keypair_pool, "release", release)
+    return claimed, released
+
+
+def test_busy_hashing_pool_claims_nothing(fake_db, pool, monkeypatch):
+    async def get_password_hash(password):
+        raise HTTPException(status_code=503, detail="Too many concurrent password operations")
+
+    monkeypatch.setattr(auth_routes, "get_password_hash", get_password_hash)
+    response = TestClient(app).post("/api/auth/register", json=NEW_USER)
+    assert response.status_code == 503
+    assert pool == ([], [])
+
+
+@pytest.mark.parametrize("error, status_code", [
+    (HTTPException(status_code=400, detail="Email already registered"), 400),
+    (RuntimeError("not primary"), 500),
+])
+def test_failed_insert_hands_the_keypair_back(fake_db, pool, monkeypatch, error, status_code):
+    async def get_password_hash(password):
+        return "hashed"
+
+    async def insert_document(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(auth_routes, "get_password_hash", get_password_hash)
+    monkeypatch.setattr(auth_routes, "insert_document", insert_document)
+    response = TestClient(app).post("/api/auth/register", json=NEW_USER)
+    assert response.status_code == status_code
+    claimed, released = pool
+    assert released == claimed and len(claimed) == 1
@@ -0,0 +1,132 @@
+# tests/test_repairs.py
+
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.core import repairs, transaction_log
+from app.core.repairs import REPAIRS_COLLECTION
+from app.core.transaction_events import EVENTS_COLLECTION
+from tests.conftest import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+
+class RepairsCollection(FakeCollection):
+    """Adds the claim and delete calls repair_failed_steps makes."""
+
+    async def find_one_and_update(self, query, update, **kwargs):
+        now = datetime.utcnow()
+        for doc in sorted(self.docs, key=lambda doc: doc["failed_at"]):
+            if doc["step"] in query["step"]["$in"] and (doc["locked_until"] is None or doc["locked_until"] < now):
+                doc.update(update["$set"])
+                return dict(doc)
+        return None
+
+    async def delete_one(self, query):
+        self.docs = [doc for doc in self.docs if doc["_id"] != query["_id"]]
+
+    async def update_one(self, query, update, *args, **kwargs):
+        for doc in self.docs:
+            if doc["_id"] == query["_id"]:
+                doc["attempts"] += update["$inc"]["attempts"]
+                doc.update(update["$set"])
+
+
+class TransactionsCollection(FakeCollection):
+    def find(self, query):
+        wanted = query["_id"]["$in"]
+        rows = [doc for doc in self.docs if doc["_id"] in wanted]
+
+        class Cursor:
+            async def to_list(self, length=None):
+                return rows
+
+        return Cursor()
+
+
+@pytest.fixture
+def repair_log(fake_db, monkeypatch):
+    fake_db[REPAIRS_COLLECTION] = RepairsCollection()
+    fake_db["transactions"] = TransactionsCollection()
+    monkeypatch.setattr(repairs, "_repairers", {})
+    return fake_db[REPAIRS_COLLECTION]
+
+
+async def test_a_failing_step_does_not_skip_the_others(repair_log, monkeypatch):
+    ran = []
+
+    def step(name, fails=False):
+        async def run(transactions):
+            ran.append(name)
+            if fails:
+                raise RuntimeError(f"{name} is down")
+        return run
+
+    monkeypatch.setattr(transaction_log, "record_donations", step("rollups", fails=True))
+    monkeypatch.setattr(transaction_log, "apply_confirmed_donations", step("funding", fails=True))
+    monkeypatch.setattr(transaction_log, "record_events", step("events"))
+    confirmed = {"_id": ObjectId(), "type": "donation", "amount": 1.0, "status": "confirmed"}
+    await transaction_log._after_insert([confirmed])
+    assert ran == ["rollups", "funding", "events"]
+    assert sorted(record["step"] for record in repair_log.docs) == sorted([transaction_log.FUNDING_STEP, transaction_log.ROLLUPS_STEP])
+    assert repair_log.docs[0]["transaction_ids"] == [confirmed["_id"]]
+
+
+async def test_recorded_step_is_repaired_and_forgotten(repair_log, fake_db):
+    transaction = {"_id": ObjectId(), "amount": 1.0}
+    fake_db["transactions"].docs.append(transaction)
+    repaired = []
+
+    async def repairer(transactions):
+        repaired.append(transactions)
+
+    async def failing(transactions):
+        raise RuntimeError("down")
+
+    repairs.register("step", repairer)
+    assert await repairs.run_step("step", failing, [transaction]) is False
+    assert await repairs.repair_failed_steps() == 1
+    assert repaired == [[transaction]]
+    assert repair_log.docs == []
+
+
+async def test_repair_that_is_not_due_waits_for_a_later_pass(repair_log):
+    attempts = []
+
+    async def not_yet(transactions):
+        attempts.append(len(transactions))
+        return False
+
+    repairs.register("step", not_yet)
+    await repairs.record_failure("step", [{"_id": ObjectId()}], RuntimeError("down"))
+    assert await repairs.repair_failed_steps() == 0
+    # Still locked from the first pass
+    assert await repairs.repair_failed_steps() == 0
+    assert attempts == [0] and len(repair_log.docs) == 1
+
+
+async def test_failed_repair_is_kept_with_its_error(repair_log):
+    async def broken(transactions):
+        raise RuntimeError("still down")
+
+    repairs.register("step", broken)
+    await repairs.record_failure("step", [{"_id": ObjectId()}], RuntimeError("down"))
+    assert await repairs.repair_failed_steps() == 0
+    assert repair_log.docs[0]["attempts"] == 1 and repair_log.docs[0]["error"] == "still down"
+
+
+async def test_unconfirmed_transactions_get_no_rollups_or_events(fake_db, monkeypatch):
+    rolled_up = []
+
+    async def record_donations(donations):
+        rolled_up.extend(donations)
+
+    monkeypatch.setattr(transaction_log, "record_donations", record_donations)
+    pending = {"_id": ObjectId(), "type": "donation", "amount": 1.0, "status": "pending"}
+    payment = {"_id": ObjectId(), "type": "payment", "amount": 2.0, "status": "successful", "transaction_hash": "ef" * 32}
+    await transaction_log._after_insert([pending, payment])
+    assert rolled_up == []
+    events = [doc for (docs, *_), _ in fake_db[EVENTS_COLLECTION].calls_to("insert_many") for doc in docs]
+    assert [event["amount"] for event in events] == [2.0]
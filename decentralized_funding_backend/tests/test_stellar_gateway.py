@@ -0,0 +1,130 @@
+# tests/test_stellar_gateway.py
+#
+# No Horizon call made through app/stellar_utils/gateway.py, or the helpers
+# built on it, may block the event loop.
+#
+# Horizon is replaced by an httpx.MockTransport that answers after LATENCY
+# seconds (a slow Horizon), so no network is needed. While CONCURRENCY copies
+# of a call are in flight, a heartbeat task measures how late the loop wakes
+# it up. An awaited call keeps that lag near zero however slow Horizon is; a
+# sync call holds the loop for the whole round trip, which the blocking
+# control checks the heartbeat can see.
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from stellar_sdk import Keypair
+
+from app.stellar_utils import gateway
+from app.stellar_utils.horizon import Horizon
+from app.stellar_utils.account_management.get_account_balances import get_account_balances
+from app.stellar_utils.transaction_operations.transaction_operations import send_stellar_payment
+from app.stellar_utils.transaction_submision_monitoring.check_transaction_status import check_transaction_status
+
+pytestmark = pytest.mark.anyio
+
+LATENCY = 0.2
+MAX_LOOP_LAG = 0.05
+CONCURRENCY = 20
+
+SOURCE = Keypair.random()
+DESTINATION = Keypair.random().public_key
+TRANSACTION_HASH = "ab" * 32
+
+
+def fake_horizon(latency):
+    async def handler(request):
+        await asyncio.sleep(latency)
+        path = request.url.path
+        if path.startswith("/accounts/"):
+            body = {
+                "id": path.rsplit("/", 1)[-1],
+                "account_id": path.rsplit("/", 1)[-1],
+                "sequence": "1",
+                "balances": [{"asset_type": "native", "balance": "100.0000000"}],
+                "data": {},
+            }
+        elif path == "/ledgers":
+            body = {"_embedded": {"records": [{"sequence": 1, "base_fee_in_stroops": 100}]}}
+        elif path == "/fee_stats":
+            body = {"last_ledger": "1", "last_ledger_base_fee": "100"}
+        elif path == "/transactions" and request.method == "POST":
+            body = {"hash": TRANSACTION_HASH, "ledger": 1, "successful": True}
+        elif path == f"/transactions/{TRANSACTION_HASH}/payments":
+            body = {"_embedded": {"records": [
+                {"type": "payment", "to": DESTINATION, "asset_type": "native", "amount": "1.0000000"}
+            ]}}
+        elif path.startswith("/transactions/"):
+            body = {"hash": TRANSACTION_HASH, "ledger": 1, "successful": True}
+        else:
+            return httpx.Response(404, json={"status": 404, "title": "Resource Missing"})
+        return httpx.Response(200, content=json.dumps(body), headers={"content-type": "application/json"})
+
+    return httpx.MockTransport(handler)
+
+
+def blocking_call(latency):
+    # What a sync stellar_sdk Server call does to the loop
+    async def call():
+        time.sleep(latency)
+    return call
+
+
+CALLS = {
+    "load_account": lambda: gateway.load_account(SOURCE.public_key),
+    "get_balances": lambda: gateway.get_balances(SOURCE.public_key),
+    "get_transaction": lambda: gateway.get_transaction(TRANSACTION_HASH),
+    "get_transaction_payments": lambda: gateway.get_transaction_payments(TRANSACTION_HASH),
+    "fee_stats": lambda: gateway.fee_stats(),
+    "base_fee": lambda: gateway.base_fee(),
+    "get_account_balances": lambda: get_account_balances(SOURCE.public_key),
+    "check_transaction_status": lambda: check_transaction_status(TRANSACTION_HASH, max_attempts=1),
+    "send_stellar_payment": lambda: send_stellar_payment(
+        source_keypair=SOURCE, destination_public=DESTINATION, amount="1"
+    ),
+}
+
+
+async def max_loop_lag(make_call, concurrency, interval=0.005):
+    """Longest the loop was held up while `concurrency` calls ran, and their results."""
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def heartbeat():
+        nonlocal lag
+        while not done.is_set():
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lag = max(lag, time.perf_counter() - expected)
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(interval)  # let the heartbeat get going
+    try:
+        results = await asyncio.gather(*(make_call() for _ in range(concurrency)))
+    finally:
+        done.set()
+        await beat
+    return lag, results
+
+
+@pytest.fixture
+async def slow_horizon():
+    await Horizon.connect(transport=fake_horizon(LATENCY))
+    yield
+    await Horizon.close()
+
+
+async def test_heartbeat_catches_a_blocking_call():
+    lag, _ = await max_loop_lag(blocking_call(LATENCY), 1)
+    assert lag > MAX_LOOP_LAG
+
+
+@pytest.mark.parametrize("name", CALLS)
+async def test_horizon_call_does_not_block_the_loop(slow_horizon, name):
+    lag, results = await max_loop_lag(CALLS[name], CONCURRENCY)
+    assert lag <= MAX_LOOP_LAG, f"{name} blocked the event loop for {lag * 1000:.1f} ms"
+    if name == "send_stellar_payment":
+        assert results[0]["successful"], results[0]["error"]
@@ -0,0 +1,48 @@
+# tests/test_student_transactions.py
+
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core import transaction_log
+from app.core.auth import get_current_user
+from app.main import app
+from app.models.models import UserRole
+from app.routes import student_transactions
+
+PAYMENT_HASH = "ef" * 32
+
+
+@pytest.fixture
+def student(monkeypatch):
+    async def send_stellar_payment(**kwargs):
+        return {"successful": True, "hash": PAYMENT_HASH}
+
+    monkeypatch.setattr(student_transactions, "send_stellar_payment", send_stellar_payment)
+    monkeypatch.setattr(student_transactions, "get_signing_keypair", lambda user_id, encrypted: object())
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(
+        id=ObjectId(), email="student@example.com", role=UserRole.STUDENT,
+        stellar_public_key="GSTUDENT", stellar_secret_key_encrypted="encrypted",
+    )
+    yield
+    app.dependency_overrides.pop(get_current_user)
+
+
+@pytest.mark.parametrize("error", [
+    HTTPException(status_code=503, detail="Too many pending writes, please retry shortly."),
+    RuntimeError("not primary"),
+])
+def test_sent_payment_returns_its_hash_even_if_it_cannot_be_recorded(fake_db, student, monkeypatch, error):
+    async def add(doc):
+        raise error
+
+    monkeypatch.setattr(transaction_log.transaction_writer, "add", add)
+    client = TestClient(app)
+    response = client.post("/api/stellar/student/send_xlm", json={"destination_public_key": "GFRIEND", "amount": 1})
+    assert response.status_code == 200, response.text
+    assert response.json()["transaction_hash"] == PAYMENT_HASH
+    dead, = fake_db["transactions_dead_letter"].docs
+    assert dead["document"]["transaction_hash"] == PAYMENT_HASH
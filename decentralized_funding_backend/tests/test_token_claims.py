@@ -0,0 +1,82 @@
+# tests/test_token_claims.py
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.core import auth
+from app.core.cache import TTLCache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def embedded_claims(monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret")
+    monkeypatch.setattr(auth, "JWT_EMBED_CLAIMS", True)
+    monkeypatch.setattr(auth, "principal_cache", TTLCache(maxsize=10, ttl=30))
+    monkeypatch.setattr(auth, "token_version_cache", TTLCache(maxsize=10, ttl=30))
+
+
+@pytest.fixture
+def user(fake_db):
+    doc = {
+        "_id": ObjectId(),
+        "email": "student@example.com",
+        "role": "student",
+        "is_verified": True,
+        "stellar_public_key": "GSTUDENT",
+        "token_version": 2,
+    }
+    fake_db["users"].docs.append(doc)
+    return doc
+
+
+def token_for(user):
+    return auth.create_access_token(auth.build_token_claims(user))
+
+
+async def test_principal_comes_from_the_token(fake_db, user):
+    principal = await auth.get_current_principal(token_for(user))
+    assert principal.id == str(user["_id"])
+    assert principal.role == "student" and principal.is_verified
+    assert principal.stellar_public_key == "GSTUDENT"
+    # Only the token version is read, and only once per TTL
+    await auth.get_current_principal(token_for(user))
+    lookups = fake_db["users"].calls_to("find_one")
+    assert len(lookups) == 1
+    assert lookups[0][0][1] == {"token_version": 1}
+
+
+async def test_bumping_the_token_version_revokes_issued_tokens(fake_db, user):
+    token = token_for(user)
+    await auth.get_current_principal(token)
+    fake_db["users"].docs[0]["token_version"] = 3
+    auth.invalidate_principal(user["email"], user["_id"])
+    with pytest.raises(HTTPException) as raised:
+        await auth.get_current_principal(token)
+    assert raised.value.status_code == 401
+    # A token issued after the bump is accepted
+    assert (await auth.get_current_principal(token_for(fake_db["users"].docs[0]))).token_version == 3
+
+
+async def test_deleted_user_is_rejected(fake_db, user):
+    token = token_for(user)
+    fake_db["users"].docs.clear()
+    with pytest.raises(HTTPException) as raised:
+        await auth.get_current_principal(token)
+    assert raised.value.status_code == 401
+
+
+async def test_tampered_token_is_rejected(user):
+    header, claims, signature = token_for(user).split(".")
+    with pytest.raises(HTTPException) as raised:
+        await auth.get_current_principal(f"{header}.{claims}.{signature[::-1]}")
+    assert raised.value.status_code == 401
+
+
+async def test_admin_routes_need_an_admin_claim(user):
+    principal = await auth.get_current_principal(token_for(user))
+    with pytest.raises(HTTPException) as raised:
+        await auth.get_current_admin(principal)
+    assert raised.value.status_code == 403
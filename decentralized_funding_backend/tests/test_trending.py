@@ -0,0 +1,80 @@
+# tests/test_trending.py
+
+import math
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.core import trending
+from app.core.trending import TRENDING_COLLECTION, TrendingTracker, log_add
+
+pytestmark = pytest.mark.anyio
+
+
+def project(category="science", funding_ratio=0.0, status="active"):
+    return {"_id": ObjectId(), "category": category, "status": status, "funding_ratio": funding_ratio}
+
+
+def donate(tracker, to, amount, hours_ago=0.0):
+    tracker.record_donation({"amount": amount, "created_at": datetime.utcnow() - timedelta(hours=hours_ago)}, to)
+
+
+@pytest.mark.parametrize("a, b", [(0.0, 0.0), (1.0, 800.0), (-5.0, 3.0)])
+def test_log_add_is_a_stable_log_sum_exp(a, b):
+    assert log_add(a, b) == pytest.approx(max(a, b) + math.log(1 + math.exp(min(a, b) - max(a, b))))
+    assert log_add(None, b) == b
+
+
+def test_a_donation_loses_half_its_weight_per_half_life():
+    tracker = TrendingTracker()
+    old, new = project(), project()
+    donate(tracker, old, 2.0, hours_ago=trending.TRENDING_HALF_LIFE_HOURS)
+    donate(tracker, new, 1.0)
+    velocities = {entry["project_id"]: entry["velocity"] for entry in tracker.top()}
+    assert velocities[old["_id"]] == pytest.approx(velocities[new["_id"]], rel=1e-3)
+
+
+def test_recent_and_better_funded_projects_rank_first():
+    tracker = TrendingTracker()
+    stale, fresh, funded = project(), project(), project(funding_ratio=1.0)
+    donate(tracker, stale, 10.0, hours_ago=72)
+    donate(tracker, fresh, 10.0)
+    donate(tracker, funded, 10.0)
+    assert [entry["project_id"] for entry in tracker.top()] == [funded["_id"], fresh["_id"], stale["_id"]]
+
+
+def test_feeds_are_per_category_and_skip_cancelled_projects():
+    tracker = TrendingTracker()
+    art, science, cancelled = project("art"), project("science"), project("art", status="cancelled")
+    for target in (art, science, cancelled):
+        donate(tracker, target, 5.0)
+    assert [entry["project_id"] for entry in tracker.top("art")] == [art["_id"]]
+    assert {entry["project_id"] for entry in tracker.top()} == {art["_id"], science["_id"]}
+
+
+def test_top_lists_are_bounded(monkeypatch):
+    monkeypatch.setattr(trending, "TRENDING_TOP_K", 2)
+    tracker = TrendingTracker()
+    projects = [project() for _ in range(3)]
+    for amount, target in enumerate(projects, start=1):
+        donate(tracker, target, float(amount))
+    assert [entry["project_id"] for entry in tracker.top(limit=10)] == [projects[2]["_id"], projects[1]["_id"]]
+
+
+async def test_failed_persist_keeps_contributions_for_the_next_try(fake_db):
+    tracker = TrendingTracker()
+    target = project()
+    donate(tracker, target, 5.0)
+
+    async def unavailable(requests, ordered=True):
+        raise RuntimeError("not primary")
+
+    fake_db[TRENDING_COLLECTION].bulk_write = unavailable
+    with pytest.raises(RuntimeError):
+        await tracker.persist()
+    del fake_db[TRENDING_COLLECTION]
+    await tracker.persist()
+    (requests, *_), _ = fake_db[TRENDING_COLLECTION].calls_to("bulk_write")[0]
+    assert [request._filter for request in requests] == [{"_id": target["_id"]}]
+    assert tracker.stats()["pending_projects"] == 0
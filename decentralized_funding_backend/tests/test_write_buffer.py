@@ -0,0 +1,160 @@
+# tests/test_write_buffer.py
+
+import pytest
+from bson.errors import InvalidDocument
+from fastapi import HTTPException
+from pymongo.errors import AutoReconnect, BulkWriteError, DuplicateKeyError, OperationFailure
+
+from app.core.write_buffer import WriteBehindBuffer
+from tests.conftest import FakeCollection
+
+pytestmark = pytest.mark.anyio
+
+
+class RejectingCollection(FakeCollection):
+    """Rejects chosen _ids with a write error code, like a server-side validator or unique index."""
+
+    def __init__(self):
+        super().__init__()
+        self.reject = {}
+        self.down = False
+        # Writes the batch, then fails as if the reply was lost
+        self.lose_reply = False
+
+    async def insert_many(self, docs, ordered=True):
+        if self.down:
+            raise OperationFailure("not primary")
+        if any(doc.get("unencodable") for doc in docs):
+            raise InvalidDocument("key must not start with '$'")
+        errors = []
+        unique_hashes = {stored.get("transaction_hash") for stored in self.docs} - {None}
+        for index, doc in enumerate(docs):
+            if doc["_id"] in self.reject:
+                errors.append({"index": index, "code": self.reject[doc["_id"]], "errmsg": "rejected"})
+            elif any(stored["_id"] == doc["_id"] for stored in self.docs):
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key", "keyPattern": {"_id": 1}})
+            elif doc.get("transaction_hash") in unique_hashes:
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key",
+                               "keyPattern": {"transaction_hash": 1}})
+            else:
+                self.docs.append(doc)
+        if self.lose_reply:
+            self.lose_reply = False
+            raise AutoReconnect("connection closed")
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+    async def insert_one(self, doc):
+        if self.down:
+            raise OperationFailure("not primary")
+        if any(stored["_id"] == doc["_id"] for stored in self.docs):
+            raise DuplicateKeyError("duplicate key")
+        self.docs.append(doc)
+
+
+@pytest.fixture
+def transactions(fake_db):
+    fake_db["transactions"] = RejectingCollection()
+    return fake_db["transactions"]
+
+
+@pytest.fixture
+def flushed():
+    return []
+
+
+@pytest.fixture
+def buffer(transactions, flushed):
+    async def on_flush(docs):
+        flushed.extend(doc["_id"] for doc in docs)
+
+    return WriteBehindBuffer("transactions", max_batch=10, max_pending=10, on_flush=on_flush, max_attempts=3)
+
+
+def written(collection):
+    return sorted(doc["_id"] for doc in collection.docs)
+
+
+async def test_duplicates_are_dropped_without_side_effects(buffer, transactions, flushed):
+    await buffer.add({"_id": 1})
+    await buffer.flush()
+    await buffer.add({"_id": 1})
+    await buffer.add({"_id": 2})
+    await buffer.flush()
+    assert written(transactions) == [1, 2]
+    assert flushed == [1, 2]
+    assert buffer.stats()["duplicates"] == 1
+
+
+async def test_rejected_document_is_dead_lettered_after_max_attempts(buffer, transactions, fake_db, flushed):
+    transactions.reject = {1: 1000}
+    for doc_id in range(3):
+        await buffer.add({"_id": doc_id})
+    for _ in range(3):
+        await buffer.flush()
+    assert written(transactions) == [0, 2]
+    dead = fake_db["transactions_dead_letter"].docs
+    assert [(entry["document"]["_id"], entry["code"]) for entry in dead] == [(1, 1000)]
+    # Nothing is left to hold up later writes
+    assert buffer.stats()["pending"] == 0 and buffer.stats()["dead_lettered"] == 1
+    await buffer.add({"_id": 3})
+    await buffer.flush()
+    assert flushed == [0, 2, 3]
+
+
+async def test_validation_errors_are_dead_lettered_straight_away(buffer, transactions, fake_db):
+    transactions.reject = {1: 121}
+    await buffer.add({"_id": 1})
+    await buffer.flush()
+    assert buffer.stats()["pending"] == 0
+    assert fake_db["transactions_dead_letter"].docs[0]["code"] == 121
+
+
+async def test_unencodable_document_does_not_sink_its_batch(buffer, transactions, fake_db):
+    await buffer.add({"_id": 1})
+    await buffer.add({"_id": 2, "unencodable": True})
+    await buffer.flush()
+    assert written(transactions) == [1]
+    assert fake_db["transactions_dead_letter"].docs[0]["document"]["_id"] == 2
+
+
+async def test_outage_keeps_documents_and_pushes_back(buffer, transactions):
+    transactions.down = True
+    for doc_id in range(10):
+        await buffer.add({"_id": doc_id})
+    await buffer.flush()
+    with pytest.raises(HTTPException) as raised:
+        await buffer.add({"_id": 10})
+    assert raised.value.status_code == 503
+    transactions.down = False
+    await buffer.flush()
+    assert written(transactions) == list(range(10))
+    assert buffer.stats()["dead_lettered"] == 0
+
+
+async def test_batch_written_before_an_error_still_gets_its_side_effects(buffer, transactions, flushed):
+    transactions.docs.append({"_id": 0, "transaction_hash": "replayed"})
+    transactions.lose_reply = True
+    await buffer.add({"_id": 1})
+    await buffer.add({"_id": 2, "transaction_hash": "replayed"})
+    await buffer.flush()
+    assert written(transactions) == [0, 1] and flushed == []
+    # The retry hits the copy of 1 written above; that is the write succeeding, not a replay
+    await buffer.flush()
+    assert flushed == [1]
+    assert buffer.stats()["written"] == 1 and buffer.stats()["duplicates"] == 1
+    assert buffer.stats()["pending"] == 0
+
+
+async def test_disabled_buffer_raises_failed_writes(transactions, flushed):
+    async def on_flush(docs):
+        flushed.extend(doc["_id"] for doc in docs)
+
+    buffer = WriteBehindBuffer("transactions", on_flush=on_flush, enabled=False)
+    await buffer.add({"_id": 1})
+    await buffer.add({"_id": 1})  # a replay is not an error
+    transactions.down = True
+    with pytest.raises(OperationFailure):
+        await buffer.add({"_id": 2})
+    assert flushed == [1]
+    assert buffer.stats()["written"] == 1 and buffer.stats()["duplicates"] == 1 and buffer.stats()["failures"] == 1